@@ -4,14 +4,10 @@ from utils import storage
 # --- Page Configuration ---
 st.set_page_config(page_title="Language Learning Hub", page_icon="🪐", layout="wide")
 
-# --- Load Lesson Plan ---
-lesson_plan = storage.load_lesson_plan()  # Assuming lesson plan is stored as a list of dicts
-
-# --- Calculate Progress ---
-total_tasks = sum(len(week['assignments']) for week in lesson_plan)
-completed_tasks = sum(
-    1 for week in lesson_plan for task in week['assignments'] if task.get('completed', False)
-)
+# --- Load Progress (maintained by storage as the lesson plan changes) ---
+lesson_progress = storage.load_progress()
+total_tasks = lesson_progress["total"]
+completed_tasks = lesson_progress["completed"]
 
 progress = (completed_tasks / total_tasks) * 100 if total_tasks > 0 else 0
 
@@ -101,6 +97,13 @@ st.markdown(f"""
     <p style="text-align: center; font-size: 18px;">{completed_tasks} out of {total_tasks} lessons completed ({progress:.2f}% 🚀)</p>
     """, unsafe_allow_html=True)
 
+# Progress per week/day
+if lesson_progress["weeks"]:
+    with st.expander("📅 Progress by week/day"):
+        for week in lesson_progress["weeks"]:
+            fraction = week["completed"] / week["total"] if week["total"] else 0
+            st.progress(fraction, text=f"{week['week_or_day']}: {week['completed']}/{week['total']}")
+
 # Encouraging Messages
 if progress == 0:
     st.info("🌌 Ready to start your journey? Your rocket is waiting for lift-off!")
@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import subprocess
+from typing import Dict, List
+from benchmarks.report import summarize
+from benchmarks.bench_pages import _seed_storage
+
+# Modules that are expensive to import and should only load when a page needs them
+HEAVY_MODULES = ["pandas", "openai", "httpx", "requests", "dotenv"]
+
+PAGES = [
+    "app.py",
+    "pages/chatbot.py",
+    "pages/vocab.py",
+    "pages/lesson_plan.py",
+    "pages/history.py",
+    "pages/settings.py"
+]
+
+# Runs one page in a fresh interpreter in bare mode (no Streamlit server).
+# Streamlit itself is imported first so only the page's own imports and first render are timed.
+CHILD = """
+import sys, time, json, runpy
+sys.path.insert(0, {repo_root!r})
+import streamlit
+modules = set(sys.modules)
+start = time.perf_counter()
+try:
+    runpy.run_path({path!r}, run_name="__main__")
+except BaseException:
+    pass  # st.stop() and friends
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "modules": len(set(sys.modules) - modules),
+    "heavy": [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+
+def measure_page(repo_root: str, page: str, env: Dict) -> Dict:
+    code = CHILD.format(repo_root=repo_root, path=os.path.join(repo_root, page), heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=120)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(server, repo_root: str, iterations: int, workdir: str) -> List[Dict]:
+    """Time each page's cold import and first render in fresh processes, listing heavy modules it loaded"""
+    env = dict(os.environ)
+    env.update({
+        "LLM_PROVIDER": "lmstudio",
+        "LMSTUDIO_BASE_URL": server.openai_base_url,
+        "STORAGE_BACKEND": "json",
+        "STORAGE_DIR": _seed_storage(repo_root, workdir)
+    })
+
+    results = []
+    for page in PAGES:
+        samples, heavy, modules = [], set(), 0
+        for _ in range(iterations):
+            measurement = measure_page(repo_root, page, env)
+            samples.append(measurement["elapsed"])
+            heavy.update(measurement["heavy"])
+            modules = measurement["modules"]
+        results.append(summarize("imports", f"{page}.cold_start", samples,
+                                 heavy_modules=sorted(heavy), modules_loaded=modules))
+    return results
@@ -0,0 +1,54 @@
+import os
+import time
+from typing import Dict, List
+from benchmarks.report import summarize
+
+MESSAGES = [
+    {"role": "system", "content": "You are a friendly German language tutor."},
+    {"role": "user", "content": "Wie sagt man 'good morning' auf Deutsch?"}
+]
+
+# (name, LLM_PROVIDER, OLLAMA_API)
+PROVIDERS = [
+    ("openai_compatible", "lmstudio", None),
+    ("ollama_chat", "ollama", "chat"),
+    ("ollama_generate", "ollama", "generate")
+]
+
+
+def _make_client(server, provider: str, ollama_api: str):
+    from utils.llm_client import LLMClient
+
+    os.environ["LLM_PROVIDER"] = provider
+    os.environ["LMSTUDIO_BASE_URL"] = server.openai_base_url
+    os.environ["OLLAMA_BASE_URL"] = server.url
+    if ollama_api:
+        os.environ["OLLAMA_API"] = ollama_api
+    return LLMClient("chat")
+
+
+def run(server, iterations: int) -> List[Dict]:
+    """Time blocking and streaming completions against the stub for each provider path"""
+    results = []
+    for name, provider, ollama_api in PROVIDERS:
+        client = _make_client(server, provider, ollama_api)
+
+        blocking = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            client.chat_completion(MESSAGES)
+            blocking.append(time.perf_counter() - start)
+        results.append(summarize("llm", f"{name}.chat_completion", blocking))
+
+        total, first_token = [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            ttft = None
+            for _chunk in client.chat_completion_stream(MESSAGES):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+            total.append(time.perf_counter() - start)
+            first_token.append(ttft if ttft is not None else total[-1])
+        results.append(summarize("llm", f"{name}.chat_completion_stream", total))
+        results.append(summarize("llm", f"{name}.chat_completion_stream.ttft", first_token))
+    return results
@@ -0,0 +1,61 @@
+import os
+import time
+import shutil
+import tempfile
+from typing import Dict, List
+from benchmarks.report import summarize
+
+PAGES = [
+    "app.py",
+    "pages/chatbot.py",
+    "pages/vocab.py",
+    "pages/lesson_plan.py",
+    "pages/history.py",
+    "pages/settings.py"
+]
+
+
+def _seed_storage(repo_root: str, workdir: str) -> str:
+    """Copy the sample data in assets/ into a scratch JSON storage directory"""
+    from utils import storage
+
+    storage_dir = tempfile.mkdtemp(prefix="pages-", dir=workdir)
+    assets = os.path.join(repo_root, "assets")
+    for name in os.listdir(assets):
+        if name.endswith(".json"):
+            shutil.copy(os.path.join(assets, name), storage_dir)
+
+    os.environ["STORAGE_BACKEND"] = "json"
+    os.environ["STORAGE_DIR"] = storage_dir
+    storage.reset_backends()
+    return storage_dir
+
+
+def run(server, repo_root: str, iterations: int, workdir: str) -> List[Dict]:
+    """Time full page script runs, and one chat turn, through Streamlit's AppTest"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["LLM_PROVIDER"] = "lmstudio"
+    os.environ["LMSTUDIO_BASE_URL"] = server.openai_base_url
+    _seed_storage(repo_root, workdir)
+
+    results = []
+    for page in PAGES:
+        path = os.path.join(repo_root, page)
+        samples, errors = [], 0
+        for _ in range(iterations):
+            start = time.perf_counter()
+            at = AppTest.from_file(path, default_timeout=60).run()
+            samples.append(time.perf_counter() - start)
+            errors += len(at.exception)
+        results.append(summarize("pages", f"{page}.run", samples, errors=errors))
+
+    samples, errors = [], 0
+    for i in range(iterations):
+        at = AppTest.from_file(os.path.join(repo_root, "pages/chatbot.py"), default_timeout=60).run()
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"Hallo, wie geht's? ({i})").run()
+        samples.append(time.perf_counter() - start)
+        errors += len(at.exception)
+    results.append(summarize("pages", "pages/chatbot.py.chat_turn", samples, errors=errors))
+    return results
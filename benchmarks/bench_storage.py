@@ -0,0 +1,99 @@
+import os
+import time
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from benchmarks.report import summarize
+
+BACKENDS = ["json", "sqlite"]
+MESSAGES_PER_DAY = 200
+
+
+def make_vocabulary(size: int) -> List[Dict]:
+    return [
+        {"word": f"Wort{i}", "translation": f"word {i}", "example": f"Das ist Wort{i}."}
+        for i in range(size)
+    ]
+
+
+def make_history(size: int) -> List[Dict]:
+    start = datetime(2024, 1, 1, 9, 0)
+    history = []
+    for i in range(size):
+        role = "user" if i % 2 == 0 else "assistant"
+        history.append({
+            "role": role,
+            "content": f"Nachricht {i}: Ich lerne jeden Tag ein bisschen Deutsch.",
+            "id": f"bench-{i}",
+            "timestamp": (start + timedelta(days=i // MESSAGES_PER_DAY, seconds=i)).isoformat()
+        })
+    return history
+
+
+def _time(function: Callable, repeat: int = 1) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _use_backend(name: str, workdir: str):
+    """Point utils.storage at a fresh directory with the given backend"""
+    from utils import storage
+
+    os.environ["STORAGE_BACKEND"] = name
+    os.environ["STORAGE_DIR"] = tempfile.mkdtemp(prefix=f"{name}-", dir=workdir)
+    storage.reset_backends()
+    return storage
+
+
+def run(sizes: List[int], history_sizes: List[int], iterations: int, workdir: str) -> List[Dict]:
+    """Time vocabulary and chat history operations at scale for each storage backend"""
+    results = []
+    for backend in BACKENDS:
+        for size in sizes:
+            storage = _use_backend(backend, workdir)
+            vocab = make_vocabulary(size)
+            tag = f"{backend}.vocab_{size}"
+
+            results.append(summarize("storage", f"{tag}.save_vocabulary", _time(lambda: storage.save_vocabulary(vocab))))
+            results.append(summarize("storage", f"{tag}.load_vocabulary", _time(storage.load_vocabulary, iterations)))
+
+            counter = iter(range(iterations * 2))
+            results.append(summarize("storage", f"{tag}.add_word", _time(
+                lambda: storage.add_word({"word": f"Neu{next(counter)}", "translation": "new", "example": "Neu."}),
+                iterations
+            )))
+            victims = iter(range(iterations * 2))
+            results.append(summarize("storage", f"{tag}.delete_word", _time(
+                lambda: storage.delete_word(f"Wort{next(victims)}"),
+                iterations
+            )))
+
+        for size in history_sizes:
+            storage = _use_backend(backend, workdir)
+            history = make_history(size)
+            tag = f"{backend}.history_{size}"
+
+            results.append(summarize("storage", f"{tag}.save_chat_history", _time(lambda: storage.save_chat_history(history))))
+            results.append(summarize("storage", f"{tag}.load_chat_history", _time(storage.load_chat_history, iterations)))
+
+            counter = iter(range(iterations * 2))
+
+            def append_turn():
+                n = next(counter)
+                storage.append_chat_history([
+                    {"role": "user", "content": f"Frage {n}", "id": f"append-{n}-u", "timestamp": datetime.now().isoformat()},
+                    {"role": "assistant", "content": f"Antwort {n}", "id": f"append-{n}-a", "timestamp": datetime.now().isoformat()}
+                ])
+
+            results.append(summarize("storage", f"{tag}.append_chat_history", _time(append_turn, iterations)))
+            results.append(summarize("storage", f"{tag}.list_history_days", _time(storage.list_history_days, iterations)))
+            first_day = history[0]["timestamp"][:10]
+            results.append(summarize("storage", f"{tag}.load_history_day", _time(
+                lambda: storage.load_history_day(first_day, 0, 50),
+                iterations
+            )))
+    return results
@@ -0,0 +1,68 @@
+import sys
+import json
+import platform
+import statistics
+from datetime import datetime
+from typing import Dict, List
+
+
+def summarize(suite: str, name: str, samples: List[float], unit: str = "s", **extra) -> Dict:
+    """Reduce timing samples to one report entry"""
+    ordered = sorted(samples)
+    entry = {
+        "suite": suite,
+        "name": name,
+        "unit": unit,
+        "samples": len(ordered),
+        "mean": statistics.fmean(ordered) if ordered else None,
+        "p50": statistics.median(ordered) if ordered else None,
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else None,
+        "min": ordered[0] if ordered else None,
+        "max": ordered[-1] if ordered else None
+    }
+    entry.update(extra)
+    return entry
+
+
+def build_report(results: List[Dict], settings: Dict) -> Dict:
+    return {
+        "created": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": results
+    }
+
+
+def write_report(report: Dict, path: str):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Return entries whose p50 is more than threshold (e.g. 0.25 = 25%) slower than the baseline"""
+    previous = {(r["suite"], r["name"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["suite"], result["name"]))
+        if not before or not before.get("p50") or result.get("p50") is None:
+            continue
+        ratio = result["p50"] / before["p50"]
+        if ratio > 1 + threshold:
+            regressions.append({
+                "suite": result["suite"],
+                "name": result["name"],
+                "baseline_p50": before["p50"],
+                "p50": result["p50"],
+                "ratio": ratio
+            })
+    return regressions
+
+
+def format_table(results: List[Dict]) -> str:
+    lines = [f"{'suite':<8} {'name':<48} {'p50':>10} {'p95':>10} {'n':>4}"]
+    for r in results:
+        p50 = f"{r['p50'] * 1000:.1f}ms" if r.get("p50") is not None else "-"
+        p95 = f"{r['p95'] * 1000:.1f}ms" if r.get("p95") is not None else "-"
+        lines.append(f"{r['suite']:<8} {r['name']:<48} {p50:>10} {p95:>10} {r['samples']:>4}")
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.stub_server import StubServer, StubSettings
+from benchmarks.report import build_report, write_report, compare, format_table
+
+SUITES = ["llm", "storage", "pages", "imports"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the AI Language Tutor benchmark suite")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    parser.add_argument("--iterations", type=int, default=5, help="Samples per measurement")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000], help="Vocabulary sizes")
+    parser.add_argument("--history-sizes", nargs="+", type=int, default=[10000, 50000], help="Chat history sizes")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Stub decode speed")
+    parser.add_argument("--response-tokens", type=int, default=20, help="Stub tokens per answer")
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown against the baseline")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    settings = StubSettings(args.latency, args.tokens_per_second, args.response_tokens)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="tutor-bench-") as workdir, StubServer(settings=settings) as server:
+        # Relative paths (response cache, model catalog) land in the scratch directory, not in assets/
+        os.chdir(workdir)
+        try:
+            if "llm" in args.suites:
+                from benchmarks import bench_llm
+                results += bench_llm.run(server, args.iterations)
+            if "storage" in args.suites:
+                from benchmarks import bench_storage
+                results += bench_storage.run(args.sizes, args.history_sizes, args.iterations, workdir)
+            if "pages" in args.suites:
+                from benchmarks import bench_pages
+                results += bench_pages.run(server, REPO_ROOT, args.iterations, workdir)
+            if "imports" in args.suites:
+                from benchmarks import bench_imports
+                results += bench_imports.run(server, REPO_ROOT, args.iterations, workdir)
+        finally:
+            os.chdir(cwd)
+
+    report = build_report(results, {
+        "suites": args.suites,
+        "iterations": args.iterations,
+        "sizes": args.sizes,
+        "history_sizes": args.history_sizes,
+        "stub": vars(settings)
+    })
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['suite']} {r['name']}: {r['baseline_p50'] * 1000:.1f}ms -> {r['p50'] * 1000:.1f}ms ({r['ratio']:.2f}x)")
+        exit_code = 1 if regressions else 0
+
+    write_report(report, output)
+    print(format_table(results))
+    print(f"\nReport written to {output}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+
+RESPONSE_WORDS = ["Hallo", " Welt", "!", " Wie", " geht", " es", " dir", "?"]
+
+
+class StubSettings:
+    """Timing of the stand-in model: time to first token, decode speed and answer length"""
+
+    def __init__(self, latency: float = 0.05, tokens_per_second: float = 100.0,
+                 response_tokens: int = 20, models: List[str] = None, embedding_dim: int = 64):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.models = models or ["stub-small", "stub-large"]
+        self.embedding_dim = embedding_dim
+
+    def tokens(self) -> List[str]:
+        return [RESPONSE_WORDS[i % len(RESPONSE_WORDS)] for i in range(self.response_tokens)]
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _embed(text: str, dim: int) -> List[float]:
+    """Hashed bag of words: texts sharing words get similar vectors"""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        vector[zlib.crc32(word.strip(".,!?").encode("utf-8")) % dim] += 1.0
+    return vector
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers the OpenAI and Ollama endpoints used by LLMClient"""
+
+    protocol_version = "HTTP/1.1"
+    settings: StubSettings = StubSettings()
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, data: Dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_body(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _prompt_tokens(self, body: Dict) -> int:
+        if "messages" in body:
+            return sum(_estimate_tokens(m.get("content", "")) for m in body["messages"])
+        return _estimate_tokens(body.get("prompt", ""))
+
+    def do_GET(self):
+        if self.path == "/v1/models":
+            self._send_json({"object": "list", "data": [{"id": m, "object": "model"} for m in self.settings.models]})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{"name": m} for m in self.settings.models]})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = self._read_body()
+        time.sleep(self.settings.latency)
+        if self.path == "/v1/chat/completions":
+            self._openai_completion(body)
+        elif self.path in ("/api/generate", "/api/chat"):
+            self._ollama_completion(body)
+        elif self.path in ("/v1/embeddings", "/api/embed"):
+            self._embeddings(body)
+        else:
+            self.send_error(404)
+
+    def _openai_completion(self, body: Dict):
+        tokens = self.settings.tokens()
+        usage = {
+            "prompt_tokens": self._prompt_tokens(body),
+            "completion_tokens": len(tokens),
+            "total_tokens": self._prompt_tokens(body) + len(tokens)
+        }
+        base = {"id": "stub", "created": int(time.time()), "model": body.get("model", "")}
+
+        if not body.get("stream"):
+            time.sleep(len(tokens) * self.settings.token_delay())
+            self._send_json(dict(base, object="chat.completion", usage=usage, choices=[
+                {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+            ]))
+            return
+
+        self._start_chunked("text/event-stream")
+        for token in tokens:
+            time.sleep(self.settings.token_delay())
+            chunk = dict(base, object="chat.completion.chunk", choices=[
+                {"index": 0, "delta": {"content": token}, "finish_reason": None}
+            ])
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        final = dict(base, object="chat.completion.chunk", choices=[], usage=usage)
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _embeddings(self, body: Dict):
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = [_embed(text, self.settings.embedding_dim) for text in texts]
+        if self.path == "/api/embed":
+            self._send_json({"model": body.get("model", ""), "embeddings": vectors})
+            return
+        tokens = sum(_estimate_tokens(text) for text in texts)
+        self._send_json({
+            "object": "list",
+            "model": body.get("model", ""),
+            "data": [{"object": "embedding", "index": i, "embedding": vector} for i, vector in enumerate(vectors)],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    def _ollama_completion(self, body: Dict):
+        tokens = self.settings.tokens()
+        is_chat = self.path == "/api/chat"
+
+        def message(text: str, done: bool) -> Dict:
+            data = {"model": body.get("model", ""), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": done}
+            if is_chat:
+                data["message"] = {"role": "assistant", "content": text}
+            else:
+                data["response"] = text
+            if done:
+                data["prompt_eval_count"] = self._prompt_tokens(body)
+                data["eval_count"] = len(tokens)
+                if not is_chat:
+                    data["context"] = list(range(self._prompt_tokens(body) + len(tokens)))
+            return data
+
+        if not body.get("stream", True):
+            time.sleep(len(tokens) * self.settings.token_delay())
+            self._send_json(message("".join(tokens), True))
+            return
+
+        self._start_chunked("application/x-ndjson")
+        for token in tokens:
+            time.sleep(self.settings.token_delay())
+            self._write_chunk((json.dumps(message(token, False)) + "\n").encode("utf-8"))
+        self._write_chunk((json.dumps(message("", True)) + "\n").encode("utf-8"))
+        self._end_chunked()
+
+
+class StubServer:
+    """Local stand-in for OpenAI-compatible and Ollama servers, running on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, settings: StubSettings = None):
+        handler = type("BoundStubHandler", (StubHandler,), {"settings": settings or StubSettings()})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.url}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OpenAI/Ollama stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--response-tokens", type=int, default=20)
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency, args.tokens_per_second, args.response_tokens)
+    server = StubServer(args.host, args.port, settings)
+    print(f"Stub server listening on {server.url} (OpenAI base URL {server.openai_base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -16,30 +16,26 @@ def render_model_selector():
     
     # Load current configuration
     config = load_config()
-    llm_models = config.get("llm_models", {"chat": None, "lesson": None, "available": []})
+    llm_models = config.get("llm_models", {"chat": None, "lesson": None})
     
-    # Get available models (use cached if available)
-    available_models = llm_models.get("available", [])
+    # Get available models from the catalog cache (refreshed in the background when stale)
+    available_models = get_available_models()
     
     # Refresh models button
     col1, col2 = st.sidebar.columns([3, 1])
     with col2:
         if st.button("🔄", help="Refresh available models"):
-            client = get_llm_client()
-            available_models = client.refresh_available_models()
-            st.rerun()
+            try:
+                get_llm_client().refresh_available_models()
+                st.rerun()
+            except Exception as e:
+                st.sidebar.error(f"Failed to refresh models: {e}")
     
     with col1:
         st.write("**Available Models:**")
     
     if not available_models:
         st.sidebar.warning("No models available. Check your provider connection.")
-        # Try to refresh automatically
-        try:
-            client = get_llm_client()
-            available_models = client.refresh_available_models()
-        except Exception:
-            pass
     
     if available_models:
         # Model selection for chat
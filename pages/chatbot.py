@@ -2,14 +2,11 @@
 import streamlit as st
 from utils import storage
 from sidebar import render_sidebar
-from utils.llm_client import chat_completion, get_llm_client, get_prompt
+from utils.llm_client import chat_completion, chat_completion_stream, get_llm_client, get_prompt, load_config
+from utils.chat_history import new_message, to_llm_messages
+from utils.context_window import ContextWindow
+from utils.vocab_miner import mine_in_background
 import random
-import json
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
 
 st.set_page_config(page_title="Let's talk", page_icon="💬", layout="wide")
 
@@ -24,14 +21,13 @@ if st.session_state.get("chatbot_preset") and not st.session_state.get("preset_l
     
     # Add lesson prompt to messages if not already present
     if not st.session_state.messages or st.session_state.messages[-1]["content"] != lesson_prompt:
-        st.session_state.messages.append({"role": "user", "content": lesson_prompt})
+        st.session_state.messages.append(new_message("user", lesson_prompt))
 else:
     # Default guidance when no lesson is selected
     st.write("Talk to your AI teaching assistant on any topic, ask for explanations of rules, useful vocabulary, or exercises.")
 
-# --- Load Configuration from config.json and environment ---
-with open('utils/config.json', 'r') as config_file:
-    config = json.load(config_file)
+# --- Load Configuration from config.json (cached) ---
+config = load_config()
 
 # Extract parameters from config and environment
 LANGUAGE = config.get('language', 'English')
@@ -44,11 +40,13 @@ except Exception as e:
     st.error(f"Failed to initialize LLM client: {e}")
     st.stop()
 
-# AI Response Function from the whole history
-def get_ai_response_history(messages):
-    # Include system prompt at the beginning of conversation
-    messages_with_system = [st.session_state.system_prompt] + messages
-    return chat_completion(messages_with_system, model_type="chat")
+# Streaming AI response from the conversation history, rendered token by token
+def stream_ai_response_history(messages, prompt_key=None):
+    # System prompt, running summary of older turns, then the recent turns within the token budget
+    messages_with_system = st.session_state.context_window.build(
+        st.session_state.system_prompt, to_llm_messages(messages)
+    )
+    return chat_completion_stream(messages_with_system, model_type="chat", prompt_key=prompt_key)
 
 # --- Initialize session state for messages if not present ---
 if "messages" not in st.session_state:
@@ -58,6 +56,9 @@ if "messages" not in st.session_state:
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow("chat")
+
 # --- 📖 Vocabulary Panel ---
 render_sidebar()
 st.sidebar.header("💬 Your Teaching Assistant")
@@ -96,7 +97,7 @@ if st.sidebar.button("Add Word"):
         prompt = get_prompt('word_translation', word=new_word)
 
         with st.spinner(f"Fetching translation and example for '{new_word}'..."):
-            response = chat_completion([{"role": "user", "content": prompt}], model_type="chat")
+            response = chat_completion([{"role": "user", "content": prompt}], model_type="chat", prompt_key="word_translation")
 
         # Parse the response
         content = response
@@ -111,12 +112,13 @@ if st.sidebar.button("Add Word"):
 
         if translation and example:
             # Add word with translation and example
-            vocab_list.append({
+            new_entry = {
                 "word": new_word.strip(),
                 "translation": translation,
                 "example": example
-            })
-            storage.save_vocabulary(vocab_list)
+            }
+            vocab_list.append(new_entry)
+            storage.add_word(new_entry)
             st.success(f"Added '{new_word}' with translation and example.")
             st.rerun()
         else:
@@ -128,6 +130,7 @@ else:
     st.sidebar.write("No words in your vocabulary.")
 
 # --- 📋 Quiz Button ---
+quiz_prompt = None
 if st.sidebar.button("📝 Quiz!"):
     if len(vocab_list) < 1:
         st.sidebar.warning("Add at least one word to start a quiz.")
@@ -137,28 +140,35 @@ if st.sidebar.button("📝 Quiz!"):
 
         quiz_prompt = get_prompt('quiz_generation', words=', '.join(quiz_word_list))
 
-        with st.spinner("Generating quiz..."):
-            quiz_response = get_ai_response_history(st.session_state.messages + [{"role": "user", "content": quiz_prompt}])
-
-        st.session_state.messages.append({"role": "assistant", "content": quiz_response})
-        
 # Display chat history
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.write(message["content"])
 
+# Stream the quiz below the history so it appears in place
+if quiz_prompt:
+    with st.chat_message("assistant"):
+        quiz_response = st.write_stream(
+            stream_ai_response_history(
+                st.session_state.messages + [{"role": "user", "content": quiz_prompt}],
+                prompt_key="quiz_generation"
+            )
+        )
+
+    st.session_state.messages.append(new_message("assistant", quiz_response))
+
 # Chat interface
 user_input = st.chat_input("Type your message...")
 if user_input:
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    st.session_state.messages.append(new_message("user", user_input))
 
     with st.chat_message("user"):
         st.write(user_input)
 
-    with st.spinner("Thinking..."):
-        bot_reply = get_ai_response_history(st.session_state.messages)
-
     with st.chat_message("assistant"):
-        st.write(bot_reply)
+        bot_reply = st.write_stream(stream_ai_response_history(st.session_state.messages))
+
+    st.session_state.messages.append(new_message("assistant", bot_reply))
 
-    st.session_state.messages.append({"role": "assistant", "content": bot_reply})
+    # Periodically look for new vocabulary in the conversation (runs on a background thread)
+    mine_in_background(st.session_state)
@@ -1,6 +1,4 @@
 import streamlit as st
-import json
-from datetime import datetime
 from sidebar import render_sidebar
 from utils import storage
 
@@ -10,57 +8,68 @@ st.write("Look through your previous lessons.")
 render_sidebar()
 st.sidebar.header("📜 History of your lessons")
 
-# --- Load messages from session state and ensure timestamps ---
+# --- Persist messages added to the session since the last visit ---
 if "messages" in st.session_state:
-    new_messages = []
-    for msg in st.session_state.messages:
-        if msg["role"] != "system":  # Exclude system messages
-            if "timestamp" not in msg:  # Ensure timestamp exists
-                msg["timestamp"] = datetime.now().isoformat()
-            new_messages.append(msg)
+    storage.sync_session_history(st.session_state)
 
-    # Load existing chat history
-    existing_history = storage.load_chat_history()
 
-    # Append only new messages
-    unique_messages = {m["timestamp"]: m for m in existing_history}  # Use timestamp as unique key
-    for msg in new_messages:
-        unique_messages[msg["timestamp"]] = msg  # Avoid overwriting existing ones
-
-    # Save updated chat history
-    updated_chat_history = list(unique_messages.values())
-    existing_history = storage.load_chat_history()
-    storage.save_chat_history(existing_history + new_messages)
-
-
-# --- Load saved chat history ---
-chat_history = storage.load_chat_history()
-
-# --- Group messages by date ---
-history_by_date = {}
-invalid_timestamps = []
-
-for msg in chat_history:
+# --- Semantic search over history and vocabulary ---
+search_query = st.text_input("🔎 Search your lessons and vocabulary", placeholder="e.g. everything I practised about travel")
+search_scope = st.radio("Search in", ["Everything", "Conversations", "Vocabulary"], horizontal=True, label_visibility="collapsed")
+if search_query.strip():
+    from utils import semantic_index  # Loads NumPy only when searching
+    kinds = {"Conversations": ["message"], "Vocabulary": ["vocab"]}.get(search_scope)
     try:
-        msg_time = datetime.strptime(msg["timestamp"][:19], "%Y-%m-%dT%H:%M:%S")
-     # Convert timestamp
-        date_str = msg_time.strftime("%Y-%m-%d")  # Extract date part only
-
-        if date_str not in history_by_date:
-            history_by_date[date_str] = []
-        history_by_date[date_str].append(msg)
-
-    except ValueError as e:
-        invalid_timestamps.append(msg["timestamp"])  # Store problematic timestamps
+        with st.spinner("Searching..."):
+            results = semantic_index.search(search_query.strip(), kinds)
+    except Exception as e:
+        st.error(f"Search failed. Check that the embedding model in the `semantic_search` section of config.json is available: {e}")
+    else:
+        syncing, sync_error = semantic_index.sync_status(semantic_index.get_semantic_index())
+        if syncing:
+            st.caption("🔄 New messages and words are being indexed and will show up in later searches.")
+        elif sync_error:
+            st.caption(f"⚠️ Indexing new messages and words failed and will be retried: {sync_error}")
+        if not results:
+            st.info("Nothing indexed yet. Chat or add vocabulary first." if not syncing else "Nothing indexed yet. Search again in a moment.")
+        for item, score in results:
+            if item["kind"] == "vocab":
+                st.markdown(f"📚 **{item['text']}**")
+            else:
+                role = "👤 User" if item.get("role") == "user" else "🤖 Chatbot"
+                st.markdown(f"**{role}** ({item.get('day')}): {item['text']}")
+            st.caption(f"Similarity {score:.2f}")
+    st.divider()
 
+# --- Day list from the history index (messages load only for opened days) ---
+DAYS_PER_PAGE = 30
+MESSAGES_PER_PAGE = 50
 
+history_days = storage.list_history_days()
 
 # --- Display grouped history ---
-if not history_by_date:
+if not history_days:
     st.warning("No conversation history available.")
 else:
-    for date, messages in sorted(history_by_date.items(), reverse=True):
-        with st.expander(f"📅 {date}"):
-            for msg in messages:
+    day_pages = (len(history_days) - 1) // DAYS_PER_PAGE + 1
+    day_page = 1
+    if day_pages > 1:
+        day_page = st.number_input("Page", min_value=1, max_value=day_pages, value=1, key="history_day_page")
+
+    for date, message_count in history_days[(day_page - 1) * DAYS_PER_PAGE:day_page * DAYS_PER_PAGE]:
+        day_expander = st.expander(f"📅 {date} ({message_count} messages)", key=f"history_day_{date}", on_change="rerun")
+        if not day_expander.open:
+            continue
+
+        with day_expander:
+            offset = 0
+            message_pages = (message_count - 1) // MESSAGES_PER_PAGE + 1
+            if message_pages > 1:
+                message_page = st.number_input(
+                    "Page", min_value=1, max_value=message_pages, value=1, key=f"history_page_{date}"
+                )
+                offset = (message_page - 1) * MESSAGES_PER_PAGE
+
+            for msg in storage.load_history_day(date, offset, MESSAGES_PER_PAGE):
                 role = "👤 User" if msg["role"] == "user" else "🤖 Chatbot"
                 st.markdown(f"**{role}:** {msg['content']}")
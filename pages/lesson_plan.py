@@ -5,22 +5,12 @@ from sidebar import render_sidebar
 from utils.llm_client import chat_completion, get_llm_client, get_prompt, load_config, save_config
 import json
 import re
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Set environment variables in Streamlit secrets
-if "OPENAI_API_KEY" not in st.secrets and os.getenv("OPENAI_API_KEY"):
-    st.secrets["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
 
 st.set_page_config(page_title="Lesson Plan", page_icon="📚", layout="wide")
 render_sidebar()
 
-# --- Load Configuration from config.json and environment ---
-with open('utils/config.json', 'r') as config_file:
-    config = json.load(config_file)
+# --- Load Configuration from config.json (cached) ---
+config = load_config()
 
 # Extract parameters from config
 LANGUAGE = config.get('language', 'English')
@@ -102,16 +92,14 @@ with st.sidebar:
     
     if not cached_topics or st.button("🔄 Refresh Topics", help="Generate new topic suggestions"):
         with st.spinner(f"Generating {LANGUAGE} grammar topics..."):
-            topics_prompt = f"""List 15-20 important grammar topics for learning {LANGUAGE}, focusing on levels A1 to C2. 
-            Format as a simple list, one topic per line, no numbering or bullets. 
-            Include topics like: conditionals, subjunctive, future tense, past tense, articles, pronouns, adjectives, etc.
-            Make the topics specific to {LANGUAGE} grammar."""
+            topics_prompt = get_prompt('grammar_topics')
+            topics_system = get_prompt('grammar_topics_system')
             
             try:
                 response = chat_completion([
-                    {"role": "system", "content": f"You are a {LANGUAGE} grammar expert. Provide clear, specific grammar topics."},
+                    {"role": "system", "content": topics_system},
                     {"role": "user", "content": topics_prompt}
-                ], model_type="lesson")
+                ], model_type="lesson", prompt_key="grammar_topics", priority="foreground")
                 
                 # Parse topics from response
                 topics = [topic.strip() for topic in response.strip().split('\n') if topic.strip()]
@@ -159,7 +147,7 @@ with st.sidebar:
             response = chat_completion([
                 {"role": "system", "content": lesson_system},
                 {"role": "user", "content": lesson_prompt}
-            ], model_type="lesson")
+            ], model_type="lesson", prompt_key="lesson_plan_generation", priority="foreground")
 
         # Extract JSON from response safely
         json_match = re.search(r'\{.*\}', response, re.DOTALL)
@@ -187,6 +175,14 @@ with st.sidebar:
             st.error("Error: AI did not return JSON. Please try again.")
 
 # --- 📝 Display and Manage Lesson Plan ---
+dropped_error = storage.lesson_plan_dropped_error()
+if dropped_error:
+    st.error(f"Some progress changes could not be saved: {dropped_error}")
+    st.session_state.lesson_plan = storage.load_lesson_plan()  # Show what was actually saved
+write_error = storage.lesson_plan_write_error()
+if write_error:
+    st.warning(f"Recent progress changes are not saved yet, retrying: {write_error}")
+
 if not st.session_state.lesson_plan:
     st.warning("No lesson plan available. Generate one from the sidebar!")
 else:
@@ -218,7 +214,7 @@ else:
                 # Update completion status
                 if completed != assignment["completed"]:
                     st.session_state.lesson_plan[i]["assignments"][j]["completed"] = completed
-                    storage.save_lesson_plan(st.session_state.lesson_plan)
+                    storage.set_assignment_completed(i, j, completed)
 
             # Play button to practice this item
             with col2:
@@ -233,7 +229,7 @@ else:
             with col3:
                 if st.button("❌", key=f"delete_{i}_{j}"):
                     del st.session_state.lesson_plan[i]["assignments"][j]
-                    storage.save_lesson_plan(st.session_state.lesson_plan)
+                    storage.delete_assignment(i, j)
                     st.rerun()
 
         # Add a new assignment under each week/day
@@ -241,5 +237,5 @@ else:
         if st.button(f"Add to {lesson['week_or_day']}", key=f"add_task_{i}"):
             if new_task.strip():
                 st.session_state.lesson_plan[i]["assignments"].append({"title": new_task.strip(), "completed": False})
-                storage.save_lesson_plan(st.session_state.lesson_plan)
+                storage.add_assignment(i, new_task.strip())
                 st.rerun()
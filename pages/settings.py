@@ -1,7 +1,9 @@
 # Version: 07.01
 import streamlit as st
 from utils.llm_client import get_llm_client, get_available_models, set_model_for_type, load_config, save_config, set_model_settings
-from utils.llm_client import get_prompt
+from utils.llm_client import get_prompt, get_response_cache, get_model_catalog, get_telemetry_sink, get_singleflight_stats, get_scheduler, get_router
+from utils.telemetry import summarize, error_counts, percentile, SUMMARY_RECORDS
+from utils.storage import get_current_user
 import json
 
 st.set_page_config(page_title="Settings", page_icon="⚙️", layout="wide")
@@ -19,7 +21,7 @@ with tab1:
     st.header("🤖 LLM Model Configuration")
     
     # Load current configuration
-    llm_models = config.get("llm_models", {"chat": None, "lesson": None, "available": []})
+    llm_models = config.get("llm_models", {"chat": None, "lesson": None})
     
     # Provider information
     try:
@@ -36,19 +38,29 @@ with tab1:
         with col2:
             if st.button("🔄 Refresh Models", help="Refresh available models from provider"):
                 with st.spinner("Refreshing models..."):
-                    available_models = chat_client.refresh_available_models()
-                    st.success(f"Found {len(available_models)} models")
-                    st.rerun()
+                    try:
+                        available_models = chat_client.refresh_available_models()
+                        st.success(f"Found {len(available_models)} models")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Failed to refresh models: {e}")
     
     except Exception as e:
         st.error(f"Failed to connect to LLM provider: {e}")
         st.stop()
     
-    # Get available models
-    available_models = llm_models.get("available", [])
+    # Get available models from the catalog cache (refreshed in the background when stale)
+    available_models = get_available_models()
+    catalog_entry = get_model_catalog().entry(chat_client) or {}
+    
+    if catalog_entry.get("last_error"):
+        st.caption(f"⚠️ Last model refresh failed: {catalog_entry['last_error']}")
     
     if not available_models:
-        st.warning("No models available. Please refresh models or check your provider connection.")
+        if get_model_catalog().is_refreshing(chat_client):
+            st.info("Loading models from the provider in the background...")
+        else:
+            st.warning("No models available. Please refresh models or check your provider connection.")
         if st.button("🔄 Try Refresh Now"):
             try:
                 client = get_llm_client()
@@ -328,8 +340,9 @@ with tab3:
         "Language": config.get('language', 'Not set'),
         "Chat Model": config.get('llm_models', {}).get('chat', 'Not set'),
         "Lesson Model": config.get('llm_models', {}).get('lesson', 'Not set'),
-        "Available Models": len(config.get('llm_models', {}).get('available', [])),
-        "Prompts Configured": len(config.get('prompts', {}))
+        "Available Models": len(get_available_models()),
+        "Prompts Configured": len(config.get('prompts', {})),
+        "Storage User": get_current_user() or "Shared (anonymous)"
     }
     
     for key, value in config_display.items():
@@ -345,12 +358,124 @@ with tab3:
     
     if st.button("🔄 Reset Model Cache", help="Clear cached model list and refresh"):
         try:
-            config['llm_models']['available'] = []
-            save_config(config)
+            get_model_catalog().clear()
             st.success("Model cache cleared. Refresh models on the Model Selection tab.")
         except Exception as e:
             st.error(f"Failed to reset cache: {e}")
     
+    # Response cache statistics
+    st.subheader("🗄️ Response Cache")
+    cache_settings = config.get("response_cache", {})
+    if cache_settings.get("enabled", False):
+        cache_stats = get_response_cache().stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hits", cache_stats["hits"])
+        col2.metric("Misses", cache_stats["misses"])
+        col3.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+        col4.metric("Entries", cache_stats["entries"])
+        st.caption(f"Cached prompts: {', '.join(cache_settings.get('prompts', [])) or 'none'}")
+        
+        if st.button("🧹 Clear Response Cache", help="Remove all cached LLM responses"):
+            get_response_cache().clear()
+            st.success("Response cache cleared.")
+    else:
+        st.info("Response cache is disabled. Enable it in the `response_cache` section of config.json.")
+    
+    # LLM call telemetry
+    st.subheader("📈 LLM Performance")
+    telemetry_sink = get_telemetry_sink()
+    if telemetry_sink is None:
+        st.info("Telemetry is disabled. Enable it in the `telemetry` section of config.json.")
+    else:
+        records = telemetry_sink.read(limit=SUMMARY_RECORDS)
+        if not records:
+            st.write("No LLM calls recorded yet.")
+        else:
+            rows = summarize(records)
+            ok = [r for r in records if not r.get("error")]
+            latencies = [r["wall_time"] for r in ok]
+            ttfts = [r["ttft"] for r in ok if r.get("ttft") is not None]
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Calls", len(records), help=f"The most recent {SUMMARY_RECORDS} calls at most")
+            col2.metric("p50 Latency", f"{percentile(latencies, 0.5):.2f}s" if latencies else "-")
+            col3.metric("p95 Latency", f"{percentile(latencies, 0.95):.2f}s" if latencies else "-")
+            col4.metric("p50 Time to First Token", f"{percentile(ttfts, 0.5):.2f}s" if ttfts else "-")
+            
+            st.dataframe(
+                [{
+                    "Provider": r["provider"],
+                    "Model": r["model"],
+                    "Calls": r["calls"],
+                    "Errors": r["errors"],
+                    "p50 (s)": r["p50_latency_s"],
+                    "p95 (s)": r["p95_latency_s"],
+                    "p50 TTFT (s)": r["p50_ttft_s"],
+                    "p95 TTFT (s)": r["p95_ttft_s"],
+                    "Tokens/s": r["tokens_per_s"]
+                } for r in rows],
+                hide_index=True
+            )
+            
+            errors = error_counts(records)
+            if errors:
+                st.caption("Errors: " + ", ".join(f"{name} ×{count}" for name, count in errors.items()))
+            
+            if st.button("🧹 Clear Telemetry", help="Remove all recorded LLM calls"):
+                telemetry_sink.clear()
+                st.success("Telemetry cleared.")
+    
+    coalesced = get_singleflight_stats()
+    if coalesced["shared"]:
+        st.caption(f"Identical in-flight requests coalesced since startup: {coalesced['shared']} "
+                   f"(served by {coalesced['executed']} generations)")
+    
+    # Request scheduler queues
+    st.subheader("🚦 Request Scheduler")
+    scheduler = get_scheduler()
+    if scheduler is None:
+        st.info("The request scheduler is disabled. Enable it in the `scheduler` section of config.json.")
+    else:
+        lanes = scheduler.metrics()
+        if not lanes:
+            st.write("No requests scheduled yet.")
+        else:
+            st.dataframe(
+                [{
+                    "Provider": provider,
+                    "Priority": priority,
+                    "In Flight": lane["in_flight"],
+                    "Limit": lane["limit"],
+                    "Queued": lane["queued"][priority],
+                    "Admitted": lane["admitted"][priority],
+                    "p95 Wait (s)": round(lane["p95_wait_s"][priority], 3) if lane["p95_wait_s"][priority] is not None else None
+                } for provider, lane in lanes.items() for priority in lane["queued"]],
+                hide_index=True
+            )
+    
+    # Small/large model routing
+    st.subheader("🔀 Model Routing")
+    router = get_router()
+    if router is None:
+        st.info("Model routing is disabled. Enable it in the `routing` section of config.json.")
+    else:
+        routed = router.stats()
+        provider = get_llm_client("chat").provider
+        if not routed:
+            st.write("No routed requests yet.")
+        else:
+            st.dataframe(
+                [{
+                    "Prompt": prompt_key,
+                    "Small Model": router.settings["rules"].get(prompt_key, {}).get("models", {}).get(provider, "-"),
+                    "Answered by Small Model": counts["small"],
+                    "Invalid Output": counts["invalid"],
+                    "Over Budget": counts["over_budget"],
+                    "Errors": counts["error"]
+                } for prompt_key, counts in routed.items()],
+                hide_index=True
+            )
+    
     st.divider()
     
     # Help information
@@ -2,21 +2,15 @@
 import streamlit as st
 from utils import storage
 from sidebar import render_sidebar
-from utils.llm_client import chat_completion, get_llm_client, get_prompt
-import pandas as pd
-import json
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from utils.llm_client import chat_completion, get_llm_client, get_prompt, load_config
+from utils import vocab_import
+from utils import vocab_miner
 
 st.set_page_config(page_title="Vocabulary", page_icon="📚", layout="wide")
 render_sidebar()
 
-# --- Load Configuration from config.json and environment ---
-with open('utils/config.json', 'r') as config_file:
-    config = json.load(config_file)
+# --- Load Configuration from config.json (cached) ---
+config = load_config()
 
 # Extract parameters from config
 LANGUAGE = config.get('language', 'English')
@@ -58,8 +52,7 @@ if vocab_list:
         col1, col2 = st.sidebar.columns([0.7, 0.3])  # Adjust for better alignment
         col1.markdown(f"**{word_entry['word']}**")  # Display word
         if col2.button("❌", key=f"delete_{i}"):  # Inline delete button
-            vocab_list.pop(i)
-            storage.save_vocabulary(vocab_list)
+            storage.delete_word(vocab_list.pop(i)["word"])
             st.rerun()  # Refresh UI after deletion
 else:
     st.sidebar.write("No words in your vocabulary.")
@@ -67,6 +60,7 @@ else:
 # --- Vocabulary Table Display ---
 if vocab_list:
     # Convert to DataFrame for display
+    import pandas as pd  # Loaded only when there is a table to render
     vocab_df = pd.DataFrame(vocab_list)
 
     # Rename columns for clarity
@@ -81,6 +75,44 @@ if vocab_list:
 else:
     st.warning("Your vocabulary list is empty. Add new words using the sidebar.")
 
+# --- Suggested Words (mined from conversations in the background) ---
+st.subheader("💡 Suggested Words")
+miner = vocab_miner.get_vocab_miner()
+vocab_miner.mine_in_background(st.session_state)
+suggestions = miner.suggestions()
+
+if suggestions:
+    for k, suggestion in enumerate(suggestions):
+        col1, col2, col3 = st.columns([0.7, 0.15, 0.15])
+        col1.markdown(f"**{suggestion['word']}** — {suggestion['translation']}  \n_{suggestion['example']}_")
+        if suggestion.get("reason"):
+            col1.caption(suggestion["reason"])
+        if col2.button("✅ Add", key=f"accept_suggestion_{k}"):
+            entry = miner.accept(suggestion["word"])
+            if entry and all(w["word"] != entry["word"] for w in vocab_list):
+                storage.add_word(entry)
+            st.rerun()
+        if col3.button("🚫 Dismiss", key=f"dismiss_suggestion_{k}"):
+            miner.dismiss(suggestion["word"])
+            st.rerun()
+
+    if st.button("✅ Add all suggestions"):
+        existing = {w["word"] for w in vocab_list}
+        entries = [miner.accept(suggestion["word"]) for suggestion in suggestions]
+        storage.add_words([entry for entry in entries if entry and entry["word"] not in existing])
+        st.rerun()
+else:
+    st.caption("No suggestions yet. Words you ask about or get wrong in the chat will show up here.")
+
+if miner.is_running():
+    st.caption("🔍 Looking for new words in your recent conversations...")
+elif miner.last_error:
+    st.caption(f"⚠️ The last search for new words failed and will be retried: {miner.last_error}")
+elif st.button("🔍 Check my conversations now"):
+    storage.sync_session_history(st.session_state)
+    miner.start()
+    st.rerun()
+
 # --- Add New Word Section ---
 new_word = st.sidebar.text_input("New word", key="new_vocab_word")
 
@@ -94,7 +126,7 @@ if st.sidebar.button("Add Word"):
                 response = chat_completion([
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt}
-                ], model_type="chat")
+                ], model_type="chat", prompt_key="word_translation", priority="foreground")
 
                 # Parse the response
                 content = response.strip()
@@ -115,7 +147,7 @@ if st.sidebar.button("Add Word"):
                     
                     # Save immediately after generation
                     vocab_list.append(new_entry)
-                    storage.save_vocabulary(vocab_list)
+                    storage.add_word(new_entry)
                     
                     st.success(f"Added '{new_word}' with translation and example.")
                     st.rerun()
@@ -126,3 +158,45 @@ if st.sidebar.button("Add Word"):
                 st.error(f"Error fetching data from LLM: {e}")
     else:
         st.warning("Please enter a unique word.")
+
+# --- Bulk Import Section ---
+with st.sidebar.expander("📥 Bulk Import"):
+    pasted_words = st.text_area(
+        "Paste words",
+        key="bulk_import_text",
+        help="One word per line, or separated by commas or semicolons"
+    )
+    uploaded_file = st.file_uploader("...or upload a CSV/TXT file", type=["csv", "txt"], key="bulk_import_file")
+
+    if st.button("Import Words", key="bulk_import_button"):
+        words = vocab_import.parse_word_list(pasted_words)
+        if uploaded_file is not None:
+            words += vocab_import.parse_uploaded_file(uploaded_file.name, uploaded_file.getvalue())
+
+        # Drop duplicates between paste and file, then words already in the vocabulary
+        words = vocab_import.dedupe_words(vocab_import.parse_word_list("\n".join(words)), vocab_list)
+
+        if not words:
+            st.warning("No new words to import.")
+        else:
+            with st.spinner(f"Translating {len(words)} words..."):
+                try:
+                    new_entries, failed_words = vocab_import.translate_words(words, model_type="chat")
+                except Exception as e:
+                    new_entries, failed_words = [], words
+                    st.error(f"Error fetching data from LLM: {e}")
+
+            if new_entries:
+                vocab_list.extend(new_entries)
+                storage.add_words(new_entries)
+
+            # Keep the outcome across the rerun that refreshes the table
+            st.session_state.bulk_import_result = (len(new_entries), failed_words)
+            st.rerun()
+
+    if "bulk_import_result" in st.session_state:
+        imported_count, failed_words = st.session_state.pop("bulk_import_result")
+        if imported_count:
+            st.success(f"Imported {imported_count} words.")
+        if failed_words:
+            st.warning(f"Could not translate {len(failed_words)} words: {', '.join(failed_words[:20])}{'...' if len(failed_words) > 20 else ''}")
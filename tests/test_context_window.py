@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+import pytest
+from utils import context_window
+from utils.context_window import ContextWindow
+
+
+@pytest.fixture(autouse=True)
+def small_budget(monkeypatch):
+    context_window.set_tokenizer(len)  # One token per character
+    monkeypatch.setattr(context_window, "get_llm_client", lambda model_type: SimpleNamespace(model="m"))
+    monkeypatch.setattr(context_window, "get_context_settings", lambda: {"min_recent_messages": 2})
+    monkeypatch.setattr(context_window, "get_context_budget", lambda model: 100)
+    monkeypatch.setattr(context_window, "get_prompt", lambda key, **kwargs: f"Summary: {kwargs['summary']}")
+    yield
+    context_window.set_tokenizer(None)
+
+
+SYSTEM = {"role": "system", "content": "x" * 6}  # 10 tokens with the per-message overhead
+
+
+def turns(count):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"{i}" * 16} for i in range(count)]  # 20 tokens each
+
+
+def test_short_conversation_is_sent_whole():
+    messages = turns(4)
+    assert ContextWindow().build(SYSTEM, messages) == [SYSTEM] + messages
+
+
+def test_old_turns_are_folded_into_the_summary(monkeypatch):
+    folded = []
+
+    def summarize(summary, messages, model_type):
+        folded.extend(messages)
+        return "earlier turns"
+
+    monkeypatch.setattr(context_window, "summarize_messages", summarize)
+    window = ContextWindow()
+    messages = turns(6)
+    sent = window.build(SYSTEM, messages)
+    assert folded == messages[:3]
+    assert window.summarized_count == 3
+    assert sent == [SYSTEM, {"role": "system", "content": "Summary: earlier turns"}] + messages[3:]
+
+
+def fail(summary, messages, model_type):
+    raise ConnectionError("provider down")
+
+
+def test_failed_summary_sends_the_newest_turns_that_fit(monkeypatch):
+    monkeypatch.setattr(context_window, "summarize_messages", fail)
+    window = ContextWindow()
+    messages = turns(6)
+    sent = window.build(SYSTEM, messages)
+    # 10 tokens of system prompt leave room for four 20-token turns; nothing is marked as summarized
+    assert sent == [SYSTEM] + messages[2:]
+    assert window.summarized_count == 0
+    assert context_window.count_message_tokens(sent) <= 100
+
+
+def test_failed_summary_keeps_the_minimum_recent_turns(monkeypatch):
+    monkeypatch.setattr(context_window, "summarize_messages", fail)
+    monkeypatch.setattr(context_window, "get_context_budget", lambda model: 30)
+    messages = turns(5)
+    assert ContextWindow().build(SYSTEM, messages) == [SYSTEM] + messages[3:]
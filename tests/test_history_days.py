@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+from utils.storage_backends import JSONStorage, SQLiteStorage
+
+
+def message(day, content):
+    return {"role": "user", "content": content, "id": f"{day}-{content}", "timestamp": f"{day}T10:00:00"}
+
+
+HISTORY = [
+    message("2026-10-01", "Guten Morgen"),
+    message("2026-10-01", "Wie geht's?"),
+    message("2026-10-02", "Grüße aus Köln"),
+    message("2026-10-01", "Noch etwas"),  # Out of order: a second range for the day
+    {"role": "user", "content": "no timestamp"},
+    message("2026-10-03", "Tschüss"),
+]
+
+
+def day_contents(backend, day, offset=0, limit=None):
+    return [m["content"] for m in backend.load_history_day(day, offset, limit)]
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "json":
+        return JSONStorage(str(tmp_path))
+    return SQLiteStorage(str(tmp_path / "tutor.db"))
+
+
+def test_days_are_listed_and_loaded(backend):
+    backend.save_chat_history(HISTORY)
+    assert backend.list_history_days() == [("2026-10-03", 1), ("2026-10-02", 1), ("2026-10-01", 3)]
+    assert day_contents(backend, "2026-10-01") == ["Guten Morgen", "Wie geht's?", "Noch etwas"]
+    assert day_contents(backend, "2026-10-02") == ["Grüße aus Köln"]
+    assert day_contents(backend, "2026-10-01", offset=1, limit=1) == ["Wie geht's?"]
+    assert day_contents(backend, "2026-09-30") == []
+
+
+def test_json_day_is_read_without_parsing_the_whole_history(tmp_path, monkeypatch):
+    backend = JSONStorage(str(tmp_path))
+    backend.save_chat_history(HISTORY)
+    with open(backend.chat_history_file) as f:
+        assert json.load(f) == HISTORY  # Still a plain JSON array
+
+    monkeypatch.setattr(backend, "load_chat_history", lambda: pytest.fail("whole history parsed"))
+    assert day_contents(backend, "2026-10-01") == ["Guten Morgen", "Wie geht's?", "Noch etwas"]
+    assert day_contents(backend, "2026-10-03") == ["Tschüss"]
+
+
+def test_json_history_written_elsewhere_is_reindexed(tmp_path):
+    backend = JSONStorage(str(tmp_path))
+    backend.save_chat_history(HISTORY[:2])
+    # An older version's layout and index: one line, position ranges only
+    with open(backend.chat_history_file, "w") as f:
+        json.dump(HISTORY, f)
+    with open(backend.chat_history_index_file, "w") as f:
+        json.dump({"stamp": None, "days": {"2026-10-01": [[0, 2]]}}, f)
+
+    assert day_contents(backend, "2026-10-01") == ["Guten Morgen", "Wie geht's?", "Noch etwas"]
+    assert backend.load_chat_history() == HISTORY
+
+
+def test_json_history_replaced_after_the_index_was_read(tmp_path, monkeypatch):
+    backend = JSONStorage(str(tmp_path))
+    backend.save_chat_history(HISTORY)
+    index = backend._load_history_index()
+    backend.save_chat_history([message("2026-10-01", "Neu")] + HISTORY)
+    monkeypatch.setattr(backend, "_load_history_index", lambda: index)
+    # Positions from the old index applied to the new file's parse, never bytes into the wrong copy
+    assert len(backend.load_history_day("2026-10-01")) == 3
+
+
+def test_json_empty_history_creates_no_files(tmp_path):
+    backend = JSONStorage(str(tmp_path))
+    assert backend.list_history_days() == []
+    assert backend.load_history_day("2026-10-01") == []
+    assert not os.path.exists(backend.chat_history_file)
@@ -0,0 +1,57 @@
+import pytest
+from utils import storage
+from utils.chat_history import new_message
+
+
+class SessionState(dict):
+    """Minimal stand-in for st.session_state: a dict with attribute access"""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    storage.reset_backends()
+    yield storage.get_backend()
+    storage.reset_backends()
+
+
+def stored_contents(backend):
+    return [m["content"] for m in backend.load_chat_history()]
+
+
+def test_failed_save_is_retried(backend, monkeypatch):
+    session = SessionState(messages=[new_message("user", "Hallo"), new_message("assistant", "Hallo!")])
+    original = backend.append_chat_history
+
+    def fail(messages):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend, "append_chat_history", fail)
+    assert storage.sync_session_history(session) == 0
+    assert session.get("history_synced_count", 0) == 0
+
+    monkeypatch.setattr(backend, "append_chat_history", original)
+    assert storage.sync_session_history(session) == 2
+    assert stored_contents(backend) == ["Hallo", "Hallo!"]
+
+
+def test_new_conversation_longer_than_the_old_mark_is_synced_from_the_start(backend):
+    session = SessionState(messages=[new_message("user", "one"), new_message("assistant", "two")])
+    storage.sync_session_history(session)
+
+    # Cleared and grown past the old high-water mark before the next sync
+    session.messages = [new_message("user", f"new {i}") for i in range(3)]
+    assert storage.sync_session_history(session) == 3
+    assert stored_contents(backend) == ["one", "two", "new 0", "new 1", "new 2"]
+
+
+def test_repeated_sync_only_sends_new_messages(backend):
+    session = SessionState(messages=[new_message("user", "one")])
+    assert storage.sync_session_history(session) == 1
+    assert storage.sync_session_history(session) == 0
+    session.messages.append(new_message("assistant", "two"))
+    assert storage.sync_session_history(session) == 1
@@ -0,0 +1,127 @@
+import time
+import threading
+import pytest
+from utils.resilience import ResilientCaller, AttemptTimeout
+
+
+class FakeClient:
+    """Stands in for LLMClient; behaviour per provider is set on the class"""
+
+    behaviours = {}
+
+    def __init__(self, model_type="chat", provider="primary"):
+        self.model_type = model_type
+        self.provider = provider
+        self.model = f"{provider}-model"
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _attempt(self, messages, temperature, max_tokens, model, prompt_key=None, priority="interactive",
+                 on_admitted=None):
+        behaviour = self.behaviours[self.provider]
+        with self._lock:
+            self.calls.append(model)
+            call = len(self.calls)
+        time.sleep(behaviour.get("queue", 0))
+        if on_admitted:
+            on_admitted()
+        time.sleep(behaviour.get("work", 0))
+        error = behaviour.get("errors", {}).get(call)
+        if error is not None:
+            raise error
+        return f"{self.provider}:{call}"
+
+    def _attempt_stream(self, messages, temperature, max_tokens, model, prompt_key=None, priority="interactive",
+                        on_admitted=None):
+        if on_admitted:
+            on_admitted()
+        yield "first"
+        yield "second"
+
+
+def make_caller(**settings):
+    base = {"chain": [], "retries": 0, "backoff_base": 0, "backoff_max": 0, "attempt_timeout": 5}
+    return ResilientCaller(dict(base, **settings))
+
+
+@pytest.fixture(autouse=True)
+def reset_behaviours():
+    FakeClient.behaviours = {}
+
+
+def test_failover_after_retrying_transient_errors():
+    FakeClient.behaviours = {
+        "primary": {"errors": {1: ConnectionError("down"), 2: ConnectionError("down")}},
+        "backup": {}
+    }
+    caller = make_caller(chain=[{"provider": "primary"}, {"provider": "backup"}], retries=1)
+    primary = FakeClient()
+    assert caller.complete(primary, [], 0.1, 10, "primary-model") == "backup:1"
+    assert len(primary.calls) == 2
+
+
+def test_non_transient_error_moves_on_without_retry():
+    FakeClient.behaviours = {"primary": {"errors": {1: ValueError("bad request")}}, "backup": {}}
+    caller = make_caller(chain=[{"provider": "primary"}, {"provider": "backup", "model": "small"}], retries=3)
+    primary = FakeClient()
+    assert caller.complete(primary, [], 0.1, 10, "primary-model") == "backup:1"
+    assert primary.calls == ["primary-model"]
+
+
+def test_last_error_is_raised_when_every_link_fails():
+    FakeClient.behaviours = {"primary": {"errors": {1: ValueError("bad request")}}}
+    with pytest.raises(ValueError):
+        make_caller().complete(FakeClient(), [], 0.1, 10, "primary-model")
+
+
+def test_attempt_timeout():
+    FakeClient.behaviours = {"primary": {"work": 0.5}}
+    with pytest.raises(AttemptTimeout):
+        make_caller(attempt_timeout=0.1).complete(FakeClient(), [], 0.1, 10, "primary-model")
+
+
+def prime_latency(caller, seconds, samples=5):
+    for _ in range(samples):
+        caller.latency.add(("primary", "primary-model"), seconds)
+
+
+def test_hedge_fires_after_p95_of_admitted_time():
+    FakeClient.behaviours = {"primary": {"work": 0.4}}
+    caller = make_caller(hedge=True, hedge_min_samples=5)
+    prime_latency(caller, 0.1)
+    client = FakeClient()
+    started = time.monotonic()
+    caller.complete(client, [], 0.1, 10, "primary-model")
+    assert len(client.calls) == 2
+    assert time.monotonic() - started < 0.6  # Answered by the first request, not after two in a row
+
+
+def test_queue_wait_does_not_trigger_hedge():
+    # Slow to get a slot, fast once admitted: a saturated server must not receive the request twice
+    FakeClient.behaviours = {"primary": {"queue": 0.3, "work": 0.02}}
+    caller = make_caller(hedge=True, hedge_min_samples=5)
+    prime_latency(caller, 0.1)
+    client = FakeClient()
+    caller.complete(client, [], 0.1, 10, "primary-model")
+    assert len(client.calls) == 1
+
+    # The recorded latency excludes the queue wait
+    samples = caller.latency._samples[("primary", "primary-model")]
+    assert samples[-1] < 0.2
+
+
+def test_no_hedge_without_enough_samples():
+    FakeClient.behaviours = {"primary": {"work": 0.2}}
+    caller = make_caller(hedge=True, hedge_min_samples=5)
+    prime_latency(caller, 0.01, samples=4)
+    client = FakeClient()
+    caller.complete(client, [], 0.1, 10, "primary-model")
+    assert len(client.calls) == 1
+
+
+def test_stream_time_to_first_token_is_tracked_apart_from_completions():
+    FakeClient.behaviours = {"primary": {}}
+    caller = make_caller(hedge=True, hedge_min_samples=1)
+    assert list(caller.stream(FakeClient(), [], 0.1, 10, "primary-model")) == ["first", "second"]
+    assert caller.latency.p95(("primary", "primary-model"), 1) is None
+    assert caller.ttft.p95(("primary", "primary-model"), 1) is not None
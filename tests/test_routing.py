@@ -0,0 +1,106 @@
+import time
+import asyncio
+import pytest
+from utils.routing import ModelRouter, validate
+
+RULE = {"latency_budget_seconds": 0.2, "validator": "json_array", "models": {"ollama": "small-model"}}
+
+
+@pytest.fixture
+def router():
+    router = ModelRouter({"rules": {"batch": RULE}})
+    yield router
+    router.close()
+
+
+def large():
+    return "large answer"
+
+
+def test_route_picks_the_small_model_for_the_provider(router):
+    assert router.route("ollama", "batch", "big-model")["model"] == "small-model"
+    assert router.route("ollama", "batch", "small-model") is None
+    assert router.route("openai", "batch", "big-model") is None
+    assert router.route("ollama", "other", "big-model") is None
+
+
+def test_valid_small_answer_is_used(router):
+    assert router.complete(RULE, "batch", lambda budget: '["a", "b"]', large) == '["a", "b"]'
+    assert router.stats() == {"batch": {"small": 1, "invalid": 0, "over_budget": 0, "error": 0}}
+
+
+def test_invalid_small_answer_escalates(router):
+    assert router.complete(RULE, "batch", lambda budget: "Sure! Here are the words.", large) == "large answer"
+    assert router.stats()["batch"]["invalid"] == 1
+
+
+def test_small_request_gets_the_budget_as_its_timeout(router):
+    budgets = []
+
+    def small(budget):
+        budgets.append(budget)
+        time.sleep(budget + 0.1)  # A request honouring its timeout gives up shortly after
+        raise TimeoutError("small model timed out")
+
+    started = time.monotonic()
+    assert router.complete(RULE, "batch", small, large) == "large answer"
+    assert time.monotonic() - started < 0.3
+    assert budgets == [0.2]
+    assert router.stats()["batch"]["over_budget"] == 1
+
+
+def test_small_request_failing_at_its_timeout_counts_as_over_budget(router):
+    def small(budget):
+        time.sleep(budget)
+        raise TimeoutError("small model timed out")
+
+    rule = dict(RULE, latency_budget_seconds=0.05)
+    # Whichever of the small request's own timeout and the router's wait fires first
+    assert router.complete(rule, "batch", small, large) == "large answer"
+    assert router.stats()["batch"]["over_budget"] == 1
+
+
+def test_failing_small_model_escalates(router):
+    def small(budget):
+        raise RuntimeError("model not found")
+
+    assert router.complete(RULE, "batch", small, large) == "large answer"
+    assert router.stats()["batch"]["error"] == 1
+
+
+def test_misconfigured_validator_fails_before_any_request(router):
+    calls = []
+    with pytest.raises(ValueError):
+        router.complete(dict(RULE, validator="nope"), "batch", lambda budget: calls.append(budget), large)
+    assert calls == []
+    with pytest.raises(ValueError):
+        validate("nope", "")
+
+
+def test_async_small_request_is_cancelled_when_over_budget(router):
+    cancelled = []
+
+    async def small():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def large_async():
+        return "large answer"
+
+    assert asyncio.run(router.complete_async(RULE, "batch", small, large_async)) == "large answer"
+    assert cancelled == [True]
+    assert router.stats()["batch"]["over_budget"] == 1
+
+
+def test_stats_carry_over_to_a_rebuilt_router(router):
+    router.complete(RULE, "batch", lambda budget: "[]", large)
+    rebuilt = ModelRouter({"rules": {}}, stats=router.stats())
+    try:
+        rebuilt._count("batch", "invalid")
+        assert rebuilt.stats()["batch"] == {"small": 1, "invalid": 1, "over_budget": 0, "error": 0}
+        assert router.stats()["batch"]["invalid"] == 0
+    finally:
+        rebuilt.close()
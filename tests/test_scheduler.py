@@ -0,0 +1,164 @@
+import time
+import threading
+import pytest
+from utils import scheduler
+from utils.scheduler import RequestScheduler, TokenBucket, QueueTimeout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler.time, "monotonic", fake)
+    return fake
+
+
+def make_scheduler(limit=2, **settings):
+    return RequestScheduler(dict({"reserved_interactive": 1, "max_wait_seconds": 5}, **settings), {"local": limit})
+
+
+def acquire_in_thread(sched, priority, admitted, name):
+    def run():
+        ticket = sched.acquire("local", priority)
+        admitted.append((name, ticket))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_until(condition):
+    for _ in range(1000):
+        if condition():
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError("condition not reached")
+
+
+def queued(sched, priority):
+    return sched.metrics()["local"]["queued"][priority]
+
+
+def test_background_leaves_reserved_slot_for_interactive():
+    sched = make_scheduler(limit=2)
+    first = sched.acquire("local", "background")
+    admitted = []
+    waiting = acquire_in_thread(sched, "background", admitted, "second background")
+    wait_until(lambda: queued(sched, "background") == 1)
+
+    # The second background request waits although a slot is free; an interactive one takes it at once
+    interactive = sched.acquire("local", "interactive")
+    assert admitted == []
+    assert sched.metrics()["local"]["in_flight"] == 2
+
+    # Background may only use the unreserved slot, counting interactive requests in flight
+    first.release()
+    threading.Event().wait(0.05)
+    assert admitted == []
+    interactive.release()
+    waiting.join(5)
+    assert [name for name, _ in admitted] == ["second background"]
+    admitted[0][1].release()
+    assert sched.metrics()["local"]["in_flight"] == 0
+
+
+def test_waiting_requests_are_served_by_priority_then_arrival():
+    sched = make_scheduler(limit=1, reserved_interactive=0)
+    holder = sched.acquire("local", "interactive")
+    admitted = []
+    threads = []
+    for name, priority in [("bg", "background"), ("fg1", "foreground"), ("fg2", "foreground"), ("chat", "interactive")]:
+        threads.append(acquire_in_thread(sched, priority, admitted, name))
+        wait_until(lambda count=len(threads): sum(sched.metrics()["local"]["queued"].values()) == count)
+
+    holder.release()
+    for _ in range(4):
+        wait_until(lambda count=len(admitted) + 1: len(admitted) >= count)
+        admitted[-1][1].release()
+    for thread in threads:
+        thread.join(5)
+    assert [name for name, _ in admitted] == ["chat", "fg1", "fg2", "bg"]
+
+
+def test_queue_timeout_frees_the_queue_position():
+    sched = make_scheduler(limit=1, max_wait_seconds=0.05)
+    holder = sched.acquire("local")
+    with pytest.raises(QueueTimeout):
+        sched.acquire("local", "foreground")
+    assert sum(sched.metrics()["local"]["queued"].values()) == 0
+    holder.release()
+    sched.acquire("local", "foreground").release()
+
+
+def test_release_is_idempotent():
+    sched = make_scheduler(limit=1)
+    ticket = sched.acquire("local")
+    ticket.release()
+    ticket.release()
+    assert sched.metrics()["local"]["in_flight"] == 0
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        make_scheduler().acquire("local", "urgent")
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.wait_time(30) == 0
+    assert bucket.wait_time(31) == pytest.approx(1.0)
+
+
+def test_token_bucket_settles_estimates_with_real_usage(clock):
+    bucket = TokenBucket(per_minute=1000)
+    bucket.consume(800)  # Estimated
+    bucket.refund(800 - 300)  # Actually used 300
+    assert bucket.level == pytest.approx(700)
+    bucket.refund(-500)  # Used more than estimated
+    assert bucket.level == pytest.approx(200)
+
+
+def test_token_bucket_without_limit_never_waits(clock):
+    bucket = TokenBucket(per_minute=0)
+    bucket.consume(10 ** 9)
+    assert bucket.wait_time(10 ** 9) == 0
+
+
+def test_requests_per_minute_limit_delays_admission(clock):
+    sched = RequestScheduler({"rate_limits": {"local": {"requests_per_minute": 2}}}, {"local": 8})
+    sched.acquire("local").release()
+    sched.acquire("local").release()
+    lane = sched._lane("local")
+    lane.queue.append([0, 0])
+    assert sched._admission_wait(lane, lane.queue[0], "interactive", 0) == pytest.approx(30.0)
+    clock.now += 30
+    assert sched._admission_wait(lane, lane.queue[0], "interactive", 0) == 0
+
+
+def test_configure_keeps_lanes_and_applies_new_limits():
+    sched = make_scheduler(limit=1)
+    ticket = sched.acquire("local")
+    sched.configure({"reserved_interactive": 1}, {"local": 3})
+    assert sched.metrics()["local"]["limit"] == 3
+    assert sched.metrics()["local"]["in_flight"] == 1
+    ticket.release()
+
+
+def test_max_wait_shortens_the_queue_timeout():
+    sched = make_scheduler(limit=1, max_wait_seconds=60)
+    holder = sched.acquire("local")
+    started = time.monotonic()
+    with pytest.raises(QueueTimeout):
+        sched.acquire("local", max_wait=0.05)
+    assert time.monotonic() - started < 1
+    holder.release()
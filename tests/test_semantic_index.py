@@ -0,0 +1,90 @@
+import threading
+import numpy as np
+import pytest
+from utils import semantic_index, storage
+from utils.chat_history import new_message
+from utils.semantic_index import SemanticIndex, sync_index
+
+
+def letter_embed(texts):
+    """Letter counts as vectors: texts sharing letters are similar"""
+    vectors = np.zeros((len(texts), 26), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for char in text.lower():
+            if "a" <= char <= "z":
+                vectors[row, ord(char) - ord("a")] += 1
+    return vectors.tolist()
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    storage.reset_backends()
+    backend = storage.get_backend()
+    backend.save_vocabulary([{"word": "Apfel", "translation": "apple", "example": "Der Apfel ist rot."}])
+    backend.append_chat_history([new_message("user", "zzz"), new_message("assistant", "Bahnhof")])
+    yield backend
+    storage.reset_backends()
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SemanticIndex(str(tmp_path / "semantic_index"), "letters", batch_size=2)
+
+
+def test_sync_embeds_only_new_items(backend, index):
+    assert sync_index(index, letter_embed, backend) == 3
+    assert sync_index(index, letter_embed, backend) == 0
+    backend.append_chat_history([new_message("user", "Zug")])
+    assert sync_index(index, letter_embed, backend) == 1
+    best, _ = index.search(letter_embed(["zzz"])[0], top_k=1)[0]
+    assert best["text"] == "zzz"
+
+
+def test_search_does_not_wait_for_embedding(backend, index):
+    sync_index(index, letter_embed, backend)
+    backend.append_chat_history([new_message("user", "Zug")])
+    started, release = threading.Event(), threading.Event()
+
+    def slow_embed(texts):
+        started.set()
+        release.wait(5)
+        return letter_embed(texts)
+
+    thread = threading.Thread(target=sync_index, args=(index, slow_embed, backend))
+    thread.start()
+    try:
+        assert started.wait(5)
+        # The index as it was before the sync answers at once
+        assert len(index.search(letter_embed(["zug"])[0], top_k=10)) == 3
+    finally:
+        release.set()
+        thread.join(5)
+    assert len(index.search(letter_embed(["zug"])[0], top_k=10)) == 4
+
+
+def test_search_syncs_in_the_background(backend, tmp_path, monkeypatch):
+    index = SemanticIndex(str(tmp_path / "semantic_index"), "letters")
+    monkeypatch.setattr(semantic_index, "get_semantic_index", lambda: index)
+    monkeypatch.setattr(semantic_index, "provider_embedder", lambda model, priority="interactive": letter_embed)
+
+    semantic_index.search("Apfel")  # Starts the first sync; the index may still be empty
+    semantic_index._syncs[(index.directory, index.model)].join(5)
+    assert semantic_index.sync_status(index) == (False, None)
+    best, _ = semantic_index.search("Apfel", ["vocab"], top_k=1)[0]
+    assert best["word"] == "Apfel"
+
+
+def test_failed_background_sync_is_reported(backend, tmp_path, monkeypatch):
+    index = SemanticIndex(str(tmp_path / "semantic_index"), "letters")
+
+    def fail(texts):
+        raise ConnectionError("embedding model not loaded")
+
+    monkeypatch.setattr(semantic_index, "provider_embedder", lambda model, priority="interactive": fail)
+    assert semantic_index.start_sync(index)
+    semantic_index._syncs[(index.directory, index.model)].join(5)
+    running, error = semantic_index.sync_status(index)
+    assert not running and isinstance(error, ConnectionError)
+    assert len(index) == 0
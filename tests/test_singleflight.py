@@ -0,0 +1,137 @@
+import threading
+import pytest
+from utils.singleflight import SingleFlight
+
+
+def start_followers(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for_shared(flight, count):
+    # Followers have joined once they are counted as shared
+    for _ in range(1000):
+        if flight.stats()["shared"] >= count:
+            return
+        threading.Event().wait(0.005)
+    raise AssertionError("followers did not join")
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    leader = []
+    leader_thread = threading.Thread(target=lambda: leader.append(flight.do("key", work)))
+    leader_thread.start()
+    threads, results = start_followers(3, lambda: flight.do("key", work))
+    wait_for_shared(flight, 3)
+    release.set()
+    for thread in threads + [leader_thread]:
+        thread.join(5)
+
+    assert calls == [1]
+    assert leader == [("answer", False)]
+    assert results == [("answer", True)] * 3
+    assert flight.stats() == {"executed": 1, "shared": 3}
+
+
+def test_leader_failure_reaches_every_follower():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ConnectionError("server went away")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", work)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_for_shared(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 4
+    # The key is free again: the next call runs instead of reusing the failure
+    assert flight.do("key", lambda: "recovered") == ("recovered", False)
+
+
+def test_stream_followers_replay_every_chunk():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def factory():
+        yield "a"
+        release.wait(5)
+        yield "b"
+        yield "c"
+
+    leader = flight.stream("key", factory)
+    assert next(leader) == "a"
+    threads, results = start_followers(2, lambda: list(flight.stream("key", factory)))
+    wait_for_shared(flight, 2)
+    release.set()
+    assert list(leader) == ["b", "c"]
+    for thread in threads:
+        thread.join(5)
+    assert results == [["a", "b", "c"]] * 2
+
+
+def test_stream_followers_fail_when_the_leader_stops_reading():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def factory():
+        yield "partial"
+        release.wait(5)
+        yield "rest"
+
+    leader = flight.stream("key", factory)
+    assert next(leader) == "partial"
+
+    outcome = []
+
+    def follow():
+        chunks = []
+        try:
+            for chunk in flight.stream("key", factory):
+                chunks.append(chunk)
+        except RuntimeError as e:
+            outcome.append((chunks, str(e)))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    wait_for_shared(flight, 1)
+    release.set()
+    leader.close()
+    follower.join(5)
+    assert outcome == [(["partial"], "The shared request was cancelled")]
+
+
+def test_stream_error_is_raised_to_the_reader():
+    flight = SingleFlight()
+
+    def factory():
+        yield "x"
+        raise TimeoutError("stalled")
+
+    with pytest.raises(TimeoutError):
+        list(flight.stream("key", factory))
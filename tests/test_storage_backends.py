@@ -0,0 +1,16 @@
+import pytest
+from utils.storage_backends import JSONStorage, SQLiteStorage, StorageBackend
+
+
+def test_backends_must_implement_the_storage_interface():
+    class Partial(StorageBackend):
+        def load_vocabulary(self):
+            return []
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_builtin_backends_are_complete(tmp_path):
+    JSONStorage(str(tmp_path))
+    SQLiteStorage(str(tmp_path / "tutor.db"))
@@ -0,0 +1,36 @@
+import os
+import pytest
+from utils import storage
+
+
+@pytest.fixture
+def storage_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    storage.reset_backends()
+    yield tmp_path
+    storage.reset_backends()
+
+
+@pytest.mark.parametrize("user", ["alice@example.com", "a" * 100, "bob smith/../x" * 8, "..hidden.", "Ünïcode"])
+def test_safe_user_id_is_a_fixed_point(user):
+    safe = storage._safe_user_id(user)
+    assert len(safe) <= storage.MAX_USER_ID
+    assert storage._safe_user_id(safe) == safe
+
+
+def test_distinct_long_ids_stay_distinct():
+    assert storage._safe_user_id("a" * 100) != storage._safe_user_id("a" * 101)
+
+
+def test_long_user_id_uses_one_directory_everywhere(storage_dir):
+    user = "u" * 100
+    backend = storage.get_backend(user)
+    backend.save_vocabulary([{"word": "Haus", "translation": "house", "example": "Das Haus."}])
+
+    # The miner and the semantic index locate files with get_storage_dir
+    directory = storage.get_storage_dir(user)
+    assert os.path.dirname(directory) == os.path.join(str(storage_dir), storage.USERS_DIRNAME)
+    assert os.listdir(os.path.dirname(directory)) == [os.path.basename(directory)]
+    assert backend is storage.get_backend(storage._safe_user_id(user))
+    assert storage.get_storage_dir(storage._safe_user_id(user)) == directory
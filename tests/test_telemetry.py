@@ -0,0 +1,37 @@
+from utils.telemetry import TelemetrySink
+
+
+def write_records(sink, count, start=0):
+    for index in range(start, start + count):
+        sink.write({"index": index, "padding": "x" * 50})
+
+
+def test_read_limit_spans_rotated_files(tmp_path):
+    sink = TelemetrySink(str(tmp_path / "telemetry.jsonl"), max_bytes=2000, backups=3)
+    write_records(sink, 100)
+
+    everything = sink.read()
+    assert [r["index"] for r in everything] == list(range(100 - len(everything), 100))
+
+    recent = sink.read(limit=40)
+    assert [r["index"] for r in recent] == list(range(60, 100))
+
+
+def test_read_is_refreshed_after_a_write(tmp_path):
+    sink = TelemetrySink(str(tmp_path / "telemetry.jsonl"))
+    write_records(sink, 3)
+    assert len(sink.read(limit=10)) == 3
+
+    write_records(sink, 1, start=3)
+    assert [r["index"] for r in sink.read(limit=10)] == [0, 1, 2, 3]
+
+    sink.clear()
+    assert sink.read(limit=10) == []
+
+
+def test_partial_line_is_skipped(tmp_path):
+    sink = TelemetrySink(str(tmp_path / "telemetry.jsonl"))
+    write_records(sink, 2)
+    with open(sink.path, "a", encoding="utf-8") as file:
+        file.write('{"index": 2, "padd')
+    assert [r["index"] for r in sink.read(limit=5)] == [0, 1]
@@ -0,0 +1,50 @@
+import json
+import pytest
+import streamlit as st
+from utils import storage, vocab_import, async_llm_client
+from utils.async_llm_client import CompletionResult
+from utils.chat_history import new_message
+from utils.vocab_miner import VocabMiner
+
+
+@pytest.fixture
+def miner(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    storage.reset_backends()
+    storage.get_backend("").append_chat_history([
+        new_message("user", "Wie sagt man 'apple'?"),
+        new_message("assistant", "Man sagt 'Apfel'.")
+    ])
+    # Off the script thread there is no page to report on
+    monkeypatch.setattr(st, "error", lambda *args, **kwargs: pytest.fail("st.error called from the miner"))
+    yield VocabMiner("", str(tmp_path / "vocab_suggestions.json"))
+    storage.reset_backends()
+
+
+def test_failed_extraction_is_recorded_and_retried(miner, monkeypatch):
+    monkeypatch.setattr(async_llm_client, "run_batch", lambda requests, model_type: [
+        CompletionResult(error=ConnectionError("provider down")) for _ in requests
+    ])
+    miner._run()
+    assert isinstance(miner.last_error, ConnectionError)
+    assert miner.state["cursor"] is None
+    assert miner.last_run is not None
+
+
+def test_candidates_are_translated_into_suggestions(miner, monkeypatch):
+    requests_seen = []
+
+    def run_batch(requests, model_type):
+        requests_seen.extend(requests)
+        return [CompletionResult(content=json.dumps([{"word": "Apfel", "reason": "asked"}])) for _ in requests]
+
+    monkeypatch.setattr(async_llm_client, "run_batch", run_batch)
+    monkeypatch.setattr(vocab_import, "translate_words", lambda words, model_type, priority: (
+        [{"word": word, "translation": "apple", "example": "Der Apfel."} for word in words], []
+    ))
+    miner._run()
+    assert miner.last_error is None
+    assert [request["priority"] for request in requests_seen] == ["background"]
+    assert [s["word"] for s in miner.suggestions()] == ["Apfel"]
+    assert miner.state["cursor"] is not None
@@ -0,0 +1,79 @@
+import os
+import pytest
+from utils.storage_backends import JSONStorage, SQLiteStorage
+from utils.write_behind import LessonPlanWriteBehind
+
+
+def make_plan():
+    return [
+        {"week_or_day": "Week 1", "assignments": [{"title": f"Task {i}", "completed": False} for i in range(5)]},
+        {"week_or_day": "Week 2", "assignments": [{"title": "Review", "completed": False}]}
+    ]
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "json":
+        backend = JSONStorage(str(tmp_path))
+    else:
+        backend = SQLiteStorage(os.path.join(str(tmp_path), "tutor.db"))
+    backend.save_lesson_plan(make_plan())
+    return backend
+
+
+def test_stale_delete_does_not_block_later_changes(backend):
+    writer = LessonPlanWriteBehind(backend, delay=60)
+    writer.submit(("delete", 0, 5))  # Out of range: the week has assignments 0-4
+    writer.submit(("completed", 0, 0, True))
+    assert writer.flush() is None
+
+    plan = backend.load_lesson_plan()
+    assert len(plan[0]["assignments"]) == 5
+    assert plan[0]["assignments"][0]["completed"] is True
+    assert writer.pending() == []
+    assert writer.last_error is None
+
+
+def test_double_delete_and_missing_week_are_skipped(backend):
+    writer = LessonPlanWriteBehind(backend, delay=60)
+    for change in [("delete", 1, 0), ("delete", 1, 0), ("add", 7, "Nowhere"), ("completed", 7, 0, True)]:
+        writer.submit(change)
+    assert writer.flush() is None
+
+    plan = backend.load_lesson_plan()
+    assert [len(week["assignments"]) for week in plan] == [5, 0]
+    assert backend.load_progress()["total"] == 5
+
+
+def test_unapplicable_batch_is_dropped_not_requeued(backend):
+    writer = LessonPlanWriteBehind(backend, delay=60)
+    writer.submit(("rename", 0, 0))
+    assert isinstance(writer.flush(), ValueError)
+    assert writer.pending() == []
+    assert writer.last_error is None  # Nothing is waiting for a retry
+    assert isinstance(writer.take_dropped_error(), ValueError)
+    assert writer.take_dropped_error() is None  # Reported once
+
+    writer.submit(("completed", 0, 1, True))
+    assert writer.flush() is None
+    assert backend.load_lesson_plan()[0]["assignments"][1]["completed"] is True
+    assert writer.last_error is None
+
+
+def test_io_error_is_retried(backend, monkeypatch):
+    writer = LessonPlanWriteBehind(backend, delay=60)
+    original = backend.apply_lesson_plan_changes
+
+    def fail(changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backend, "apply_lesson_plan_changes", fail)
+    writer.submit(("completed", 0, 2, True))
+    assert isinstance(writer.flush(), OSError)
+    assert writer.pending() == [("completed", 0, 2, True)]
+    assert isinstance(writer.last_error, OSError)
+    assert writer.take_dropped_error() is None
+
+    monkeypatch.setattr(backend, "apply_lesson_plan_changes", original)
+    assert writer.flush() is None
+    assert backend.load_lesson_plan()[0]["assignments"][2]["completed"] is True
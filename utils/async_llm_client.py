@@ -0,0 +1,212 @@
+import asyncio
+import weakref
+import httpx
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from utils.llm_client import LLMClient, ResponseCache, _get_config_cache, _response_cache_for
+from utils.llm_client import get_telemetry_sink, get_router, acquire_slot, _used_tokens, _record_openai_usage, _record_ollama_usage
+from utils.telemetry import CallRecorder
+from utils.ollama_transport import BaseOllamaTransport
+from utils.scheduler import DEFAULT_CONCURRENCY, DEFAULT_PRIORITY
+
+# One semaphore per provider per event loop; asyncio primitives cannot be shared across loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class CompletionResult:
+    """Outcome of one request in a batch: either content or the error it raised"""
+    content: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def get_concurrency_limit(provider: str) -> int:
+    """Return the configured number of concurrent requests for a provider"""
+    limits = _get_config_cache()["config"].get("concurrency", {})
+    return max(1, int(limits.get(provider, DEFAULT_CONCURRENCY.get(provider, 2))))
+
+
+def _get_semaphore(provider: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    loop_semaphores = _semaphores.setdefault(loop, {})
+    if provider not in loop_semaphores:
+        loop_semaphores[provider] = asyncio.Semaphore(get_concurrency_limit(provider))
+    return loop_semaphores[provider]
+
+
+class AsyncOllamaTransport(BaseOllamaTransport):
+    """Asyncio Ollama transport over a pooled httpx.AsyncClient"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        )
+
+    async def _post(self, path: str, data: Dict) -> Dict:
+        response = await self.client.post(path, json=data)
+        response.raise_for_status()
+        return response.json()
+
+    async def chat(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> Dict:
+        """Non-streaming /api/chat call, returns the raw response body"""
+        return await self._post("/api/chat", self._chat_payload(messages, model, temperature, max_tokens, False))
+
+    async def generate(self, prompt: str, model: str, temperature: float, max_tokens: int) -> Dict:
+        """Non-streaming /api/generate call, returns the raw response body"""
+        return await self._post("/api/generate", self._generate_payload(prompt, model, temperature, max_tokens, False))
+
+    async def close(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+
+
+class AsyncLLMClient(LLMClient):
+    """Asyncio counterpart of LLMClient with bounded per-provider concurrency
+
+    Model selection, settings and model discovery are inherited from LLMClient;
+    completions are coroutines and raise instead of reporting through st.error,
+    so batch callers can collect per-item errors.
+    """
+
+    def _init_provider(self):
+        """Initialize async clients next to the synchronous ones"""
+        super()._init_provider()
+
+        if self.provider in ("openai", "lmstudio"):
+            from openai import AsyncOpenAI
+
+        if self.provider == "openai":
+            self.async_client = AsyncOpenAI(api_key=self.api_key)
+        elif self.provider == "lmstudio":
+            self.async_client = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key="lm-studio"  # LM Studio uses a dummy key
+            )
+        elif self.provider == "ollama":
+            self.async_transport = AsyncOllamaTransport(self.base_url)
+
+    async def chat_completion(self, messages, temperature=None, max_tokens=None, model=None, prompt_key=None,
+                              priority=DEFAULT_PRIORITY):
+        """Generate chat completion using the configured provider"""
+
+        # Use instance defaults if not specified
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+        model_name = model if model is not None else self.model
+
+        # Serve deterministic prompts from the on-disk response cache when enabled
+        cache = _response_cache_for(prompt_key)
+        if cache:
+            cache_key = ResponseCache.make_key(self.provider, model_name, temp, tokens, messages)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        router = get_router() if model is None else None
+        rule = router.route(self.provider, prompt_key, model_name) if router else None
+        if rule is None:
+            content = await self._attempt_async(messages, temp, tokens, model_name, prompt_key, priority)
+        else:
+            content = await router.complete_async(
+                rule, prompt_key,
+                lambda: self._attempt_async(messages, temp, tokens, rule["model"], prompt_key, priority),
+                lambda: self._attempt_async(messages, temp, tokens, model_name, prompt_key, priority)
+            )
+
+        if cache and content:
+            cache.set(cache_key, content, prompt_key)
+        return content
+
+    async def _attempt_async(self, messages, temperature, max_tokens, model, prompt_key, priority):
+        """One request to this client's provider within its concurrency limit, recorded in telemetry"""
+        async with _get_semaphore(self.provider):
+            ticket = await self._acquire_slot(priority, messages, max_tokens)
+            # Timed once admitted, so queueing for a slot does not count as provider latency
+            recorder = CallRecorder(self.provider, model, self.model_type, prompt_key, messages)
+            try:
+                content = await self._complete_async(messages, temperature, max_tokens, model, recorder.usage)
+            except Exception as e:
+                recorder.finish(get_telemetry_sink(), error=e)
+                raise
+            finally:
+                ticket.release(_used_tokens(recorder.usage))
+            recorder.finish(get_telemetry_sink(), content)
+        return content
+
+    async def _acquire_slot(self, priority, messages, max_tokens):
+        """Wait for the request scheduler in a worker thread without blocking the event loop"""
+        future = asyncio.ensure_future(asyncio.to_thread(
+            acquire_slot, self.provider, priority, [m.get("content", "") for m in messages], max_tokens
+        ))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker thread cannot be interrupted; give the slot back once it is granted
+            future.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().release())
+            raise
+
+    async def _complete_async(self, messages, temperature, max_tokens, model, usage=None):
+        """Make a single completion request to the provider"""
+        if self.provider == "ollama":
+            if self.ollama_api == "generate":
+                # Legacy path: convert messages to a single flat prompt
+                prompt = self._convert_messages_to_prompt(messages)
+                result = await self.async_transport.generate(prompt, model, temperature, max_tokens)
+                _record_ollama_usage(result, usage)
+                return result.get("response", "")
+
+            result = await self.async_transport.chat(messages, model, temperature, max_tokens)
+            _record_ollama_usage(result, usage)
+            return result.get("message", {}).get("content", "")
+
+        # Both OpenAI and LM Studio use the same API format
+        response = await self.async_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        _record_openai_usage(response, usage)
+        return response.choices[0].message.content
+
+    async def gather(self, requests: List[Dict]) -> List[CompletionResult]:
+        """Run many completions concurrently, returning results in input order
+
+        Each request is a dict of chat_completion keyword arguments
+        (messages, temperature, max_tokens, model, prompt_key, priority).
+        """
+        async def run_one(request):
+            try:
+                return CompletionResult(content=await self.chat_completion(**request))
+            except Exception as e:
+                return CompletionResult(error=e)
+
+        return await asyncio.gather(*(run_one(request) for request in requests))
+
+    async def aclose(self):
+        """Close async connection pools"""
+        if self.provider == "ollama":
+            await self.async_transport.close()
+        else:
+            await self.async_client.close()
+
+
+async def gather_completions(requests: List[Dict], model_type: str = "chat") -> List[CompletionResult]:
+    """Run a batch of completions with a fresh AsyncLLMClient for the model type"""
+    client = AsyncLLMClient(model_type)
+    try:
+        return await client.gather(requests)
+    finally:
+        await client.aclose()
+
+
+def run_batch(requests: List[Dict], model_type: str = "chat") -> List[CompletionResult]:
+    """Synchronous entry point for Streamlit pages: run a batch and wait for all results"""
+    return asyncio.run(gather_completions(requests, model_type))
@@ -0,0 +1,63 @@
+import re
+import uuid
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+_DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def new_message(role: str, content: str) -> Dict:
+    """Create a chat message with a stable ID and creation timestamp"""
+    return {
+        "role": role,
+        "content": content,
+        "id": uuid.uuid4().hex,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def message_id(msg: Dict) -> str:
+    """Return the message's ID, or a content hash for messages saved before IDs existed"""
+    if msg.get("id"):
+        return msg["id"]
+    key = "\x1f".join([msg.get("role", ""), msg.get("content", ""), msg.get("timestamp", "")])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def to_llm_messages(messages: List[Dict]) -> List[Dict]:
+    """Strip bookkeeping fields (id, timestamp) before sending messages to a provider"""
+    return [{"role": m["role"], "content": m["content"]} for m in messages]
+
+
+def dedupe_messages(messages: List[Dict]) -> List[Dict]:
+    """Drop repeated messages, keeping the first occurrence of each ID"""
+    seen = set()
+    unique = []
+    for msg in messages:
+        msg_id = message_id(msg)
+        if msg_id not in seen:
+            seen.add(msg_id)
+            unique.append(msg)
+    return unique
+
+
+def message_day(msg: Dict) -> Optional[str]:
+    """Return the YYYY-MM-DD day of a message's ISO timestamp, or None if it has none"""
+    match = _DAY_PATTERN.match(msg.get("timestamp") or "")
+    return match.group() if match else None
+
+
+def build_day_index(messages: List[Dict]) -> Dict[str, List[List[int]]]:
+    """Map each day to the [start, end) ranges of its messages in the list"""
+    index = {}
+    for position, msg in enumerate(messages):
+        day = message_day(msg)
+        if day is None:
+            continue
+        ranges = index.setdefault(day, [])
+        if ranges and ranges[-1][1] == position:
+            ranges[-1][1] = position + 1
+        else:
+            ranges.append([position, position + 1])
+    return index
@@ -0,0 +1,137 @@
+from typing import Callable, Dict, List, Optional
+from utils.llm_client import _get_config_cache, chat_completion, get_llm_client, get_prompt
+
+# Rough characters per token for the heuristic tokenizer
+CHARS_PER_TOKEN = 4
+# Per-message overhead for role markers and separators
+TOKENS_PER_MESSAGE = 4
+
+_tokenizer: Optional[Callable[[str], int]] = None
+
+
+def _heuristic_token_count(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _default_tokenizer() -> Callable[[str], int]:
+    """Use tiktoken when it is installed, otherwise the character heuristic"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return _heuristic_token_count
+
+
+def set_tokenizer(tokenizer: Optional[Callable[[str], int]]):
+    """Install a token counting function (text -> token count); None restores the default"""
+    global _tokenizer
+    _tokenizer = tokenizer
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with the configured tokenizer"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = _default_tokenizer()
+    return _tokenizer(text or "")
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Count tokens for a list of chat messages"""
+    return sum(count_tokens(m.get("content", "")) + TOKENS_PER_MESSAGE for m in messages)
+
+
+def get_context_settings() -> Dict:
+    return _get_config_cache()["config"].get("context_window", {})
+
+
+def get_context_budget(model: str) -> int:
+    """Return the prompt token budget for a model from config.json"""
+    settings = get_context_settings()
+    return int(settings.get("budgets", {}).get(model, settings.get("default_budget", 3000)))
+
+
+def format_transcript(messages: List[Dict]) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+def summarize_messages(summary: str, messages: List[Dict], model_type: str = "chat") -> str:
+    """Fold messages into the running summary with one LLM request"""
+    settings = get_context_settings()
+    prompt = get_prompt(
+        'conversation_summary',
+        summary=summary or "(none)",
+        messages=format_transcript(messages)
+    )
+    return chat_completion(
+        [{"role": "user", "content": prompt}],
+        model_type=model_type,
+        max_tokens=settings.get("summary_max_tokens", 300),
+        prompt_key="conversation_summary"
+    ).strip()
+
+
+class ContextWindow:
+    """Keeps the most recent turns within a token budget and folds older turns into a running summary
+
+    One instance lives in each chat session. summarized_count is the number of
+    conversation messages already folded into the summary, so every message is
+    summarized at most once.
+    """
+
+    def __init__(self, model_type: str = "chat"):
+        self.model_type = model_type
+        self.summary = ""
+        self.summarized_count = 0
+
+    def reset(self):
+        self.summary = ""
+        self.summarized_count = 0
+
+    def _summary_messages(self) -> List[Dict]:
+        if not self.summary:
+            return []
+        return [{"role": "system", "content": get_prompt('conversation_summary_context', summary=self.summary)}]
+
+    def build(self, system_message: Dict, messages: List[Dict]) -> List[Dict]:
+        """Return the messages to send: system prompt, running summary and the recent turns"""
+        if self.summarized_count > len(messages):
+            # The conversation was reset
+            self.reset()
+
+        settings = get_context_settings()
+        budget = get_context_budget(get_llm_client(self.model_type).model)
+        min_recent = settings.get("min_recent_messages", 4)
+        # After a fold the recent turns use at most this share of the budget, so folds stay infrequent
+        fold_target = settings.get("fold_target", 0.75)
+
+        recent = messages[self.summarized_count:]
+        fixed_tokens = count_message_tokens([system_message] + self._summary_messages())
+        if fixed_tokens + count_message_tokens(recent) <= budget:
+            return [system_message] + self._summary_messages() + recent
+
+        # Fold the oldest turns until the rest fits the target share of the budget
+        target = budget * fold_target - fixed_tokens
+        foldable = max(0, len(recent) - min_recent)
+        tokens = [count_message_tokens([m]) for m in recent]
+        remaining = sum(tokens)
+        fold = 0
+        while fold < foldable and remaining > target:
+            remaining -= tokens[fold]
+            fold += 1
+
+        if fold:
+            try:
+                self.summary = summarize_messages(self.summary, recent[:fold], self.model_type)
+                self.summarized_count += fold
+            except Exception:
+                # Nothing is folded and the next request retries; this one sends the newest turns that fit
+                keep = len(recent)
+                remaining = fixed_tokens + sum(tokens)
+                while keep > min_recent and remaining > budget:
+                    remaining -= tokens[len(recent) - keep]
+                    keep -= 1
+                return [system_message] + self._summary_messages() + recent[len(recent) - keep:]
+
+        return [system_message] + self._summary_messages() + messages[self.summarized_count:]
@@ -0,0 +1,10 @@
+_env_loaded = False
+
+
+def load_environment():
+    """Load the .env file once, on first use instead of at import time"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
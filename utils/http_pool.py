@@ -0,0 +1,66 @@
+import threading
+from typing import Dict, Optional
+
+# Process-wide clients, shared by every model type and Streamlit session
+_openai_clients = {}
+_ollama_transports = {}
+_pool_lock = threading.Lock()
+
+DEFAULT_LIMITS = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 30.0
+}
+
+
+def get_openai_client(base_url: Optional[str], api_key: str, limits: Optional[Dict] = None):
+    """Return the shared OpenAI SDK client for a base URL (None = api.openai.com)
+
+    Pool limits only apply when the client is first built; changing them needs a restart.
+    """
+    key = (base_url, api_key)
+    client = _openai_clients.get(key)
+    if client is None:
+        with _pool_lock:
+            client = _openai_clients.get(key)
+            if client is None:
+                import httpx
+                from openai import OpenAI, DefaultHttpxClient
+
+                settings = dict(DEFAULT_LIMITS, **(limits or {}))
+                http_client = DefaultHttpxClient(limits=httpx.Limits(
+                    max_connections=settings["max_connections"],
+                    max_keepalive_connections=settings["max_keepalive_connections"],
+                    keepalive_expiry=settings["keepalive_expiry"]
+                ))
+                kwargs = {"api_key": api_key, "http_client": http_client}
+                if base_url:
+                    kwargs["base_url"] = base_url
+                client = OpenAI(**kwargs)
+                _openai_clients[key] = client
+    return client
+
+
+def get_ollama_transport(base_url: str):
+    """Return the shared pooled Ollama transport for a base URL (pool size from OLLAMA_POOL_SIZE)"""
+    key = base_url.rstrip("/")
+    transport = _ollama_transports.get(key)
+    if transport is None:
+        with _pool_lock:
+            transport = _ollama_transports.get(key)
+            if transport is None:
+                from utils.ollama_transport import OllamaTransport
+                transport = OllamaTransport(base_url)
+                _ollama_transports[key] = transport
+    return transport
+
+
+def close_all():
+    """Close every shared pool, e.g. before the process exits"""
+    with _pool_lock:
+        for client in _openai_clients.values():
+            client.close()
+        for transport in _ollama_transports.values():
+            transport.close()
+        _openai_clients.clear()
+        _ollama_transports.clear()
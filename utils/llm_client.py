@@ -1,92 +1,188 @@
 # Version: 07.01
 import os
+import copy
 import json
-import requests
+import time
+import string
+import threading
 import streamlit as st
-from dotenv import load_dotenv
-from openai import OpenAI
 from typing import List, Dict, Optional
+from utils.response_cache import ResponseCache
+from utils.model_catalog import ModelCatalog, CATALOG_FILE
+from utils.telemetry import TelemetrySink, CallRecorder, TELEMETRY_FILE, estimate_tokens
+from utils.http_pool import get_openai_client, get_ollama_transport
+from utils.resilience import ResilientCaller, DEFAULT_SETTINGS as DEFAULT_RESILIENCE_SETTINGS
+from utils.env import load_environment
+from utils.singleflight import SingleFlight
+from utils.routing import ModelRouter, DEFAULT_SETTINGS as DEFAULT_ROUTING_SETTINGS
+from utils.scheduler import RequestScheduler, Ticket, DEFAULT_PRIORITY, DEFAULT_SETTINGS as DEFAULT_SCHEDULER_SETTINGS
 
-# Load environment variables
-load_dotenv()
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
 
-# Set environment variables in Streamlit secrets for compatibility
-if "OPENAI_API_KEY" not in st.secrets and os.getenv("OPENAI_API_KEY"):
-    st.secrets["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
+# Process-wide config cache, invalidated by file mtime/size or by save_config
+_config_lock = threading.Lock()
+_config_version = 0
+_config_cache = {"key": None, "config": None, "prompts": {}}
 
-def load_config():
-    """Load configuration from config.json"""
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
+class PromptTemplate:
+    """Prompt template parsed once, with its placeholders known up front"""
+    
+    def __init__(self, key: str, template: str):
+        self.key = key
+        self.template = template
+        self.error = None
+        self.fields = frozenset()
+        
+        try:
+            self.fields = frozenset(
+                # Strip attribute/index access, e.g. {word.upper} -> word
+                field.split('.')[0].split('[')[0]
+                for _, field, _, _ in string.Formatter().parse(template)
+                if field
+            )
+        except ValueError as e:
+            self.error = f"Invalid template for prompt '{key}': {e}"
+    
+    def format(self, **kwargs) -> str:
+        if self.error:
+            raise ValueError(self.error)
+        
+        missing = self.fields.difference(kwargs)
+        if missing:
+            raise ValueError(f"Missing variable '{sorted(missing)[0]}' for prompt '{self.key}'")
+        
+        return self.template.format(**kwargs)
+
+def _config_stamp():
+    """Return (mtime, size) of config.json, or None if it does not exist"""
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        stat = os.stat(CONFIG_PATH)
+        return (stat.st_mtime_ns, stat.st_size)
     except FileNotFoundError:
-        return {"language": "English", "llm_models": {"chat": None, "lesson": None, "available": []}}
+        return None
+
+def _get_config_cache():
+    """Return the cached config entry, re-reading config.json only when it changed"""
+    global _config_cache
+    key = (_config_version, _config_stamp())
+    cache = _config_cache
+    if cache["key"] == key:
+        return cache
+    
+    with _config_lock:
+        if _config_cache["key"] == key:
+            return _config_cache
+        
+        try:
+            with open(CONFIG_PATH, 'r') as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            config = {"language": "English", "llm_models": {"chat": None, "lesson": None}}
+        
+        prompts = {
+            prompt_key: PromptTemplate(prompt_key, template)
+            for prompt_key, template in config.get('prompts', {}).items()
+        }
+        
+        # Swap in a new dict so concurrent readers never see a half-updated entry
+        _config_cache = {"key": key, "config": config, "prompts": prompts}
+        return _config_cache
+
+def load_config():
+    """Load configuration from config.json (cached, returns a private copy)"""
+    return copy.deepcopy(_get_config_cache()["config"])
 
 def save_config(config):
     """Save configuration to config.json"""
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-    with open(config_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    global _config_version
+    with _config_lock:
+        with open(CONFIG_PATH, 'w') as f:
+            json.dump(config, f, indent=4)
+        _config_version += 1
 
 def get_prompt(prompt_key: str, **kwargs) -> str:
     """Get a prompt from config.json with variable substitution"""
-    config = load_config()
-    prompts = config.get('prompts', {})
+    cache = _get_config_cache()
+    prompts = cache["prompts"]
     
     if prompt_key not in prompts:
         raise ValueError(f"Prompt '{prompt_key}' not found in config.json")
     
-    prompt_template = prompts[prompt_key]
-    
     # Add language from config if not provided
     if 'language' not in kwargs:
-        kwargs['language'] = config.get('language', 'English')
+        kwargs['language'] = cache["config"].get('language', 'English')
     
     # Replace variables in the prompt
+    return prompts[prompt_key].format(**kwargs)
+
+def _get_secret(key):
+    """Read a Streamlit secret, or None when there is no secrets file"""
     try:
-        return prompt_template.format(**kwargs)
-    except KeyError as e:
-        raise ValueError(f"Missing variable {e} for prompt '{prompt_key}'") from e
+        return st.secrets.get(key)
+    except Exception:
+        return None
 
 class LLMClient:
     """Unified LLM client supporting OpenAI, LM Studio, and Ollama with model selection"""
     
-    def __init__(self, model_type: str = "chat"):
-        self.provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    def __init__(self, model_type: str = "chat", provider: Optional[str] = None):
+        load_environment()
+        # provider overrides LLM_PROVIDER, e.g. for failover clients
+        self.provider = (provider or os.getenv("LLM_PROVIDER", "openai")).lower()
         self.model_type = model_type
-        
-        # Load config for model selection and settings
+        self.load_settings()
+        self._init_provider()
+    
+    def load_settings(self):
+        """(Re)read model and sampling settings from config; connections are left alone"""
         self.config = load_config()
         
         # Get model-specific settings from config (with env fallback)
-        model_settings = self.config.get("llm_models", {}).get(f"{model_type}_settings", {})
+        model_settings = self.config.get("llm_models", {}).get(f"{self.model_type}_settings", {})
         self.temperature = float(model_settings.get("temperature", os.getenv("LLM_TEMPERATURE", "0.7")))
         self.max_tokens = int(model_settings.get("max_tokens", os.getenv("LLM_MAX_TOKENS", "1000")))
         
         # Determine model to use (config overrides env)
-        self.model = self._get_model_for_type(model_type)
-        
-        # Initialize provider-specific settings
+        self.model = self._get_model_for_type(self.model_type)
+    
+    def _init_provider(self):
+        """Initialize provider-specific settings and clients"""
         if self.provider == "openai":
-            self.api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY")
+            self.api_key = os.getenv("OPENAI_API_KEY") or _get_secret("OPENAI_API_KEY")
             if not self.api_key:
                 raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in .env file or Streamlit secrets.")
-            self.client = OpenAI(api_key=self.api_key)
         
         elif self.provider == "lmstudio":
             self.base_url = os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234/v1")
-            self.client = OpenAI(
-                base_url=self.base_url,
-                api_key="lm-studio"  # LM Studio uses a dummy key
-            )
+            self.api_key = "lm-studio"  # LM Studio uses a dummy key
         
         elif self.provider == "ollama":
+            from utils.ollama_transport import GenerateContextStore
             self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+            # "chat" uses /api/chat, "generate" keeps the legacy flat-prompt /api/generate path
+            self.ollama_api = os.getenv("OLLAMA_API", "chat").lower()
+            # Shared with every other client for this server
+            self.transport = get_ollama_transport(self.base_url)
+            # On the generate path, keep Ollama's context arrays so follow-up turns only prefill the new messages
+            reuse_context = os.getenv("OLLAMA_REUSE_CONTEXT", "false").lower() in ("1", "true", "yes")
+            self.ollama_contexts = GenerateContextStore() if reuse_context and self.ollama_api == "generate" else None
         
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
     
+    @property
+    def client(self):
+        """Shared OpenAI SDK client for this provider, built on first request so pages that only render never import the SDK"""
+        base_url = self.base_url if self.provider == "lmstudio" else None
+        limits = _get_config_cache()["config"].get("http_pool", {})
+        return get_openai_client(base_url, self.api_key, limits)
+    
+    def _openai_client(self):
+        """SDK client for one request; the SDK's own retries are off when the resilience layer retries"""
+        if get_resilience() is not None:
+            return self.client.with_options(max_retries=0)
+        return self.client
+    
     def _get_model_for_type(self, model_type: str) -> str:
         """Get the appropriate model for the given type (chat/lesson)"""
         # Check config first
@@ -102,8 +198,23 @@ class LLMClient:
         else:
             return os.getenv("LLM_MODEL", "gpt-4o")
     
-    def get_available_models(self) -> List[Dict[str, str]]:
-        """Get list of available models based on provider"""
+    def embed(self, texts: List[str], model: str, priority=DEFAULT_PRIORITY) -> List[List[float]]:
+        """Embedding vectors for texts, in input order, from the provider's embeddings endpoint"""
+        if not texts:
+            return []
+        ticket = acquire_slot(self.provider, priority, texts)
+        try:
+            if self.provider == "ollama":
+                return self.transport.embed(model, texts)
+            # Parse the JSON directly; building SDK models for every float is slower than the request itself
+            raw = self._openai_client().embeddings.with_raw_response.create(model=model, input=texts, encoding_format="float")
+            data = json.loads(raw.http_response.text)["data"]
+            return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+        finally:
+            ticket.release()
+    
+    def fetch_available_models(self) -> List[Dict[str, str]]:
+        """Query the provider for its models, raising if it cannot be reached"""
         if self.provider == "lmstudio":
             return self._get_lmstudio_models()
         elif self.provider == "ollama":
@@ -113,45 +224,43 @@ class LLMClient:
         else:
             return []
     
-    def _get_lmstudio_models(self) -> List[Dict[str, str]]:
-        """Fetch available models from LM Studio"""
+    def get_available_models(self) -> List[Dict[str, str]]:
+        """Get list of available models based on provider"""
         try:
-            response = requests.get(f"{self.base_url}/models", timeout=5)
-            response.raise_for_status()
-            models_data = response.json()
-            
-            models = []
-            for model in models_data.get("data", []):
-                models.append({
-                    "id": model.get("id", ""),
-                    "name": model.get("id", ""),
-                    "provider": "lmstudio"
-                })
-            
-            return models
+            return self.fetch_available_models()
         except Exception as e:
-            st.warning(f"Could not fetch LM Studio models: {e}")
+            provider_name = {"lmstudio": "LM Studio", "ollama": "Ollama"}.get(self.provider, self.provider)
+            st.warning(f"Could not fetch {provider_name} models: {e}")
             return []
     
+    def _get_lmstudio_models(self) -> List[Dict[str, str]]:
+        """Fetch available models from LM Studio"""
+        import requests
+        response = requests.get(f"{self.base_url}/models", timeout=5)
+        response.raise_for_status()
+        models_data = response.json()
+        
+        models = []
+        for model in models_data.get("data", []):
+            models.append({
+                "id": model.get("id", ""),
+                "name": model.get("id", ""),
+                "provider": "lmstudio"
+            })
+        
+        return models
+    
     def _get_ollama_models(self) -> List[Dict[str, str]]:
         """Fetch available models from Ollama"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            response.raise_for_status()
-            models_data = response.json()
-            
-            models = []
-            for model in models_data.get("models", []):
-                models.append({
-                    "id": model.get("name", ""),
-                    "name": model.get("name", ""),
-                    "provider": "ollama"
-                })
-            
-            return models
-        except Exception as e:
-            st.warning(f"Could not fetch Ollama models: {e}")
-            return []
+        models = []
+        for model in self.transport.list_models():
+            models.append({
+                "id": model.get("name", ""),
+                "name": model.get("name", ""),
+                "provider": "ollama"
+            })
+        
+        return models
     
     def _get_openai_models(self) -> List[Dict[str, str]]:
         """Return common OpenAI models"""
@@ -164,74 +273,251 @@ class LLMClient:
     
     def set_model_for_type(self, model_type: str, model_id: str):
         """Set the model for a specific type and save to config"""
-        if "llm_models" not in self.config:
-            self.config["llm_models"] = {"chat": None, "lesson": None, "available": []}
-        
-        self.config["llm_models"][model_type] = model_id
-        save_config(self.config)
+        config = load_config()
+        if "llm_models" not in config:
+            config["llm_models"] = {"chat": None, "lesson": None}
         
-        # Update current model if it matches the type
-        if self.model_type == model_type:
-            self.model = model_id
+        config["llm_models"][model_type] = model_id
+        save_config(config)
+        self.load_settings()
     
     def refresh_available_models(self):
-        """Refresh and cache available models"""
-        available_models = self.get_available_models()
-        if "llm_models" not in self.config:
-            self.config["llm_models"] = {"chat": None, "lesson": None, "available": []}
+        """Fetch the provider's models now and update the model catalog"""
+        return get_model_catalog().refresh(self)
+    
+    def chat_completion(self, messages, temperature=None, max_tokens=None, model=None, prompt_key=None,
+                        priority=DEFAULT_PRIORITY):
+        """Generate chat completion using the configured provider
+        
+        priority ("interactive", "foreground" or "background") orders the request
+        in the provider's queue when the request scheduler is enabled. Without an
+        explicit model, prompt keys with a routing rule try a small model first.
+        """
+        
+        # Use instance defaults if not specified
+        temp = temperature if temperature is not None else self.temperature
+        tokens = max_tokens if max_tokens is not None else self.max_tokens
+        model_name = model if model is not None else self.model
+        
+        # Serve deterministic prompts from the on-disk response cache when enabled
+        cache = _response_cache_for(prompt_key)
+        if cache:
+            cache_key = ResponseCache.make_key(self.provider, model_name, temp, tokens, messages)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        def large():
+            resilience = get_resilience()
+            if resilience:
+                return resilience.complete(self, messages, temp, tokens, model_name, prompt_key, priority)
+            return self._attempt(messages, temp, tokens, model_name, prompt_key, priority)
         
-        self.config["llm_models"]["available"] = available_models
-        save_config(self.config)
-        return available_models
+        def generate():
+            router = get_router() if model is None else None
+            rule = router.route(self.provider, prompt_key, model_name) if router else None
+            if rule is None:
+                return large()
+            # One attempt at the small model; escalating to the configured model is its fallback
+            small = lambda budget: self._attempt(messages, temp, tokens, rule["model"], prompt_key, priority,
+                                                 timeout=budget)
+            return router.complete(rule, prompt_key, small, large)
+        
+        # Identical requests already in flight (e.g. from other sessions) share one generation
+        fingerprint = ResponseCache.make_key(self.provider, model_name, temp, tokens, messages)
+        try:
+            content, shared = _singleflight.do(fingerprint, generate)
+        except Exception as e:
+            error_msg = f"Error with {self.provider}: {str(e)}"
+            st.error(error_msg)
+            raise Exception(error_msg)
+        
+        if cache and content and not shared:
+            cache.set(cache_key, content, prompt_key)
+        return content
     
-    def chat_completion(self, messages, temperature=None, max_tokens=None, model=None):
-        """Generate chat completion using the configured provider"""
+    def chat_completion_stream(self, messages, temperature=None, max_tokens=None, model=None, prompt_key=None,
+                               priority=DEFAULT_PRIORITY):
+        """Generate chat completion as a stream of text chunks using the configured provider"""
         
         # Use instance defaults if not specified
         temp = temperature if temperature is not None else self.temperature
         tokens = max_tokens if max_tokens is not None else self.max_tokens
         model_name = model if model is not None else self.model
         
+        # A cached response is replayed as a single chunk
+        cache = _response_cache_for(prompt_key)
+        if cache:
+            cache_key = ResponseCache.make_key(self.provider, model_name, temp, tokens, messages)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        def generate():
+            resilience = get_resilience()
+            if resilience:
+                return resilience.stream(self, messages, temp, tokens, model_name, prompt_key, priority)
+            return self._attempt_stream(messages, temp, tokens, model_name, prompt_key, priority)
+        
+        parts = []
+        fingerprint = ResponseCache.make_key(self.provider, model_name, temp, tokens, messages)
         try:
-            if self.provider == "ollama":
-                return self._ollama_completion(messages, temp, tokens, model_name)
-            else:
-                # Both OpenAI and LM Studio use the same API format
-                response = self.client.chat.completions.create(
-                    model=model_name,
-                    messages=messages,
-                    temperature=temp,
-                    max_tokens=tokens
-                )
-                return response.choices[0].message.content
-                
+            for content in _singleflight.stream(fingerprint, generate):
+                parts.append(content)
+                yield content
         except Exception as e:
             error_msg = f"Error with {self.provider}: {str(e)}"
             st.error(error_msg)
             raise Exception(error_msg)
+        
+        if cache and parts:
+            cache.set(cache_key, "".join(parts), prompt_key)
+    
+    def _attempt(self, messages, temperature, max_tokens, model, prompt_key=None, priority=DEFAULT_PRIORITY,
+                 on_admitted=None, timeout=None):
+        """One blocking request to this client's provider, recorded in telemetry
+        
+        on_admitted, if given, is called once the scheduler grants the request a slot.
+        timeout, if given, bounds the wait for a slot plus the request itself in seconds.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        ticket = acquire_slot(self.provider, priority, [m.get("content", "") for m in messages], max_tokens,
+                              max_wait=timeout)
+        if on_admitted:
+            on_admitted()
+        # Timed once admitted, so queueing for a slot does not count as provider latency
+        recorder = CallRecorder(self.provider, model, self.model_type, prompt_key, messages)
+        try:
+            remaining = max(0.1, deadline - time.monotonic()) if deadline is not None else None
+            content = self._complete(messages, temperature, max_tokens, model, recorder.usage, remaining)
+        except Exception as e:
+            recorder.finish(get_telemetry_sink(), error=e)
+            raise
+        finally:
+            ticket.release(_used_tokens(recorder.usage))
+        recorder.finish(get_telemetry_sink(), content)
+        return content
+    
+    def _attempt_stream(self, messages, temperature, max_tokens, model, prompt_key=None, priority=DEFAULT_PRIORITY,
+                        on_admitted=None):
+        """One streaming request to this client's provider, recorded in telemetry"""
+        parts = []
+        ticket = acquire_slot(self.provider, priority, [m.get("content", "") for m in messages], max_tokens)
+        if on_admitted:
+            on_admitted()
+        recorder = CallRecorder(self.provider, model, self.model_type, prompt_key, messages, stream=True)
+        try:
+            for content in self._complete_stream(messages, temperature, max_tokens, model, recorder.usage):
+                recorder.first_token()
+                parts.append(content)
+                yield content
+        except Exception as e:
+            recorder.finish(get_telemetry_sink(), "".join(parts), error=e)
+            raise
+        finally:
+            ticket.release(_used_tokens(recorder.usage))
+        recorder.finish(get_telemetry_sink(), "".join(parts))
+    
+    def _complete(self, messages, temperature, max_tokens, model, usage=None, timeout=None):
+        """Make a single blocking completion request to the provider
+        
+        usage, if given, receives prompt_tokens/completion_tokens reported by the provider.
+        timeout, if given, overrides the client's request timeout in seconds.
+        """
+        if self.provider == "ollama":
+            return self._ollama_completion(messages, temperature, max_tokens, model, usage, timeout)
+        
+        # Both OpenAI and LM Studio use the same API format
+        client = self._openai_client() if timeout is None else self.client.with_options(max_retries=0, timeout=timeout)
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        _record_openai_usage(response, usage)
+        return response.choices[0].message.content
+    
+    def _complete_stream(self, messages, temperature, max_tokens, model, usage=None):
+        """Make a single streaming completion request to the provider"""
+        if self.provider == "ollama":
+            yield from self._ollama_completion_stream(messages, temperature, max_tokens, model, usage)
+            return
+        
+        # Both OpenAI and LM Studio use the same streaming API format
+        extra = {}
+        if self.provider == "openai":
+            # Ask for a final usage chunk (LM Studio reports usage without it, if at all)
+            extra["stream_options"] = {"include_usage": True}
+        stream = self._openai_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **extra
+        )
+        for chunk in stream:
+            _record_openai_usage(chunk, usage)
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
     
-    def _ollama_completion(self, messages, temperature, max_tokens, model):
+    def _ollama_completion(self, messages, temperature, max_tokens, model, usage=None, timeout=None):
         """Handle Ollama API calls"""
         
-        # Convert messages to Ollama format
-        prompt = self._convert_messages_to_prompt(messages)
-        
-        url = f"{self.base_url}/api/generate"
-        data = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
-        }
+        if self.ollama_api == "generate":
+            # Legacy path: convert messages to a single flat prompt
+            prompt, context = self._ollama_generate_prompt(messages, model)
+            result = self.transport.generate(prompt, model, temperature, max_tokens, context=context,
+                                             read_timeout=timeout)
+            _record_ollama_usage(result, usage)
+            content = result.get("response", "")
+            self._store_ollama_context(messages, model, content, result.get("context"))
+            return content
         
-        response = requests.post(url, json=data)
-        response.raise_for_status()
+        result = self.transport.chat(messages, model, temperature, max_tokens, read_timeout=timeout)
+        _record_ollama_usage(result, usage)
+        return result.get("message", {}).get("content", "")
+    
+    def _ollama_completion_stream(self, messages, temperature, max_tokens, model, usage=None):
+        """Handle streaming Ollama API calls"""
+        
+        if self.ollama_api == "generate":
+            # Legacy path: convert messages to a single flat prompt
+            prompt, context = self._ollama_generate_prompt(messages, model)
+            parts = []
+            for chunk in self.transport.generate_stream(prompt, model, temperature, max_tokens, context=context):
+                content = chunk.get("response", "")
+                if content:
+                    parts.append(content)
+                    yield content
+                if chunk.get("done"):
+                    _record_ollama_usage(chunk, usage)
+                    self._store_ollama_context(messages, model, "".join(parts), chunk.get("context"))
+            return
         
-        result = response.json()
-        return result.get("response", "")
+        for chunk in self.transport.chat_stream(messages, model, temperature, max_tokens):
+            if chunk.get("done"):
+                _record_ollama_usage(chunk, usage)
+            content = chunk.get("message", {}).get("content", "")
+            if content:
+                yield content
+    
+    def _ollama_generate_prompt(self, messages, model):
+        """Return (prompt, context) for /api/generate, sending only new turns when a stored context covers the rest"""
+        context, covered = None, 0
+        if self.ollama_contexts is not None:
+            context, covered = self.ollama_contexts.lookup(model, messages)
+        return self._convert_messages_to_prompt(messages[covered:]), context
+    
+    def _store_ollama_context(self, messages, model, content, context):
+        """Remember the context returned for this conversation including the reply"""
+        if self.ollama_contexts is not None and content:
+            self.ollama_contexts.store(model, list(messages) + [{"role": "assistant", "content": content}], context)
     
     def _convert_messages_to_prompt(self, messages):
         """Convert OpenAI message format to simple prompt for Ollama"""
@@ -266,6 +552,156 @@ class LLMClient:
 
 # Global instances
 _llm_clients = {}
+_response_cache = None
+_response_cache_lock = threading.Lock()
+_model_catalog = None
+_model_catalog_lock = threading.Lock()
+_telemetry_sink = None
+_telemetry_lock = threading.Lock()
+_resilience = None
+_resilience_lock = threading.Lock()
+_singleflight = SingleFlight()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_router = None
+_router_lock = threading.Lock()
+
+RESPONSE_CACHE_FILE = "assets/llm_response_cache.sqlite"
+
+def get_response_cache():
+    """Get or create the shared on-disk LLM response cache"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                settings = _get_config_cache()["config"].get("response_cache", {})
+                _response_cache = ResponseCache(
+                    RESPONSE_CACHE_FILE,
+                    max_entries=settings.get("max_entries", 2000),
+                    max_age_days=settings.get("max_age_days", 30)
+                )
+    return _response_cache
+
+def _record_openai_usage(response, usage):
+    """Copy token counts from an OpenAI response or final stream chunk into usage"""
+    response_usage = getattr(response, "usage", None)
+    if usage is not None and response_usage is not None:
+        usage["prompt_tokens"] = response_usage.prompt_tokens
+        usage["completion_tokens"] = response_usage.completion_tokens
+
+def _record_ollama_usage(result, usage):
+    """Copy token counts from an Ollama response or final stream chunk into usage"""
+    if usage is None:
+        return
+    if "prompt_eval_count" in result:
+        usage["prompt_tokens"] = result["prompt_eval_count"]
+    if "eval_count" in result:
+        usage["completion_tokens"] = result["eval_count"]
+
+def get_telemetry_sink():
+    """Get or create the shared telemetry sink, or None when telemetry is disabled"""
+    global _telemetry_sink
+    settings = _get_config_cache()["config"].get("telemetry", {})
+    if not settings.get("enabled", True):
+        return None
+    if _telemetry_sink is None:
+        with _telemetry_lock:
+            if _telemetry_sink is None:
+                _telemetry_sink = TelemetrySink(
+                    TELEMETRY_FILE,
+                    max_bytes=settings.get("max_bytes", 5_000_000),
+                    backups=settings.get("backups", 3)
+                )
+    return _telemetry_sink
+
+def get_resilience():
+    """Get the shared failover/retry/hedging layer, or None when it is disabled in config"""
+    global _resilience
+    settings = _get_config_cache()["config"].get("resilience", {})
+    if not settings.get("enabled", False):
+        return None
+    with _resilience_lock:
+        # Rebuilt when the settings change, keeping nothing but latency history
+        if _resilience is None or _resilience.settings != dict(DEFAULT_RESILIENCE_SETTINGS, **settings):
+            previous = _resilience
+            _resilience = ResilientCaller(settings)
+            if previous is not None:
+                _resilience.latency = previous.latency
+                _resilience.ttft = previous.ttft
+                previous.close()
+    return _resilience
+
+def get_router():
+    """Get the shared small/large model router, or None when routing is disabled in config"""
+    global _router
+    settings = _get_config_cache()["config"].get("routing", {})
+    if not settings.get("enabled", False):
+        return None
+    with _router_lock:
+        # Rebuilt when the rules change, keeping the escalation counters
+        if _router is None or _router.settings != dict(DEFAULT_ROUTING_SETTINGS, **settings):
+            previous = _router
+            _router = ModelRouter(settings, stats=previous.stats() if previous is not None else None)
+            if previous is not None:
+                previous.close()
+    return _router
+
+def get_scheduler():
+    """Get the shared request scheduler, or None when it is disabled in config"""
+    global _scheduler
+    config = _get_config_cache()["config"]
+    settings = config.get("scheduler", {})
+    if not settings.get("enabled", False):
+        return None
+    limits = config.get("concurrency", {})
+    with _scheduler_lock:
+        # Reconfigured in place, so queued requests and counters survive a settings change
+        if _scheduler is None:
+            _scheduler = RequestScheduler(settings, limits)
+        elif _scheduler.settings != dict(DEFAULT_SCHEDULER_SETTINGS, **settings) or _scheduler.limits != limits:
+            _scheduler.configure(settings, limits)
+    return _scheduler
+
+def acquire_slot(provider, priority, texts, max_tokens=0, max_wait=None):
+    """Wait for the scheduler to admit a request; returns a Ticket to release when it is done
+    
+    texts (prompt strings) and max_tokens estimate the request's tokens for the tokens per minute limit.
+    max_wait, if given, shortens the scheduler's max_wait_seconds for this request.
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return Ticket()
+    tokens = sum(estimate_tokens(text) for text in texts) + (max_tokens or 0)
+    return scheduler.acquire(provider, priority or DEFAULT_PRIORITY, tokens, max_wait)
+
+def _used_tokens(usage):
+    """Tokens the provider reported for a request, or None if it did not report both counts"""
+    if "prompt_tokens" in usage and "completion_tokens" in usage:
+        return usage["prompt_tokens"] + usage["completion_tokens"]
+    return None
+
+def get_singleflight_stats():
+    """Completions executed vs. served from an identical in-flight request"""
+    return _singleflight.stats()
+
+def get_model_catalog():
+    """Get or create the shared model catalog cache"""
+    global _model_catalog
+    if _model_catalog is None:
+        with _model_catalog_lock:
+            if _model_catalog is None:
+                settings = _get_config_cache()["config"].get("model_catalog", {})
+                _model_catalog = ModelCatalog(CATALOG_FILE, ttl_seconds=settings.get("ttl_seconds", 600))
+    return _model_catalog
+
+def _response_cache_for(prompt_key):
+    """Return the response cache if caching is enabled for this prompt key"""
+    if not prompt_key:
+        return None
+    settings = _get_config_cache()["config"].get("response_cache", {})
+    if not settings.get("enabled", False) or prompt_key not in settings.get("prompts", []):
+        return None
+    return get_response_cache()
 
 def get_llm_client(model_type: str = "chat"):
     """Get or create LLM client instance for specific model type"""
@@ -274,26 +710,26 @@ def get_llm_client(model_type: str = "chat"):
         _llm_clients[model_type] = LLMClient(model_type)
     return _llm_clients[model_type]
 
-def chat_completion(messages, temperature=None, max_tokens=None, model=None, model_type="chat"):
+def chat_completion(messages, temperature=None, max_tokens=None, model=None, model_type="chat", prompt_key=None,
+                    priority=DEFAULT_PRIORITY):
     """Convenience function for chat completion"""
     client = get_llm_client(model_type)
-    return client.chat_completion(messages, temperature, max_tokens, model)
+    return client.chat_completion(messages, temperature, max_tokens, model, prompt_key=prompt_key, priority=priority)
+
+def chat_completion_stream(messages, temperature=None, max_tokens=None, model=None, model_type="chat", prompt_key=None,
+                           priority=DEFAULT_PRIORITY):
+    """Convenience function for streaming chat completion"""
+    client = get_llm_client(model_type)
+    return client.chat_completion_stream(messages, temperature, max_tokens, model, prompt_key=prompt_key, priority=priority)
 
 def get_available_models():
-    """Get available models for the current provider"""
+    """Get available models for the current provider from the catalog cache, without waiting on the provider"""
     client = get_llm_client()
-    return client.get_available_models()
+    return get_model_catalog().get(client)
 
 def set_model_for_type(model_type: str, model_id: str):
-    """Set model for a specific type"""
-    # Clear existing client for this type to force recreation
-    global _llm_clients
-    if model_type in _llm_clients:
-        del _llm_clients[model_type]
-    
-    # Create new client and set the model
-    client = get_llm_client(model_type)
-    client.set_model_for_type(model_type, model_id)
+    """Set model for a specific type (the client keeps its pooled connections)"""
+    get_llm_client(model_type).set_model_for_type(model_type, model_id)
 
 def set_model_settings(model_type: str, temperature: float, max_tokens: int):
     """Set temperature and max tokens for a specific model type"""
@@ -311,7 +747,6 @@ def set_model_settings(model_type: str, temperature: float, max_tokens: int):
     
     save_config(config)
     
-    # Clear existing client for this type to force recreation with new settings
-    global _llm_clients
+    # Pick up the new settings without rebuilding the client or its connections
     if model_type in _llm_clients:
-        del _llm_clients[model_type]
+        _llm_clients[model_type].load_settings()
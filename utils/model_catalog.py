@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+CATALOG_FILE = "assets/model_catalog.json"
+
+
+class ModelCatalog:
+    """Cached provider model lists with a TTL and stale-while-revalidate background refresh
+
+    Entries are stored per provider and base URL in their own JSON file, apart
+    from the user settings in config.json. Reads never wait for the provider:
+    a stale or missing entry is returned as is while a background thread
+    fetches a fresh list.
+    """
+
+    def __init__(self, path: str = CATALOG_FILE, ttl_seconds: float = 600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._entries = self._load()
+
+    def _load(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self._entries, file, indent=4)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(client) -> str:
+        return f"{client.provider}|{getattr(client, 'base_url', None) or ''}"
+
+    def entry(self, client) -> Optional[Dict]:
+        """Return the stored entry for the client's provider: models, fetched time and last error"""
+        with self._lock:
+            return self._entries.get(self._key(client))
+
+    def is_refreshing(self, client) -> bool:
+        with self._lock:
+            return self._key(client) in self._refreshing
+
+    def get(self, client) -> List[Dict[str, str]]:
+        """Return the cached models right away, refreshing them in the background when stale"""
+        key = self._key(client)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Configs from before the catalog kept the model list under llm_models.available
+                legacy = [m for m in client.config.get("llm_models", {}).get("available", [])
+                          if m.get("provider") == client.provider]
+                if legacy:
+                    entry = {"models": legacy, "fetched": 0, "last_error": None}
+                    self._entries[key] = entry
+        if entry is None or time.time() - entry.get("fetched", 0) > self.ttl_seconds:
+            self.refresh_async(client)
+        return list(entry["models"]) if entry else []
+
+    def refresh(self, client) -> List[Dict[str, str]]:
+        """Fetch the model list now and store it, raising if the provider cannot be reached"""
+        key = self._key(client)
+        try:
+            models = client.fetch_available_models()
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.setdefault(key, {"models": [], "fetched": 0})
+                entry["last_error"] = str(e)
+                # Back off until the next TTL instead of retrying on every read
+                entry["fetched"] = time.time()
+                self._save()
+            raise
+
+        with self._lock:
+            self._entries[key] = {"models": models, "fetched": time.time(), "last_error": None}
+            self._save()
+        return models
+
+    def refresh_async(self, client):
+        """Refresh on a background thread unless a refresh for this provider is already running"""
+        key = self._key(client)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(client)
+            except Exception:
+                pass  # Recorded as last_error
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="model-catalog-refresh", daemon=True).start()
+
+    def clear(self):
+        """Drop all cached model lists"""
+        with self._lock:
+            self._entries = {}
+            self._save()
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import threading
+import requests
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class BaseOllamaTransport:
+    """Shared settings and request payloads for the Ollama transports"""
+
+    def __init__(self, base_url: str, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, keep_alive: Optional[str] = None,
+                 pool_size: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+
+        # Timeouts and model residency (arguments override env)
+        self.connect_timeout = float(connect_timeout if connect_timeout is not None else os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+        self.read_timeout = float(read_timeout if read_timeout is not None else os.getenv("OLLAMA_READ_TIMEOUT", "300"))
+        self.keep_alive = keep_alive if keep_alive is not None else os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.pool_size = int(pool_size if pool_size is not None else os.getenv("OLLAMA_POOL_SIZE", "10"))
+
+    def _options(self, temperature, max_tokens) -> Dict:
+        return {
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+
+    def _chat_payload(self, messages, model, temperature, max_tokens, stream) -> Dict:
+        # Ollama only understands role/content, drop any extra keys (timestamps etc.)
+        return {
+            "model": model,
+            "messages": [{"role": m.get("role", "user"), "content": m.get("content", "")} for m in messages],
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self._options(temperature, max_tokens)
+        }
+
+    def _generate_payload(self, prompt, model, temperature, max_tokens, stream, system=None, context=None) -> Dict:
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": self._options(temperature, max_tokens)
+        }
+        if system is not None:
+            data["system"] = system
+        if context is not None:
+            data["context"] = context
+        return data
+
+
+class OllamaTransport(BaseOllamaTransport):
+    """Native Ollama transport using /api/chat over a pooled keep-alive session"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+        # Persistent session so TCP connections are reused between calls
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple for requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def _post(self, path: str, data: Dict, read_timeout: Optional[float] = None) -> Dict:
+        timeout = self.timeout if read_timeout is None else (self.connect_timeout, read_timeout)
+        response = self.session.post(f"{self.base_url}{path}", json=data, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post_stream(self, path: str, data: Dict) -> Iterator[Dict]:
+        with self.session.post(f"{self.base_url}{path}", json=data, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+
+            # Ollama streams one JSON object per line
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                yield chunk
+                if chunk.get("done"):
+                    break
+
+    def chat(self, messages: List[Dict], model: str, temperature: float, max_tokens: int,
+             read_timeout: Optional[float] = None) -> Dict:
+        """Blocking /api/chat call, returns the raw response body
+
+        read_timeout overrides the transport's read timeout for this call.
+        """
+        return self._post("/api/chat", self._chat_payload(messages, model, temperature, max_tokens, False), read_timeout)
+
+    def chat_stream(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> Iterator[Dict]:
+        """Streaming /api/chat call, yields the raw response chunks"""
+        yield from self._post_stream("/api/chat", self._chat_payload(messages, model, temperature, max_tokens, True))
+
+    def generate(self, prompt: str, model: str, temperature: float, max_tokens: int,
+                 system: Optional[str] = None, context: Optional[List[int]] = None,
+                 read_timeout: Optional[float] = None) -> Dict:
+        """Blocking /api/generate call, returns the raw response body"""
+        return self._post("/api/generate", self._generate_payload(prompt, model, temperature, max_tokens, False, system, context),
+                          read_timeout)
+
+    def generate_stream(self, prompt: str, model: str, temperature: float, max_tokens: int,
+                        system: Optional[str] = None, context: Optional[List[int]] = None) -> Iterator[Dict]:
+        """Streaming /api/generate call, yields the raw response chunks"""
+        yield from self._post_stream("/api/generate", self._generate_payload(prompt, model, temperature, max_tokens, True, system, context))
+
+    def embed(self, model: str, texts: List[str]) -> List[List[float]]:
+        """Blocking /api/embed call, one vector per input text"""
+        return self._post("/api/embed", {"model": model, "input": texts}).get("embeddings", [])
+
+    def list_models(self) -> List[Dict]:
+        """Return the raw model list from /api/tags"""
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=(self.connect_timeout, 5))
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+
+class GenerateContextStore:
+    """Remembers the context token arrays returned by /api/generate, keyed on the conversation they encode
+
+    A request whose messages extend a stored conversation only needs to send the
+    new turns together with the stored context, so Ollama prefills just those.
+    Any change to the model, system prompt or earlier turns changes the key and
+    the request falls back to the full prompt.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prefix_keys(model: str, messages: List[Dict]) -> Iterator[Tuple[int, str]]:
+        """Yield (length, key) for every prefix of the conversation"""
+        digest = hashlib.sha256(model.encode("utf-8"))
+        for length, message in enumerate(messages, 1):
+            digest.update(b"\x1e" + message.get("role", "").encode("utf-8") + b"\x1f" + message.get("content", "").encode("utf-8"))
+            yield length, digest.hexdigest()
+
+    def lookup(self, model: str, messages: List[Dict]) -> Tuple[Optional[List[int]], int]:
+        """Return (context, covered) for the longest stored prefix that leaves new turns to send"""
+        best = (None, 0)
+        with self._lock:
+            for length, key in self._prefix_keys(model, messages[:-1]):
+                if key in self._entries:
+                    best = (key, length)
+            if best[0] is None:
+                return None, 0
+            self._entries.move_to_end(best[0])
+            return self._entries[best[0]], best[1]
+
+    def store(self, model: str, messages: List[Dict], context: Optional[List[int]]):
+        """Remember the context for a conversation that ends with the model's reply"""
+        if not context or not messages:
+            return
+        key = None
+        for _, key in self._prefix_keys(model, messages):
+            pass
+        with self._lock:
+            self._entries[key] = context
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,212 @@
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.scheduler import DEFAULT_PRIORITY
+
+# HTTP statuses worth retrying: timeouts, rate limits and server-side failures
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "ConnectionError", "ConnectTimeout", "ReadTimeout", "Timeout", "TimeoutException",
+    "ConnectError", "ReadError", "RemoteProtocolError", "ChunkedEncodingError"
+}
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "chain": [],
+    "attempt_timeout": 300,
+    "retries": 1,
+    "backoff_base": 0.5,
+    "backoff_max": 4.0,
+    "hedge": False,
+    "hedge_min_samples": 20
+}
+
+
+class AttemptTimeout(TimeoutError):
+    """An attempt did not finish (or, when streaming, produce its first chunk) before its deadline"""
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for errors a retry may fix: timeouts, dropped connections, 429 and 5xx responses"""
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class LatencyTracker:
+    """Recent successful call latencies per (provider, model)"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: Tuple[str, str], seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, key: Tuple[str, str], min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+class ResilientCaller:
+    """Runs completions over an ordered chain of providers/models
+
+    Each attempt has a deadline. Transient errors are retried with jittered
+    exponential backoff before moving to the next link in the chain; other
+    errors move on right away. With hedging enabled, a second identical request
+    is fired when the first exceeds the p95 latency of its provider/model, and
+    whichever finishes first wins.
+    """
+
+    def __init__(self, settings: Dict, max_workers: int = 16):
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self.latency = LatencyTracker()  # Full completions, from admission to answer; times hedges
+        self.ttft = LatencyTracker()  # Streams, from admission to first chunk; kept apart so it never shortens hedges
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-attempt")
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def _client_for(self, primary, provider: Optional[str]):
+        """Return the primary client or a client of the same class for another provider"""
+        if not provider or provider == primary.provider:
+            return primary
+        key = (provider, primary.model_type)
+        with self._clients_lock:
+            if key not in self._clients:
+                self._clients[key] = type(primary)(primary.model_type, provider=provider)
+            return self._clients[key]
+
+    def links(self, primary, model: str) -> List[Tuple[object, str]]:
+        """Resolve the chain into (client, model) pairs; an empty chain means just the primary"""
+        chain = self.settings.get("chain") or [{}]
+        links = []
+        for link in chain:
+            try:
+                client = self._client_for(primary, link.get("provider"))
+            except Exception:
+                continue  # e.g. OpenAI without an API key
+            if client is primary:
+                links.append((client, link.get("model") or model))
+            else:
+                links.append((client, link.get("model") or client.model))
+        return links or [(primary, model)]
+
+    def _backoff(self, attempt: int):
+        delay = min(self.settings["backoff_max"], self.settings["backoff_base"] * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))  # Full jitter
+
+    def _run_attempt(self, client, messages, temperature, max_tokens, model, prompt_key, priority) -> str:
+        timeout = self.settings["attempt_timeout"]
+        key = (client.provider, model)
+        started = time.monotonic()
+        admitted_at = {}
+        first_admitted = threading.Event()
+
+        def call(index):
+            def on_admitted():
+                admitted_at[index] = time.monotonic()
+                first_admitted.set()
+            return client._attempt(messages, temperature, max_tokens, model, prompt_key, priority, on_admitted)
+
+        futures = [self._executor.submit(call, 0)]
+        futures[0].add_done_callback(lambda _: first_admitted.set())
+        hedge_delay = self.latency.p95(key, self.settings["hedge_min_samples"]) if self.settings["hedge"] else None
+        if hedge_delay is not None and hedge_delay < timeout:
+            # The hedge clock starts when the first request gets its provider slot: waiting in a
+            # saturated queue is no reason to send the same request twice
+            first_admitted.wait(timeout)
+            if 0 in admitted_at:
+                remaining = min(hedge_delay - (time.monotonic() - admitted_at[0]), timeout - (time.monotonic() - started))
+                done, _ = wait(futures, timeout=max(0.0, remaining))
+                if not done:
+                    futures.append(self._executor.submit(call, 1))
+
+        # Take the first successful result; an error only counts once every request has failed
+        pending = set(futures)
+        error = None
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    index = futures.index(future)
+                    self.latency.add(key, time.monotonic() - admitted_at.get(index, started))
+                    return future.result()
+                error = future.exception()
+        if pending or error is None:
+            raise AttemptTimeout(f"{client.provider} did not respond within {timeout}s")
+        raise error
+
+    def close(self):
+        """Stop accepting attempts; running ones finish in the background"""
+        self._executor.shutdown(wait=False)
+
+    def complete(self, primary, messages, temperature, max_tokens, model, prompt_key=None,
+                 priority=DEFAULT_PRIORITY) -> str:
+        """Blocking completion with deadlines, retries, hedging and failover"""
+        last_error = None
+        for client, link_model in self.links(primary, model):
+            for attempt in range(self.settings["retries"] + 1):
+                try:
+                    return self._run_attempt(client, messages, temperature, max_tokens, link_model, prompt_key, priority)
+                except Exception as e:
+                    last_error = e
+                    if not is_transient(e) or attempt == self.settings["retries"]:
+                        break
+                    self._backoff(attempt)
+        raise last_error
+
+    def stream(self, primary, messages, temperature, max_tokens, model, prompt_key=None,
+               priority=DEFAULT_PRIORITY) -> Iterator[str]:
+        """Streaming completion; deadlines, retries and failover apply until the first chunk arrives
+
+        Once text has been shown it cannot be taken back, so errors after the
+        first chunk are raised as they are. Streams are not hedged.
+        """
+        timeout = self.settings["attempt_timeout"]
+        last_error = None
+        for client, link_model in self.links(primary, model):
+            for attempt in range(self.settings["retries"] + 1):
+                admitted_at = []
+                stream = client._attempt_stream(messages, temperature, max_tokens, link_model, prompt_key, priority,
+                                                lambda: admitted_at.append(time.monotonic()))
+                future = self._executor.submit(next, stream, None)
+                try:
+                    first = future.result(timeout=timeout)
+                except FutureTimeout:
+                    last_error = AttemptTimeout(f"{client.provider} sent nothing within {timeout}s")
+                    future.add_done_callback(lambda _, s=stream: s.close())
+                except Exception as e:
+                    last_error = e
+                else:
+                    if admitted_at:
+                        self.ttft.add((client.provider, link_model), time.monotonic() - admitted_at[0])
+                    if first is not None:
+                        yield first
+                    yield from stream
+                    return
+                if not is_transient(last_error) or attempt == self.settings["retries"]:
+                    break
+                self._backoff(attempt)
+        raise last_error
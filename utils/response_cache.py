@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+
+class ResponseCache:
+    """On-disk LLM response cache with size- and age-based LRU eviction"""
+
+    def __init__(self, path: str, max_entries: int = 2000, max_age_days: float = 30):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.max_age = float(max_age_days) * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                prompt_key TEXT,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, max_tokens: int, messages: List[Dict]) -> str:
+        """Build a stable cache key from the request parameters and normalized messages"""
+        normalized = [
+            {"role": m.get("role", ""), "content": " ".join(str(m.get("content", "")).split())}
+            for m in messages
+        ]
+        payload = json.dumps(
+            [provider, model, round(float(temperature), 3), int(max_tokens), normalized],
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str, prompt_key: Optional[str] = None):
+        """Store a response and evict the least recently used entries if over size"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, prompt_key, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, prompt_key, response, now, now)
+            )
+            self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        with self._lock:
+            if self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+
+            count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if self.max_entries and count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all cached responses and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size
+        }
@@ -0,0 +1,136 @@
+import re
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Awaitable, Callable, Dict, Optional
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "rules": {}
+}
+
+
+def _parse_json(response: str, pattern: str):
+    match = re.search(pattern, response or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+
+
+def _labelled_lines(response: str, *labels: str) -> bool:
+    """Every label starts a line with a value after it, e.g. "Translation: house\""""
+    lines = (response or "").splitlines()
+    return all(
+        any(line.startswith(label) and line[len(label):].strip() for line in lines)
+        for label in labels
+    )
+
+
+# Output checks a small model's answer must pass; the names are used in config.json
+VALIDATORS = {
+    "non_empty": lambda response: bool((response or "").strip()),
+    "json_array": lambda response: isinstance(_parse_json(response, r'\[.*\]'), list),
+    "json_object": lambda response: isinstance(_parse_json(response, r'\{.*\}'), dict),
+    "line_list": lambda response: sum(1 for line in (response or "").splitlines() if line.strip()) >= 3,
+    "translation_example": lambda response: _labelled_lines(response, "Translation:", "Example:")
+}
+
+
+def validate(validator: str, response: str) -> bool:
+    if validator not in VALIDATORS:
+        raise ValueError(f"Unknown routing validator: {validator}")
+    return VALIDATORS[validator](response)
+
+
+class ModelRouter:
+    """Sends cheap, structured prompts to a small model first
+
+    Rules are keyed by prompt key and name a small model per provider, a
+    latency budget and a validator. The small model's answer is used when it
+    arrives within the budget and passes validation; otherwise the request
+    escalates to the model configured for the model type. A blocking small
+    request is given the budget as its timeout, so one that overruns gives up
+    its thread and provider slot by itself; an async one is cancelled.
+    """
+
+    def __init__(self, settings: Dict, max_workers: int = 8, stats: Optional[Dict[str, Dict[str, int]]] = None):
+        """stats: counters from stats() of a previous router, to continue counting from"""
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-route")
+        self._lock = threading.Lock()
+        self._stats = {prompt_key: dict(counts) for prompt_key, counts in (stats or {}).items()}
+
+    def route(self, provider: str, prompt_key: Optional[str], model: str) -> Optional[Dict]:
+        """The rule for a request, with the small model for this provider, or None to use model directly"""
+        rule = self.settings["rules"].get(prompt_key) if prompt_key else None
+        if not rule:
+            return None
+        small_model = rule.get("models", {}).get(provider)
+        if not small_model or small_model == model:
+            return None
+        return dict(rule, model=small_model)
+
+    def _count(self, prompt_key: str, outcome: str):
+        with self._lock:
+            counts = self._stats.setdefault(prompt_key, {"small": 0, "invalid": 0, "over_budget": 0, "error": 0})
+            counts[outcome] += 1
+
+    def _accept(self, rule: Dict, prompt_key: str, content: str) -> bool:
+        if validate(rule.get("validator", "non_empty"), content):
+            self._count(prompt_key, "small")
+            return True
+        self._count(prompt_key, "invalid")
+        return False
+
+    def complete(self, rule: Dict, prompt_key: str, small: Callable[[float], str], large: Callable[[], str]) -> str:
+        """Answer with small(budget) when it is valid and on time, else with large()
+
+        small must give up after budget seconds, including any wait for a provider slot.
+        """
+        validate(rule.get("validator", "non_empty"), "")  # Fail on a misconfigured rule before any request
+
+        budget = float(rule.get("latency_budget_seconds", 10))
+        started = time.monotonic()
+        future = self._executor.submit(small, budget)
+        try:
+            content = future.result(timeout=budget)
+        except FutureTimeout:
+            self._count(prompt_key, "over_budget")
+        except Exception:
+            # Hitting its own timeout is the small request overrunning the budget too;
+            # other failures are e.g. the small model not being installed. The large model still answers
+            self._count(prompt_key, "over_budget" if time.monotonic() - started >= budget else "error")
+        else:
+            if self._accept(rule, prompt_key, content):
+                return content
+        return large()
+
+    async def complete_async(self, rule: Dict, prompt_key: str,
+                             small: Callable[[], Awaitable[str]], large: Callable[[], Awaitable[str]]) -> str:
+        """Coroutine counterpart of complete"""
+        validate(rule.get("validator", "non_empty"), "")
+
+        try:
+            content = await asyncio.wait_for(small(), float(rule.get("latency_budget_seconds", 10)))
+        except asyncio.TimeoutError:
+            self._count(prompt_key, "over_budget")
+        except Exception:
+            self._count(prompt_key, "error")
+        else:
+            if self._accept(rule, prompt_key, content):
+                return content
+        return await large()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per prompt key: answers from the small model and escalations by reason"""
+        with self._lock:
+            return {prompt_key: dict(counts) for prompt_key, counts in self._stats.items()}
+
+    def close(self):
+        """Stop accepting requests; running ones finish in the background"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,210 @@
+import time
+import heapq
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "foreground": 1, "background": 2}
+DEFAULT_PRIORITY = "interactive"
+
+# Default number of in-flight requests per provider (override in config.json "concurrency")
+DEFAULT_CONCURRENCY = {"openai": 8, "lmstudio": 2, "ollama": 2}
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "reserved_interactive": 1,
+    "max_wait_seconds": 120,
+    "rate_limits": {}
+}
+
+
+class QueueTimeout(TimeoutError):
+    """A request waited longer than max_wait_seconds for a provider slot"""
+
+
+class TokenBucket:
+    """Allows per_minute units per minute with bursts up to one minute's worth; 0 means unlimited"""
+
+    def __init__(self, per_minute: float = 0):
+        self.per_minute = per_minute
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (amounts above the capacity wait for a full bucket)"""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.per_minute) - self.level
+        return max(0.0, missing * 60.0 / self.per_minute)
+
+    def consume(self, amount: float):
+        if self.per_minute > 0:
+            self._refill()
+            self.level -= min(amount, self.per_minute)
+
+    def refund(self, amount: float):
+        """Return (or, when negative, take) units after the real cost is known"""
+        if self.per_minute > 0:
+            self._refill()
+            self.level = min(self.per_minute, self.level + amount)
+
+    def set_rate(self, per_minute: float):
+        if per_minute != self.per_minute:
+            self.per_minute = per_minute
+            self.level = float(per_minute)
+            self.updated = time.monotonic()
+
+
+class _Lane:
+    """Queue, slots and rate limits of one provider"""
+
+    def __init__(self, limit: int):
+        self.cond = threading.Condition()
+        self.limit = limit
+        self.queue = []
+        self.in_flight = 0
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.admitted = {name: 0 for name in PRIORITIES}
+        self.waits = {name: deque(maxlen=200) for name in PRIORITIES}
+
+
+class Ticket:
+    """A granted provider slot; release it when the request is done"""
+
+    def __init__(self, lane: Optional[_Lane] = None, reserved_tokens: int = 0):
+        self.lane = lane
+        self.reserved_tokens = reserved_tokens
+        self._released = False
+
+    def release(self, used_tokens: Optional[int] = None):
+        """Free the slot and settle the token estimate with the real usage, if known"""
+        if self.lane is None or self._released:
+            return
+        self._released = True
+        with self.lane.cond:
+            self.lane.in_flight -= 1
+            if used_tokens is not None:
+                self.lane.tokens.refund(self.reserved_tokens - used_tokens)
+            self.lane.cond.notify_all()
+
+
+class RequestScheduler:
+    """Admission control for provider requests
+
+    Each provider has a concurrency cap (the "concurrency" section of
+    config.json) and optional requests/tokens per minute buckets. Waiting
+    requests are served by priority class, first come first served within a
+    class. Background requests may not take the last reserved_interactive
+    slots, so chat turns never queue behind enrichment jobs.
+    """
+
+    def __init__(self, settings: Dict, limits: Dict[str, int]):
+        self._lanes = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self.configure(settings, limits)
+
+    def configure(self, settings: Dict, limits: Dict[str, int]):
+        """Apply new settings to existing lanes without dropping queued requests"""
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self.limits = dict(limits)
+        with self._lock:
+            lanes = list(self._lanes.items())
+        for provider, lane in lanes:
+            with lane.cond:
+                self._configure_lane(provider, lane)
+                lane.cond.notify_all()
+
+    def _configure_lane(self, provider: str, lane: _Lane):
+        rates = self.settings["rate_limits"].get(provider, {})
+        lane.limit = max(1, int(self.limits.get(provider, DEFAULT_CONCURRENCY.get(provider, 2))))
+        lane.requests.set_rate(float(rates.get("requests_per_minute", 0)))
+        lane.tokens.set_rate(float(rates.get("tokens_per_minute", 0)))
+
+    def _lane(self, provider: str) -> _Lane:
+        with self._lock:
+            lane = self._lanes.get(provider)
+            if lane is None:
+                lane = self._lanes[provider] = _Lane(2)
+                self._configure_lane(provider, lane)
+            return lane
+
+    def _slot_limit(self, lane: _Lane, priority: str) -> int:
+        if priority == "background":
+            return max(1, lane.limit - int(self.settings["reserved_interactive"]))
+        return lane.limit
+
+    def _admission_wait(self, lane: _Lane, entry, priority: str, tokens: int) -> Optional[float]:
+        """0 to go now, seconds until the rate limits allow it, or None to wait for a slot"""
+        if lane.queue[0] is not entry or lane.in_flight >= self._slot_limit(lane, priority):
+            return None
+        return max(lane.requests.wait_time(1), lane.tokens.wait_time(tokens))
+
+    def acquire(self, provider: str, priority: str = DEFAULT_PRIORITY, tokens: int = 0,
+                max_wait: Optional[float] = None) -> Ticket:
+        """Block until the request may be sent
+
+        Raises QueueTimeout after max_wait_seconds, or after max_wait when that is shorter.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        lane = self._lane(provider)
+        entry = [PRIORITIES[priority], next(self._sequence)]
+        started = time.monotonic()
+        max_wait = min(float(self.settings["max_wait_seconds"]), max_wait if max_wait is not None else float("inf"))
+        deadline = started + max_wait
+
+        with lane.cond:
+            heapq.heappush(lane.queue, entry)
+            try:
+                while True:
+                    wait = self._admission_wait(lane, entry, priority, tokens)
+                    if wait == 0:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise QueueTimeout(f"No {provider} slot within {max_wait:g}s")
+                    lane.cond.wait(remaining if wait is None else min(wait, remaining))
+            finally:
+                lane.queue.remove(entry)
+                heapq.heapify(lane.queue)
+                lane.cond.notify_all()
+
+            lane.in_flight += 1
+            lane.requests.consume(1)
+            lane.tokens.consume(tokens)
+            lane.admitted[priority] += 1
+            lane.waits[priority].append(time.monotonic() - started)
+        return Ticket(lane, tokens)
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Per provider: slots in use, queue depth and admissions per priority, recent p95 wait"""
+        with self._lock:
+            lanes = dict(self._lanes)
+        result = {}
+        for provider, lane in sorted(lanes.items()):
+            with lane.cond:
+                queued = {name: 0 for name in PRIORITIES}
+                for rank, _ in lane.queue:
+                    queued[next(name for name, value in PRIORITIES.items() if value == rank)] += 1
+                waits = {name: sorted(samples) for name, samples in lane.waits.items()}
+                result[provider] = {
+                    "in_flight": lane.in_flight,
+                    "limit": lane.limit,
+                    "queued": queued,
+                    "admitted": dict(lane.admitted),
+                    "p95_wait_s": {
+                        name: samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else None
+                        for name, samples in waits.items()
+                    }
+                }
+        return result
@@ -0,0 +1,429 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from utils import storage
+from utils.chat_history import message_id
+from utils.llm_client import _get_config_cache, get_llm_client
+
+INDEX_DIRNAME = "semantic_index"
+VECTORS_FILENAME = "vectors.f32"
+ITEMS_FILENAME = "items.json"
+
+# Compact once this share of rows belongs to removed or replaced items
+COMPACT_RATIO = 0.25
+QUERY_CACHE_SIZE = 128
+
+Embedder = Callable[[List[str]], List[List[float]]]
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class SemanticIndex:
+    """Embedding index over vocabulary entries and chat messages
+
+    Unit-length float32 vectors are appended to a flat file that searches read
+    through a NumPy memmap. The items.json sidecar lists the ID, kind and text
+    of each row in the same order, plus the embedding model and dimension.
+    Removed or re-embedded items are masked out and dropped on compaction.
+    """
+
+    def __init__(self, directory: str, model: str, batch_size: int = 64):
+        self.directory = directory
+        self.model = model
+        self.batch_size = batch_size
+        self.vectors_path = os.path.join(directory, VECTORS_FILENAME)
+        self.items_path = os.path.join(directory, ITEMS_FILENAME)
+        self.lock = threading.RLock()  # Guards rows and sidecar; never held while embedding, so searches don't wait
+        self.sync_lock = threading.Lock()  # Held by sync_index so concurrent syncs never embed the same items twice
+        self._batch_depth = 0
+        self._dirty = False
+        self._load()
+
+    # --- Persistence ---
+    def _load(self):
+        try:
+            with open(self.items_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        if meta.get("model") != self.model:
+            meta = {}  # Vectors from another model are not comparable, start over
+
+        self.dim = meta.get("dim")
+        self.items = meta.get("items", [])
+        self.removed = set(meta.get("removed", []))
+        self.history_days = meta.get("history_days", {})
+
+        # Rows and sidecar can disagree after a crash between the two writes; keep the common prefix
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim) if self.dim and os.path.exists(self.vectors_path) else 0
+        if rows < len(self.items):
+            self.items = self.items[:rows]
+            self.removed = {row for row in self.removed if row < rows}
+        if os.path.exists(self.vectors_path) and (not self.dim or rows > len(self.items)):
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(len(self.items) * 4 * (self.dim or 0))
+        self._reindex()
+
+    def _reindex(self):
+        self._positions = {item["id"]: row for row, item in enumerate(self.items) if row not in self.removed}
+        self._matrix = None
+        self._kinds = None
+
+    def _save_meta(self):
+        meta = {
+            "model": self.model,
+            "dim": self.dim,
+            "items": self.items,
+            "removed": sorted(self.removed),
+            "history_days": self.history_days
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=ITEMS_FILENAME + ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, self.items_path)
+
+    def _append(self, items: List[Dict], vectors: np.ndarray):
+        if vectors.ndim != 2 or len(vectors) != len(items):
+            raise ValueError(f"Expected {len(items)} embeddings, got {len(vectors)}")
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding size changed from {self.dim} to {vectors.shape[1]}")
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.vectors_path, "ab") as f:
+            f.write(_normalize(vectors).astype(np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        for item in items:
+            previous = self._positions.get(item["id"])
+            if previous is not None:
+                self.removed.add(previous)  # Re-embedded after its text changed
+            self._positions[item["id"]] = len(self.items)
+            self.items.append(item)
+        self._matrix = None
+        self._kinds = None
+
+    def _compact(self):
+        """Rewrite the vector file without removed rows"""
+        keep = [row for row in range(len(self.items)) if row not in self.removed]
+        matrix = self._matrix_view()
+        live = np.array(matrix[keep]) if matrix is not None else np.zeros((0, self.dim or 0), dtype=np.float32)
+        self._matrix = None
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=VECTORS_FILENAME + ".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(live.tobytes())
+        self.items = [self.items[row] for row in keep]
+        self.removed = set()
+        os.replace(temp_path, self.vectors_path)
+        self._reindex()
+
+    def _commit(self):
+        """Persist the sidecar now, or when the outermost batch() ends"""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        if self.items and len(self.removed) > len(self.items) * COMPACT_RATIO:
+            self._compact()
+        self._save_meta()
+        self._dirty = False
+
+    @contextmanager
+    def batch(self):
+        """Group updates so the sidecar is written once at the end
+
+        Vectors are still appended as they arrive; rows beyond the sidecar are
+        dropped on the next load if the process dies before the batch ends.
+        """
+        with self.lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self._commit()
+
+    def _matrix_view(self) -> Optional[np.ndarray]:
+        if self._matrix is None and self.items:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.items), self.dim))
+        return self._matrix
+
+    # --- Updates ---
+    def _needs_embedding(self, item: Dict) -> bool:
+        row = self._positions.get(item["id"])
+        return row is None or self.items[row].get("hash") != item["hash"]
+
+    def add(self, items: Iterable[Dict], embed: Embedder) -> int:
+        """Embed items that are new or whose text changed, in batches; returns how many were embedded
+
+        Items are dicts with id, kind and text; other keys are kept for display.
+        """
+        with self.lock:
+            pending = []
+            for item in items:
+                item = dict(item, hash=_text_hash(item["text"]))
+                if self._needs_embedding(item):
+                    pending.append(item)
+        try:
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                vectors = np.asarray(embed([item["text"] for item in batch]), dtype=np.float32)
+                with self.lock:
+                    self._append(batch, vectors)
+        finally:
+            if pending:
+                with self.lock:
+                    self._commit()  # Keep the batches that made it before an error
+        return len(pending)
+
+    def retain(self, keep_ids: Set[str], kind: str, day: Optional[str] = None) -> int:
+        """Remove items of a kind (and day) whose ID is not in keep_ids; returns how many were removed"""
+        with self.lock:
+            stale = [
+                row for item_id, row in self._positions.items()
+                if item_id not in keep_ids and self.items[row]["kind"] == kind
+                and (day is None or self.items[row].get("day") == day)
+            ]
+            for row in stale:
+                self.removed.add(row)
+                del self._positions[self.items[row]["id"]]
+            if stale:
+                self._kinds = None
+                self._commit()
+            return len(stale)
+
+    def set_history_day(self, day: str, count: Optional[int]):
+        """Record how many messages of a day are indexed (None forgets the day)"""
+        with self.lock:
+            if count is None:
+                self.history_days.pop(day, None)
+            else:
+                self.history_days[day] = count
+            self._commit()
+
+    def clear(self):
+        with self.lock:
+            self.dim = None
+            self.items = []
+            self.removed = set()
+            self.history_days = {}
+            self._reindex()
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            self._save_meta()
+
+    # --- Search ---
+    def _kind_array(self) -> Tuple[np.ndarray, Dict[str, int]]:
+        """Per-row kind codes (-1 for removed rows) and the code of each kind"""
+        if self._kinds is None:
+            codes = {}
+            kinds = np.fromiter(
+                (codes.setdefault(item["kind"], len(codes)) for item in self.items),
+                dtype=np.int32, count=len(self.items)
+            )
+            if self.removed:
+                kinds[sorted(self.removed)] = -1
+            self._kinds = (kinds, codes)
+        return self._kinds
+
+    def search(self, query_vector: List[float], top_k: int = 10, kinds: Optional[Iterable[str]] = None) -> List[Tuple[Dict, float]]:
+        """Top-k items by cosine similarity, best first, as (item, score) pairs"""
+        with self.lock:
+            matrix = self._matrix_view()
+            if matrix is None:
+                return []
+            query = _normalize(np.asarray(query_vector, dtype=np.float32))
+            scores = matrix @ query
+
+            item_kinds, codes = self._kind_array()
+            if kinds is not None:
+                valid = np.isin(item_kinds, [codes[kind] for kind in kinds if kind in codes])
+            else:
+                valid = item_kinds >= 0
+            scores = np.where(valid, scores, -np.inf)
+
+            k = min(top_k, int(valid.sum()))
+            if k <= 0:
+                return []
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            return [(self.items[row], float(scores[row])) for row in best]
+
+    def __len__(self):
+        return len(self._positions)
+
+
+# --- Items from storage ---
+def vocabulary_items(vocab_list: List) -> List[Dict]:
+    items = {}
+    for entry in vocab_list:
+        if isinstance(entry, str):
+            entry = {"word": entry}
+        word = entry.get("word")
+        if not word:
+            continue
+        parts = [word, entry.get("translation"), entry.get("example")]
+        text = " — ".join(part for part in parts if part and part != "None.")
+        items[f"vocab:{word}"] = {"id": f"vocab:{word}", "kind": "vocab", "text": text, "word": word}
+    return list(items.values())
+
+
+def message_items(messages: List[Dict], day: str) -> List[Dict]:
+    return [
+        {
+            "id": f"msg:{message_id(msg)}",
+            "kind": "message",
+            "text": msg["content"],
+            "role": msg.get("role"),
+            "day": day,
+            "timestamp": msg.get("timestamp")
+        }
+        for msg in messages
+        if msg.get("role") != "system" and msg.get("content", "").strip()
+    ]
+
+
+def get_search_settings() -> Dict:
+    return _get_config_cache()["config"].get("semantic_search", {})
+
+
+def provider_embedder(model: str, priority: str = "interactive") -> Embedder:
+    """Embed through the configured provider's embeddings endpoint"""
+    client = get_llm_client("chat")
+    return lambda texts: client.embed(texts, model, priority)
+
+
+def sync_index(index: SemanticIndex, embed: Embedder, backend=None) -> int:
+    """Embed vocabulary and chat messages added since the last sync; returns how many items were embedded
+
+    History is compared day by day against the per-day counts recorded at the
+    last sync, so only days with new messages are loaded. backend defaults to
+    the current session's storage backend.
+    """
+    backend = backend or storage.get_backend()
+    with index.sync_lock, index.batch():
+        vocab = vocabulary_items(backend.load_vocabulary())
+        index.retain({item["id"] for item in vocab}, "vocab")
+        pending = list(vocab)
+
+        days = dict(backend.list_history_days())
+        for day in list(index.history_days):
+            if day not in days:
+                index.retain(set(), "message", day)
+                index.set_history_day(day, None)
+        changed = {}
+        for day, count in days.items():
+            if index.history_days.get(day) != count:
+                items = message_items(backend.load_history_day(day), day)
+                index.retain({item["id"] for item in items}, "message", day)
+                pending += items
+                changed[day] = count
+
+        # One pass over everything new, so embedding batches span days
+        embedded = index.add(pending, embed)
+        for day, count in changed.items():
+            index.set_history_day(day, count)
+        return embedded
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+_syncs = {}
+_sync_errors = {}
+_syncs_lock = threading.Lock()
+_query_vectors = OrderedDict()
+_query_lock = threading.Lock()
+
+
+def get_semantic_index() -> SemanticIndex:
+    """Get or open the index of the current user's data for the configured embedding model"""
+    settings = get_search_settings()
+    model = settings.get("model", "text-embedding-nomic-embed-text-v1.5")
+    directory = os.path.join(storage.get_storage_dir(), INDEX_DIRNAME)
+    key = (directory, model)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = SemanticIndex(directory, model, int(settings.get("batch_size", 64)))
+                _indexes[key] = index
+    return index
+
+
+def embed_query(query: str, embed: Embedder, model: str) -> List[float]:
+    """Query vector, remembered for repeated searches"""
+    key = (model, query)
+    with _query_lock:
+        if key in _query_vectors:
+            _query_vectors.move_to_end(key)
+            return _query_vectors[key]
+    vector = embed([query])[0]
+    with _query_lock:
+        _query_vectors[key] = vector
+        if len(_query_vectors) > QUERY_CACHE_SIZE:
+            _query_vectors.popitem(last=False)
+    return vector
+
+
+def _run_sync(index: SemanticIndex, embed: Embedder, backend):
+    key = (index.directory, index.model)
+    try:
+        sync_index(index, embed, backend)
+        _sync_errors.pop(key, None)
+    except Exception as e:
+        _sync_errors[key] = e  # Items not embedded yet are picked up by the next sync
+
+
+def start_sync(index: SemanticIndex) -> bool:
+    """Sync the index with the current user's storage on a background thread; returns True if started
+
+    Does nothing while a sync of the index is still running.
+    """
+    key = (index.directory, index.model)
+    # Resolved here: the sync thread has no session to find the user in
+    backend = storage.get_backend()
+    embed = provider_embedder(index.model, "background")
+    with _syncs_lock:
+        thread = _syncs.get(key)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=_run_sync, args=(index, embed, backend), name="semantic-sync", daemon=True)
+        _syncs[key] = thread
+        thread.start()
+        return True
+
+
+def sync_status(index: SemanticIndex) -> Tuple[bool, Optional[Exception]]:
+    """Whether a background sync of the index is running, and the error of the last one if it failed"""
+    key = (index.directory, index.model)
+    thread = _syncs.get(key)
+    return thread is not None and thread.is_alive(), _sync_errors.get(key)
+
+
+def search(query: str, kinds: Optional[Iterable[str]] = None, top_k: Optional[int] = None) -> List[Tuple[Dict, float]]:
+    """Return the items closest to the query in the index as it is
+
+    New vocabulary and messages are embedded by a background sync started
+    here, so they show up in later searches instead of delaying this one.
+    """
+    index = get_semantic_index()
+    start_sync(index)
+    top_k = top_k or int(get_search_settings().get("top_k", 10))
+    return index.search(embed_query(query, provider_embedder(index.model), index.model), top_k, kinds)
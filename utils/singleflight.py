@@ -0,0 +1,119 @@
+import threading
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _StreamCall:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks = []
+        self.finished = False
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution
+
+    The first caller (the leader) runs the function; callers arriving while it
+    is in flight wait and receive the same result or exception. Nothing is
+    cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, function: Callable) -> Tuple[object, bool]:
+        """Run function once per in-flight key, returns (result, shared)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key: Hashable, factory: Callable[[], Iterable]) -> Iterator:
+        """Share one stream between concurrent callers; followers replay chunks as the leader receives them"""
+        with self._lock:
+            call = self._streams.get(key)
+            leader = call is None
+            if leader:
+                call = self._streams[key] = _StreamCall()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            yield from self._lead(key, call, factory)
+        else:
+            yield from self._follow(call)
+
+    def _lead(self, key, call: _StreamCall, factory):
+        try:
+            for chunk in factory():
+                with call.cond:
+                    call.chunks.append(chunk)
+                    call.cond.notify_all()
+                yield chunk
+        except GeneratorExit:
+            # The leader's reader went away; followers must not mistake the partial text for a full reply
+            call.error = RuntimeError("The shared request was cancelled")
+            raise
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._streams.pop(key, None)
+            with call.cond:
+                call.finished = True
+                call.cond.notify_all()
+
+    def _follow(self, call: _StreamCall):
+        position = 0
+        while True:
+            with call.cond:
+                while position >= len(call.chunks) and not call.finished:
+                    call.cond.wait()
+                chunks = call.chunks[position:]
+                finished = call.finished
+            for chunk in chunks:
+                yield chunk
+            position += len(chunks)
+            if finished and position >= len(call.chunks):
+                if call.error is not None:
+                    raise call.error
+                return
+
+    def stats(self) -> Dict[str, int]:
+        """Executed calls and calls that shared another caller's result"""
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared}
@@ -1,56 +1,260 @@
-import json
+import os
+import re
+import atexit
+import hashlib
+import threading
+from datetime import datetime
 import streamlit as st
+from utils.storage_backends import JSONStorage, SQLiteStorage, migrate_json_to_sqlite
+from utils.chat_history import message_id
+from utils.write_behind import LessonPlanWriteBehind
+from utils.env import load_environment
 
-VOCAB_FILE = "assets/user_vocabulary.json"
-LESSON_PLAN_FILE = "assets/lesson_plan.json"
-USER_INPUTS_FILE = "assets/lesson_plan_inputs.json"
-CHAT_HISTORY_FILE = "assets/chat_history.json" # Define the file path for saving chat history
+SQLITE_FILENAME = "tutor.db"
+USERS_DIRNAME = "users"
+USER_QUERY_PARAM = "user"
+DEFAULT_USER_HEADER = "X-Forwarded-User"
+DEFAULT_WRITE_DELAY = 0.5
+MAX_USER_ID = 64
+SAFE_USER_ID = re.compile(r"(?![.])[A-Za-z0-9@._-]{1,%d}(?<![.])" % MAX_USER_ID)
 
-def save_lesson_plan_inputs(inputs):
-    with open(USER_INPUTS_FILE, "w") as f:
-        json.dump(inputs, f)
+# One backend per user ("" is the shared, un-namespaced storage)
+_backends = {}
+_backend_lock = threading.Lock()
+_plan_writers = {}
 
-def load_lesson_plan_inputs():
+def _safe_user_id(user):
+    """Turn a user identifier into a directory name; altered names get a hash suffix so they stay distinct
+
+    Safe names come back unchanged, so sanitizing an already sanitized ID is harmless.
+    """
+    user = str(user).strip()
+    if SAFE_USER_ID.fullmatch(user):
+        return user
+    safe = re.sub(r"[^A-Za-z0-9@._-]", "_", user).strip(".")[:MAX_USER_ID - 9]
+    return f"{safe}-{hashlib.sha1(user.encode('utf-8')).hexdigest()[:8]}"
+
+def get_current_user():
+    """Identify the user of this session, None when anonymous
+
+    Checked in order: the logged-in user (st.login), the header named by
+    STORAGE_USER_HEADER (set by an authenticating proxy), the ?user= query
+    parameter. The result is kept in the session so it survives page switches,
+    which drop the query string.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None  # Outside a Streamlit session (scripts, benchmarks)
     try:
-        with open(USER_INPUTS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        user = None
+        if getattr(st.user, "is_logged_in", False):
+            user = st.user.get("email") or st.user.get("sub")
+        if not user:
+            user = st.context.headers.get(os.getenv("STORAGE_USER_HEADER", DEFAULT_USER_HEADER))
+        if not user:
+            user = st.query_params.get(USER_QUERY_PARAM)
+        if user:
+            st.session_state.storage_user = _safe_user_id(user)
+        return st.session_state.get("storage_user") or None
+    except Exception:
         return None
 
+def get_storage_dir(user=None):
+    """Directory holding a user's data (default: this session's user)"""
+    load_environment()  # Reads .env on the first call only
+    if user is None:
+        user = get_current_user()
+    storage_dir = os.getenv("STORAGE_DIR", "assets")
+    if user:
+        storage_dir = os.path.join(storage_dir, USERS_DIRNAME, _safe_user_id(user))
+    return storage_dir
+
+def _create_backend(user):
+    storage_dir = get_storage_dir(user)
+    backend_name = os.getenv("STORAGE_BACKEND", "json").lower()
+
+    if backend_name == "sqlite":
+        db_path = os.path.join(storage_dir, SQLITE_FILENAME)
+        is_new = not os.path.exists(db_path)
+        backend = SQLiteStorage(db_path)
+        if is_new:
+            # One-shot import of the existing JSON files into the new database
+            migrate_json_to_sqlite(JSONStorage(storage_dir), backend)
+        return backend
+    if backend_name == "json":
+        return JSONStorage(storage_dir)
+    raise ValueError(f"Unsupported storage backend: {backend_name}")
+
+def get_backend(user=None):
+    """Get or create the storage backend for a user (default: this session's user)
+
+    STORAGE_BACKEND selects json or sqlite. Each user gets their own directory,
+    STORAGE_DIR/users/<user>/; anonymous sessions use STORAGE_DIR itself.
+    """
+    if user is None:
+        user = get_current_user()
+    key = _safe_user_id(user) if user else ""
+    backend = _backends.get(key)
+    if backend is None:
+        with _backend_lock:
+            backend = _backends.get(key)
+            if backend is None:
+                backend = _create_backend(key)
+                _backends[key] = backend
+    return backend
+
+def reset_backends():
+    """Forget cached backends, e.g. after changing STORAGE_BACKEND or STORAGE_DIR"""
+    flush_pending_writes()
+    with _backend_lock:
+        _backends.clear()
+        _plan_writers.clear()
+
+def _plan_writer():
+    """Write-behind queue for the current user's lesson plan, None when STORAGE_WRITE_DELAY is 0"""
+    backend = get_backend()
+    delay = float(os.getenv("STORAGE_WRITE_DELAY", DEFAULT_WRITE_DELAY))
+    if delay <= 0:
+        return None
+    writer = _plan_writers.get(id(backend))
+    if writer is None:
+        with _backend_lock:
+            writer = _plan_writers.get(id(backend))
+            if writer is None:
+                writer = LessonPlanWriteBehind(backend, delay)
+                _plan_writers[id(backend)] = writer
+    return writer
+
+def flush_pending_writes():
+    """Persist every queued lesson plan change, e.g. before the process exits"""
+    for writer in list(_plan_writers.values()):
+        writer.flush()
+
+def lesson_plan_write_error():
+    """Why this user's queued lesson plan changes are not saved yet (they are retried), if they are not"""
+    writer = _plan_writers.get(id(get_backend()))
+    return writer.last_error if writer else None
+
+def lesson_plan_dropped_error():
+    """Why the last batch of this user's lesson plan changes could not be saved and was dropped; reported once"""
+    writer = _plan_writers.get(id(get_backend()))
+    return writer.take_dropped_error() if writer else None
+
+atexit.register(flush_pending_writes)
+
+def save_lesson_plan_inputs(inputs):
+    get_backend().save_lesson_plan_inputs(inputs)
+
+def load_lesson_plan_inputs():
+    return get_backend().load_lesson_plan_inputs()
+
 def load_vocabulary():
-    try:
-        with open(VOCAB_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    return get_backend().load_vocabulary()
 
 def save_vocabulary(vocab_list):
-    with open(VOCAB_FILE, "w") as f:
-        json.dump(vocab_list, f)
+    get_backend().save_vocabulary(vocab_list)
+
+def add_word(entry):
+    get_backend().add_words([entry])
+
+def add_words(entries):
+    get_backend().add_words(entries)
+
+def delete_word(word):
+    get_backend().delete_word(word)
 
 def load_lesson_plan():
-    try:
-        with open(LESSON_PLAN_FILE, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    writer = _plan_writer()
+    if writer:
+        writer.flush()  # Read our own queued changes
+    return get_backend().load_lesson_plan()
+
+def load_progress():
+    """Total and completed assignment counts, overall and per week/day, without loading the plan"""
+    writer = _plan_writer()
+    if writer:
+        writer.flush()
+    return get_backend().load_progress()
 
 def save_lesson_plan(plan):
-    with open(LESSON_PLAN_FILE, "w") as f:
-        json.dump(plan, f)
+    writer = _plan_writer()
+    if writer and writer.flush():
+        writer.discard()  # The new plan supersedes changes that could not be saved
+    get_backend().save_lesson_plan(plan)
 
-# --- Function to load chat history from file ---
+def _submit_plan_change(change):
+    """Queue an assignment change for the background writer, or save it right away"""
+    writer = _plan_writer()
+    if writer:
+        writer.submit(change)
+    else:
+        get_backend().apply_lesson_plan_changes([change])
+
+def set_assignment_completed(week_index, assignment_index, completed):
+    _submit_plan_change(("completed", week_index, assignment_index, completed))
+
+def add_assignment(week_index, title):
+    _submit_plan_change(("add", week_index, title))
+
+def delete_assignment(week_index, assignment_index):
+    _submit_plan_change(("delete", week_index, assignment_index))
+
+# --- Chat history ---
 def load_chat_history():
-    try:
-        with open(CHAT_HISTORY_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    return get_backend().load_chat_history()
 
-# --- Function to save chat history to file ---
 def save_chat_history(messages):
     try:
-        with open(CHAT_HISTORY_FILE, "w") as f:
-            json.dump(messages, f)
+        get_backend().save_chat_history(messages)
     except Exception as e:
         st.error(f"Error saving chat history: {e}")
+
+def append_chat_history(messages):
+    """Append messages to the stored history, returns False (after reporting the error) if saving failed"""
+    try:
+        get_backend().append_chat_history(messages)
+    except Exception as e:
+        st.error(f"Error saving chat history: {e}")
+        return False
+    return True
+
+def list_history_days():
+    """Return (day, message count) pairs from the history index, newest first"""
+    return get_backend().list_history_days()
+
+def load_history_day(day, offset=0, limit=None):
+    """Load one day's messages, optionally a single page of them"""
+    return get_backend().load_history_day(day, offset, limit)
+
+def sync_session_history(session_state):
+    """Persist session messages added since the last sync, returns how many were handed to storage
+
+    session_state.history_synced_count is the high-water mark: the number of
+    session messages already persisted. It belongs to the conversation whose
+    first message ID is session_state.history_synced_conversation; a new
+    conversation starts from zero. The mark only moves once storage accepted
+    the messages, so a failed save is retried on the next sync. Storage also
+    skips message IDs it already has, so repeated or concurrent syncs never
+    duplicate data.
+    """
+    messages = session_state.get("messages", [])
+    conversation = message_id(messages[0]) if messages else None
+    synced = session_state.get("history_synced_count", 0)
+    if conversation != session_state.get("history_synced_conversation") or synced > len(messages):
+        # A different conversation (cleared or replaced), start over; storage dedupes by ID
+        synced = 0
+
+    pending = []
+    for msg in messages[synced:]:
+        if msg["role"] == "system":  # Exclude system messages
+            continue
+        # Messages created before IDs existed get a timestamp and ID now
+        msg.setdefault("timestamp", datetime.now().isoformat())
+        msg.setdefault("id", message_id(msg))
+        pending.append(msg)
+
+    if pending and not append_chat_history(pending):
+        return 0
+    session_state.history_synced_conversation = message_id(messages[0]) if messages else None
+    session_state.history_synced_count = len(messages)
+    return len(pending)
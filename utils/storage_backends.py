@@ -0,0 +1,670 @@
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+from utils.chat_history import build_day_index, dedupe_messages, message_day, message_id
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive inter-process lock on a lock file, reentrant within one process
+
+    Uses flock on POSIX and msvcrt byte-range locking on Windows. Threads of
+    this process serialize on an RLock first, so only the outermost holder
+    touches the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def _acquire_file(self):
+        self._file = open(self.path, "a+")
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            return
+        self._file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gives up after ~10 seconds, keep waiting
+
+    def _release_file(self):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._acquire_file()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self._release_file()
+        finally:
+            self._lock.release()
+
+
+class StorageBackend(ABC):
+    """Storage interface for vocabulary, lesson plans and chat history
+
+    Backends must implement the abstract load_*/save_* methods. The single-item operations
+    default to load-modify-save and are overridden by backends that can update
+    individual rows.
+    """
+
+    def transaction(self):
+        """Context manager that makes a load-modify-save sequence atomic across processes"""
+        return nullcontext()
+
+    # --- Lesson plan inputs ---
+    @abstractmethod
+    def load_lesson_plan_inputs(self) -> Optional[Dict]:
+        """The inputs the lesson plan was generated from, None if there are none"""
+
+    @abstractmethod
+    def save_lesson_plan_inputs(self, inputs: Dict):
+        """Replace the stored lesson plan inputs"""
+
+    # --- Vocabulary ---
+    @abstractmethod
+    def load_vocabulary(self) -> List:
+        """All vocabulary entries in insertion order"""
+
+    @abstractmethod
+    def save_vocabulary(self, vocab_list: List):
+        """Replace the whole vocabulary"""
+
+    def add_words(self, entries: List[Dict]):
+        with self.transaction():
+            self.save_vocabulary(self.load_vocabulary() + list(entries))
+
+    def delete_word(self, word: str):
+        with self.transaction():
+            self.save_vocabulary([
+                entry for entry in self.load_vocabulary()
+                if not (isinstance(entry, dict) and entry.get("word") == word) and entry != word
+            ])
+
+    # --- Lesson plan ---
+    @abstractmethod
+    def load_lesson_plan(self) -> List[Dict]:
+        """The lesson plan as a list of weeks with their assignments"""
+
+    @abstractmethod
+    def save_lesson_plan(self, plan: List[Dict]):
+        """Replace the whole lesson plan"""
+
+    def set_assignment_completed(self, week_index: int, assignment_index: int, completed: bool):
+        self.apply_lesson_plan_changes([("completed", week_index, assignment_index, completed)])
+
+    def add_assignment(self, week_index: int, title: str):
+        self.apply_lesson_plan_changes([("add", week_index, title)])
+
+    def delete_assignment(self, week_index: int, assignment_index: int):
+        self.apply_lesson_plan_changes([("delete", week_index, assignment_index)])
+
+    def apply_lesson_plan_changes(self, changes: List[Tuple]):
+        """Apply assignment changes in order as one load-modify-save
+
+        Changes are ("completed", week, index, value), ("add", week, title)
+        and ("delete", week, index). Changes to a week or assignment that no
+        longer exists are skipped.
+        """
+        with self.transaction():
+            plan = self.load_lesson_plan()
+            for change in changes:
+                apply_plan_change(plan, change)
+            self.save_lesson_plan(plan)
+
+    def load_progress(self) -> Dict:
+        """Assignment totals for the whole plan and per week/day, see summarize_progress"""
+        return summarize_progress(self.load_lesson_plan())
+
+    # --- Chat history ---
+    @abstractmethod
+    def load_chat_history(self) -> List[Dict]:
+        """All stored chat messages in order"""
+
+    @abstractmethod
+    def save_chat_history(self, messages: List[Dict]):
+        """Replace the whole chat history"""
+
+    def append_chat_history(self, messages: List[Dict]):
+        """Append messages, skipping any whose ID is already stored"""
+        with self.transaction():
+            history = self.load_chat_history()
+            updated = dedupe_messages(history + list(messages))
+            if updated != history:
+                self.save_chat_history(updated)
+
+    def list_history_days(self) -> List[Tuple[str, int]]:
+        """Return (day, message count) pairs, newest day first"""
+        counts = {}
+        for msg in self.load_chat_history():
+            day = message_day(msg)
+            if day:
+                counts[day] = counts.get(day, 0) + 1
+        return sorted(counts.items(), reverse=True)
+
+    def load_history_day(self, day: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """Return one day's messages in order, optionally one page of them"""
+        messages = [msg for msg in self.load_chat_history() if message_day(msg) == day]
+        return messages[offset:offset + limit if limit is not None else None]
+
+
+def summarize_progress(plan: List[Dict]) -> Dict:
+    """Count total and completed assignments overall and per week/day"""
+    weeks = [
+        {
+            "week_or_day": week.get("week_or_day"),
+            "total": len(week.get("assignments", [])),
+            "completed": sum(1 for task in week.get("assignments", []) if task.get("completed", False))
+        }
+        for week in plan
+    ]
+    return {
+        "total": sum(week["total"] for week in weeks),
+        "completed": sum(week["completed"] for week in weeks),
+        "weeks": weeks
+    }
+
+
+def apply_plan_change(plan: List[Dict], change: Tuple) -> bool:
+    """Apply one lesson plan change (see StorageBackend.apply_lesson_plan_changes) to a plan in memory
+
+    Returns False, leaving the plan unchanged, when the week or assignment no
+    longer exists, e.g. a delete sent twice or from a stale page.
+    """
+    kind, week_index = change[0], change[1]
+    if kind not in ("completed", "add", "delete"):
+        raise ValueError(f"Unknown lesson plan change: {kind}")
+    if not 0 <= week_index < len(plan):
+        return False
+    assignments = plan[week_index]["assignments"]
+    if kind == "add":
+        assignments.append({"title": change[2], "completed": False})
+        return True
+    if not 0 <= change[2] < len(assignments):
+        return False
+    if kind == "completed":
+        assignments[change[2]]["completed"] = change[3]
+    else:
+        del assignments[change[2]]
+    return True
+
+
+class JSONStorage(StorageBackend):
+    """Storage in plain JSON files, one file per data type (the original format)
+
+    Files are replaced atomically (write to a temp file, then rename), so readers
+    never see a half-written file. Writers hold an exclusive lock on .lock in
+    the directory, which also covers load-modify-save sequences.
+    """
+
+    LOCK_FILENAME = ".lock"
+    # Bumped when the chat history index layout changes, so older indexes are rebuilt
+    HISTORY_INDEX_VERSION = 2
+
+    def __init__(self, base_dir: str = "assets"):
+        self.base_dir = base_dir
+        os.makedirs(base_dir or ".", exist_ok=True)
+        self._file_lock = FileLock(os.path.join(base_dir, self.LOCK_FILENAME))
+        self.vocab_file = os.path.join(base_dir, "user_vocabulary.json")
+        self.lesson_plan_file = os.path.join(base_dir, "lesson_plan.json")
+        self.user_inputs_file = os.path.join(base_dir, "lesson_plan_inputs.json")
+        # Progress counts of lesson_plan.json, rewritten with it
+        self.lesson_progress_file = os.path.join(base_dir, "lesson_progress.json")
+        # A JSON array with one message per line, so a run of messages is a byte range
+        self.chat_history_file = os.path.join(base_dir, "chat_history.json")
+        # Per-day [start, end, first byte, end byte) ranges into chat_history.json, rewritten with it
+        self.chat_history_index_file = os.path.join(base_dir, "chat_history_index.json")
+
+    def _load(self, path, default):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def _save(self, path, data):
+        self._replace(path, json.dumps(data))
+
+    def _replace(self, path, text):
+        with self.transaction():
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, path)
+            except BaseException:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                raise
+
+    def transaction(self):
+        return self._file_lock
+
+    def load_lesson_plan_inputs(self):
+        return self._load(self.user_inputs_file, None)
+
+    def save_lesson_plan_inputs(self, inputs):
+        self._save(self.user_inputs_file, inputs)
+
+    def load_vocabulary(self):
+        return self._load(self.vocab_file, [])
+
+    def save_vocabulary(self, vocab_list):
+        self._save(self.vocab_file, vocab_list)
+
+    def load_lesson_plan(self):
+        return self._load(self.lesson_plan_file, [])
+
+    def save_lesson_plan(self, plan):
+        with self.transaction():
+            self._save(self.lesson_plan_file, plan)
+            self._save_progress(plan)
+
+    def _save_progress(self, plan):
+        self._save(self.lesson_progress_file, dict(summarize_progress(plan), stamp=self._file_stamp(self.lesson_plan_file)))
+
+    def load_progress(self):
+        """Read the progress file, rebuilding it if lesson_plan.json changed behind our back"""
+        progress = self._load(self.lesson_progress_file, None)
+        if progress is None or progress.get("stamp") != self._file_stamp(self.lesson_plan_file):
+            with self.transaction():
+                plan = self.load_lesson_plan()
+                self._save_progress(plan)
+                progress = summarize_progress(plan)
+        progress.pop("stamp", None)
+        return progress
+
+    def load_chat_history(self):
+        return self._load(self.chat_history_file, [])
+
+    def save_chat_history(self, messages):
+        # json.dumps escapes non-ASCII, so character offsets are byte offsets
+        lines = [json.dumps(msg) for msg in messages]
+        offsets = [2]  # After "[\n"
+        for line in lines:
+            offsets.append(offsets[-1] + len(line) + 2)  # ",\n" after each message
+        with self.transaction():
+            self._replace(self.chat_history_file, "[\n" + ",\n".join(lines) + "\n]\n")
+            self._save_history_index(messages, offsets)
+
+    def _file_stamp(self, path):
+        try:
+            stat = os.stat(path)
+            return [stat.st_mtime_ns, stat.st_size]
+        except FileNotFoundError:
+            return None
+
+    def _history_stamp(self):
+        return self._file_stamp(self.chat_history_file)
+
+    def _save_history_index(self, messages, offsets):
+        """offsets[i] is the byte where message i starts; a message ends 2 bytes before the next starts"""
+        self._save(self.chat_history_index_file, {
+            "version": self.HISTORY_INDEX_VERSION,
+            "stamp": self._history_stamp(),
+            "days": {
+                day: [[start, end, offsets[start], offsets[end] - 2] for start, end in ranges]
+                for day, ranges in build_day_index(messages).items()
+            }
+        })
+
+    def _load_history_index(self):
+        """Return the day index, rebuilding it if chat_history.json changed behind our back"""
+        index = self._load(self.chat_history_index_file, None)
+        if index is None or index.get("version") != self.HISTORY_INDEX_VERSION or index.get("stamp") != self._history_stamp():
+            if self._history_stamp() is None:
+                return {"stamp": None, "days": {}}
+            with self.transaction():  # Keep writers from replacing the history mid-rebuild
+                # Rewritten in the one-message-per-line layout the byte ranges point into
+                self.save_chat_history(self.load_chat_history())
+                index = self._load(self.chat_history_index_file, {"stamp": None, "days": {}})
+        return index
+
+    def list_history_days(self):
+        days = self._load_history_index()["days"]
+        return sorted(
+            ((day, sum(r[1] - r[0] for r in ranges)) for day, ranges in days.items()),
+            reverse=True
+        )
+
+    def load_history_day(self, day, offset=0, limit=None):
+        """Read and parse only the byte ranges of the day's messages"""
+        index = self._load_history_index()
+        ranges = index["days"].get(day, [])
+        if not ranges:
+            return []
+        with open(self.chat_history_file, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if [stat.st_mtime_ns, stat.st_size] != index["stamp"]:
+                # Replaced since the index was read: parse this copy whole
+                history = json.load(f)
+                messages = [msg for start, end, _, _ in ranges for msg in history[start:end]]
+            else:
+                messages = []
+                for _, _, first, last in ranges:
+                    f.seek(first)
+                    messages += json.loads(b"[" + f.read(last - first) + b"]")
+        return messages[offset:offset + limit if limit is not None else None]
+
+
+class SQLiteStorage(StorageBackend):
+    """Storage in a single SQLite database (WAL mode) with row-level updates"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS vocabulary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            word TEXT NOT NULL,
+            translation TEXT,
+            example TEXT
+        );
+        CREATE INDEX IF NOT EXISTS vocabulary_word ON vocabulary (word);
+        CREATE TABLE IF NOT EXISTS lesson_weeks (
+            position INTEGER PRIMARY KEY,
+            week_or_day TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS lesson_assignments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            week_position INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS lesson_assignments_position ON lesson_assignments (week_position, position);
+        CREATE TABLE IF NOT EXISTS lesson_progress (
+            week_position INTEGER PRIMARY KEY,
+            total INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            msg_id TEXT,
+            day TEXT,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TEXT,
+            extra TEXT
+        );
+    """
+
+    def __init__(self, db_path: str = "assets/tutor.db"):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            self._upgrade_schema(conn)
+            self._rebuild_progress(conn)
+
+    def _upgrade_schema(self, conn: sqlite3.Connection):
+        """Bring databases created by older versions up to the current schema"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_messages)")}
+        if "msg_id" not in columns:
+            conn.execute("ALTER TABLE chat_messages ADD COLUMN msg_id TEXT")
+        if "day" not in columns:
+            conn.execute("ALTER TABLE chat_messages ADD COLUMN day TEXT")
+
+        # Backfill message IDs, dropping duplicates of messages already stored
+        seen = {row[0] for row in conn.execute("SELECT msg_id FROM chat_messages WHERE msg_id IS NOT NULL")}
+        rows = conn.execute("SELECT id, role, content, timestamp, extra FROM chat_messages WHERE msg_id IS NULL ORDER BY id").fetchall()
+        for row in rows:
+            msg_id = message_id(self._message_from_row(row[1:]))
+            if msg_id in seen:
+                conn.execute("DELETE FROM chat_messages WHERE id = ?", (row[0],))
+            else:
+                seen.add(msg_id)
+                conn.execute("UPDATE chat_messages SET msg_id = ? WHERE id = ?", (msg_id, row[0]))
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS chat_messages_msg_id ON chat_messages (msg_id)")
+
+        # Backfill the day column used by the history index
+        rows = conn.execute("SELECT id, timestamp FROM chat_messages WHERE day IS NULL AND timestamp IS NOT NULL").fetchall()
+        conn.executemany(
+            "UPDATE chat_messages SET day = ? WHERE id = ?",
+            [(message_day({"timestamp": timestamp}), row_id) for row_id, timestamp in rows]
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS chat_messages_day ON chat_messages (day, id)")
+
+    def _rebuild_progress(self, conn: sqlite3.Connection):
+        """Recount lesson_progress from the assignments (new plans and databases from older versions)"""
+        conn.execute("DELETE FROM lesson_progress")
+        conn.execute(
+            """INSERT INTO lesson_progress (week_position, total, completed)
+               SELECT w.position, COUNT(a.id), COALESCE(SUM(a.completed), 0)
+               FROM lesson_weeks w LEFT JOIN lesson_assignments a ON a.week_position = w.position
+               GROUP BY w.position"""
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection (Streamlit runs each session on its own thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Lesson plan inputs ---
+    def load_lesson_plan_inputs(self):
+        row = self._connect().execute("SELECT value FROM settings WHERE key = 'lesson_plan_inputs'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_lesson_plan_inputs(self, inputs):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES ('lesson_plan_inputs', ?)",
+                (json.dumps(inputs),)
+            )
+
+    # --- Vocabulary ---
+    def load_vocabulary(self):
+        rows = self._connect().execute("SELECT word, translation, example FROM vocabulary ORDER BY id").fetchall()
+        return [{"word": word, "translation": translation, "example": example} for word, translation, example in rows]
+
+    def save_vocabulary(self, vocab_list):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM vocabulary")
+            conn.executemany(
+                "INSERT INTO vocabulary (word, translation, example) VALUES (?, ?, ?)",
+                [self._vocab_row(entry) for entry in vocab_list]
+            )
+
+    def add_words(self, entries):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO vocabulary (word, translation, example) VALUES (?, ?, ?)",
+                [self._vocab_row(entry) for entry in entries]
+            )
+
+    def delete_word(self, word):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM vocabulary WHERE word = ?", (word,))
+
+    def _vocab_row(self, entry):
+        if isinstance(entry, str):
+            return (entry, "None.", "None.")
+        return (entry.get("word", "Unknown"), entry.get("translation", "None."), entry.get("example", "None."))
+
+    # --- Lesson plan ---
+    def load_lesson_plan(self):
+        conn = self._connect()
+        plan = [
+            {"week_or_day": week_or_day, "assignments": []}
+            for _, week_or_day in conn.execute("SELECT position, week_or_day FROM lesson_weeks ORDER BY position")
+        ]
+        for week_position, title, completed in conn.execute(
+            "SELECT week_position, title, completed FROM lesson_assignments ORDER BY week_position, position"
+        ):
+            plan[week_position]["assignments"].append({"title": title, "completed": bool(completed)})
+        return plan
+
+    def save_lesson_plan(self, plan):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM lesson_weeks")
+            conn.execute("DELETE FROM lesson_assignments")
+            for i, week in enumerate(plan):
+                conn.execute("INSERT INTO lesson_weeks (position, week_or_day) VALUES (?, ?)", (i, week["week_or_day"]))
+                conn.executemany(
+                    "INSERT INTO lesson_assignments (week_position, position, title, completed) VALUES (?, ?, ?, ?)",
+                    [(i, j, task["title"], int(task.get("completed", False))) for j, task in enumerate(week["assignments"])]
+                )
+            self._rebuild_progress(conn)
+
+    def apply_lesson_plan_changes(self, changes):
+        """Apply assignment changes as row updates in a single transaction, adjusting lesson_progress by the difference"""
+        with self._connect() as conn:
+            for change in changes:
+                kind, week_index = change[0], change[1]
+                if kind == "completed":
+                    cursor = conn.execute(
+                        "UPDATE lesson_assignments SET completed = ? WHERE week_position = ? AND position = ? AND completed != ?",
+                        (int(change[3]), week_index, change[2], int(change[3]))
+                    )
+                    if cursor.rowcount:
+                        self._adjust_progress(conn, week_index, 0, 1 if change[3] else -1)
+                elif kind == "add":
+                    if conn.execute("SELECT 1 FROM lesson_weeks WHERE position = ?", (week_index,)).fetchone() is None:
+                        continue
+                    conn.execute(
+                        """INSERT INTO lesson_assignments (week_position, position, title, completed)
+                           SELECT ?, COALESCE(MAX(position) + 1, 0), ?, 0 FROM lesson_assignments WHERE week_position = ?""",
+                        (week_index, change[2], week_index)
+                    )
+                    self._adjust_progress(conn, week_index, 1, 0)
+                elif kind == "delete":
+                    row = conn.execute(
+                        "SELECT completed FROM lesson_assignments WHERE week_position = ? AND position = ?",
+                        (week_index, change[2])
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    conn.execute(
+                        "DELETE FROM lesson_assignments WHERE week_position = ? AND position = ?",
+                        (week_index, change[2])
+                    )
+                    conn.execute(
+                        "UPDATE lesson_assignments SET position = position - 1 WHERE week_position = ? AND position > ?",
+                        (week_index, change[2])
+                    )
+                    self._adjust_progress(conn, week_index, -1, -row[0])
+                else:
+                    raise ValueError(f"Unknown lesson plan change: {kind}")
+
+    def _adjust_progress(self, conn, week_index, total_delta, completed_delta):
+        conn.execute(
+            "UPDATE lesson_progress SET total = total + ?, completed = completed + ? WHERE week_position = ?",
+            (total_delta, completed_delta, week_index)
+        )
+
+    def load_progress(self):
+        weeks = [
+            {"week_or_day": week_or_day, "total": total, "completed": completed}
+            for week_or_day, total, completed in self._connect().execute(
+                """SELECT w.week_or_day, p.total, p.completed
+                   FROM lesson_progress p JOIN lesson_weeks w ON w.position = p.week_position
+                   ORDER BY p.week_position"""
+            )
+        ]
+        return {
+            "total": sum(week["total"] for week in weeks),
+            "completed": sum(week["completed"] for week in weeks),
+            "weeks": weeks
+        }
+
+    # --- Chat history ---
+    def load_chat_history(self):
+        rows = self._connect().execute("SELECT role, content, timestamp, extra FROM chat_messages ORDER BY id").fetchall()
+        return [self._message_from_row(row) for row in rows]
+
+    def save_chat_history(self, messages):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM chat_messages")
+            self._insert_messages(conn, messages)
+
+    def append_chat_history(self, messages):
+        """Append messages, skipping any whose ID is already stored"""
+        with self._connect() as conn:
+            self._insert_messages(conn, messages)
+
+    def _insert_messages(self, conn, messages):
+        # The unique msg_id index turns repeated messages into no-ops
+        conn.executemany(
+            "INSERT OR IGNORE INTO chat_messages (msg_id, day, role, content, timestamp, extra) VALUES (?, ?, ?, ?, ?, ?)",
+            [self._message_row(msg) for msg in messages]
+        )
+
+    def _message_row(self, msg):
+        # Keep any fields beyond role/content/timestamp so messages round-trip unchanged
+        extra = {k: v for k, v in msg.items() if k not in ("role", "content", "timestamp")}
+        return (message_id(msg), message_day(msg), msg.get("role", ""), msg.get("content", ""), msg.get("timestamp"), json.dumps(extra) if extra else None)
+
+    def list_history_days(self):
+        return self._connect().execute(
+            "SELECT day, COUNT(*) FROM chat_messages WHERE day IS NOT NULL GROUP BY day ORDER BY day DESC"
+        ).fetchall()
+
+    def load_history_day(self, day, offset=0, limit=None):
+        rows = self._connect().execute(
+            "SELECT role, content, timestamp, extra FROM chat_messages WHERE day = ? ORDER BY id LIMIT ? OFFSET ?",
+            (day, -1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._message_from_row(row) for row in rows]
+
+    def _message_from_row(self, row):
+        role, content, timestamp, extra = row
+        msg = {"role": role, "content": content}
+        if timestamp is not None:
+            msg["timestamp"] = timestamp
+        if extra:
+            msg.update(json.loads(extra))
+        return msg
+
+
+def migrate_json_to_sqlite(source: JSONStorage, target: SQLiteStorage):
+    """Copy all data from JSON files into a SQLite database (replaces its contents)"""
+    inputs = source.load_lesson_plan_inputs()
+    if inputs is not None:
+        target.save_lesson_plan_inputs(inputs)
+    target.save_vocabulary(source.load_vocabulary())
+    target.save_lesson_plan(source.load_lesson_plan())
+    target.save_chat_history(source.load_chat_history())
@@ -0,0 +1,30 @@
+"""One-shot migration of the JSON data files into the SQLite storage backend.
+
+Usage:
+    python -m utils.storage_migrate [--source assets] [--target assets/tutor.db]
+
+Then set STORAGE_BACKEND=sqlite in .env. The JSON files are left untouched.
+"""
+import os
+import argparse
+from utils.storage_backends import JSONStorage, SQLiteStorage, migrate_json_to_sqlite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate JSON data files into a SQLite database")
+    parser.add_argument("--source", default=os.getenv("STORAGE_DIR", "assets"), help="Directory with the JSON files")
+    parser.add_argument("--target", default=None, help="SQLite database path (default: <source>/tutor.db)")
+    args = parser.parse_args()
+
+    target_path = args.target or os.path.join(args.source, "tutor.db")
+    source = JSONStorage(args.source)
+    target = SQLiteStorage(target_path)
+    migrate_json_to_sqlite(source, target)
+
+    print(f"Migrated {len(target.load_vocabulary())} words, "
+          f"{sum(len(week['assignments']) for week in target.load_lesson_plan())} assignments and "
+          f"{len(target.load_chat_history())} chat messages into {target_path}")
+
+
+if __name__ == "__main__":
+    main()
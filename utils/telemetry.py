@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import threading
+import statistics
+from datetime import datetime
+from typing import Dict, List, Optional
+
+TELEMETRY_FILE = "assets/llm_telemetry.jsonl"
+
+# Records the Settings page summarizes: the most recent calls, not the whole rotated history
+SUMMARY_RECORDS = 2000
+
+
+def _tail_lines(path: str, count: int, block_size: int = 65536) -> List[bytes]:
+    """The last count lines of a file, read backwards in blocks instead of scanning it all"""
+    with open(path, "rb") as file:
+        file.seek(0, os.SEEK_END)
+        position = file.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(block_size, position)
+            position -= step
+            file.seek(position)
+            data = file.read(step) + data
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # Started mid-line
+    return lines[-count:]
+
+
+class TelemetrySink:
+    """Append-only JSONL file of LLM call records, rotated by size (file, file.1 ... file.N)"""
+
+    def __init__(self, path: str = TELEMETRY_FILE, max_bytes: int = 5_000_000, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._read_cache = (None, None)
+
+    def _rotate(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def _paths(self) -> List[str]:
+        """Existing files, oldest first"""
+        paths = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def read(self, limit: Optional[int] = None) -> List[Dict]:
+        """Return records oldest first, only the most recent limit if given
+
+        With a limit, files are read from the end and older files are only
+        opened when needed. The result is reused until a file changes.
+        """
+        with self._lock:
+            paths = self._paths()
+            key = (limit, tuple((path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths))
+            if self._read_cache[0] == key:
+                return list(self._read_cache[1])
+
+            records = []
+            for path in reversed(paths):
+                if limit:
+                    lines = _tail_lines(path, limit - len(records))
+                else:
+                    with open(path, "rb") as file:
+                        lines = file.read().splitlines()
+                parsed = []
+                for line in lines:
+                    try:
+                        parsed.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # Partially written line
+                records = parsed + records
+                if limit and len(records) >= limit:
+                    break
+            records = records[-limit:] if limit else records
+            self._read_cache = (key, records)
+        return list(records)
+
+    def clear(self):
+        with self._lock:
+            self._read_cache = (None, None)
+            for index in range(self.backups, 0, -1):
+                if os.path.exists(f"{self.path}.{index}"):
+                    os.remove(f"{self.path}.{index}")
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def estimate_tokens(text: str) -> int:
+    from utils.context_window import count_tokens
+    return count_tokens(text)
+
+
+class CallRecorder:
+    """Times one LLM call and turns it into a telemetry record
+
+    Provider code fills usage with prompt_tokens/completion_tokens when the
+    response reports them; otherwise the counts are estimated from the text.
+    """
+
+    def __init__(self, provider: str, model: str, model_type: str, prompt_key: Optional[str],
+                 messages: List[Dict], stream: bool = False):
+        self.provider = provider
+        self.model = model
+        self.model_type = model_type
+        self.prompt_key = prompt_key
+        self.messages = messages
+        self.stream = stream
+        self.usage = {}
+        self.started = time.perf_counter()
+        self.ttft = None
+
+    def first_token(self):
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+
+    def record(self) -> Dict:
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "provider": self.provider,
+            "model": self.model,
+            "model_type": self.model_type,
+            "prompt_key": self.prompt_key,
+            "stream": self.stream,
+            "wall_time": time.perf_counter() - self.started,
+            "ttft": self.ttft
+        }
+
+    def finish(self, sink: Optional[TelemetrySink], content: Optional[str] = None, error: Optional[BaseException] = None):
+        if sink is None:
+            return
+        record = self.record()
+        estimated = "prompt_tokens" not in self.usage or "completion_tokens" not in self.usage
+        prompt_tokens = self.usage.get("prompt_tokens")
+        completion_tokens = self.usage.get("completion_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in self.messages)
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(content) if content else 0
+        record.update(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tokens_estimated=estimated,
+            error=type(error).__name__ if error is not None else None
+        )
+        try:
+            sink.write(record)
+        except OSError:
+            pass  # Telemetry must never break a completion
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, fraction in 0..1"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(records: List[Dict]) -> List[Dict]:
+    """Aggregate records per provider and model: call count, errors, p50/p95 latency and tokens/s"""
+    groups = {}
+    for record in records:
+        groups.setdefault((record.get("provider"), record.get("model")), []).append(record)
+
+    rows = []
+    for (provider, model), items in sorted(groups.items(), key=lambda item: str(item[0])):
+        ok = [r for r in items if not r.get("error")]
+        wall = [r["wall_time"] for r in ok]
+        ttft = [r["ttft"] for r in ok if r.get("ttft") is not None]
+
+        # Decode speed: completion tokens over the time after the first token (whole call when not streaming)
+        speeds = []
+        for r in ok:
+            decode_time = r["wall_time"] - (r.get("ttft") or 0)
+            if r.get("completion_tokens") and decode_time > 0:
+                speeds.append(r["completion_tokens"] / decode_time)
+
+        rows.append({
+            "provider": provider,
+            "model": model,
+            "calls": len(items),
+            "errors": len(items) - len(ok),
+            "p50_latency_s": percentile(wall, 0.5),
+            "p95_latency_s": percentile(wall, 0.95),
+            "p50_ttft_s": percentile(ttft, 0.5),
+            "p95_ttft_s": percentile(ttft, 0.95),
+            "tokens_per_s": statistics.median(speeds) if speeds else None
+        })
+    return rows
+
+
+def error_counts(records: List[Dict]) -> Dict[str, int]:
+    counts = {}
+    for record in records:
+        if record.get("error"):
+            counts[record["error"]] = counts.get(record["error"], 0) + 1
+    return counts
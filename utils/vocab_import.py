@@ -0,0 +1,106 @@
+import io
+import re
+import csv
+import json
+from typing import Dict, List, Tuple
+from utils.llm_client import get_llm_client, get_prompt
+
+# Rough output cost of one {"word", "translation", "example"} object in tokens
+TOKENS_PER_ENTRY = 60
+# Upper bound on words per request, even for models with a large max_tokens
+MAX_WORDS_PER_CHUNK = 40
+
+
+def parse_word_list(text: str) -> List[str]:
+    """Split pasted text into words: one per line, or separated by commas, semicolons or tabs"""
+    words = []
+    seen = set()
+    for item in re.split(r"[\n,;\t]+", text):
+        word = item.strip().strip('"').strip()
+        if word and word.lower() not in seen:
+            seen.add(word.lower())
+            words.append(word)
+    return words
+
+
+def parse_uploaded_file(name: str, data: bytes) -> List[str]:
+    """Extract words from an uploaded CSV (first column) or TXT file"""
+    text = data.decode("utf-8-sig", errors="replace")
+    if not name.lower().endswith(".csv"):
+        return parse_word_list(text)
+
+    rows = [row for row in csv.reader(io.StringIO(text)) if row and row[0].strip()]
+    # Skip a header row such as "word,translation"
+    if rows and rows[0][0].strip().lower() in ("word", "words", "term"):
+        rows = rows[1:]
+    return parse_word_list("\n".join(row[0] for row in rows))
+
+
+def dedupe_words(words: List[str], vocab_list: List[Dict]) -> List[str]:
+    """Drop words that are already in the vocabulary (case-insensitive)"""
+    existing = {entry["word"].strip().lower() for entry in vocab_list}
+    return [word for word in words if word.lower() not in existing]
+
+
+def chunk_words(words: List[str], max_tokens: int) -> List[List[str]]:
+    """Split words into chunks whose answers fit into the model's max_tokens"""
+    size = max(1, min(MAX_WORDS_PER_CHUNK, int(max_tokens) // TOKENS_PER_ENTRY))
+    return [words[i:i + size] for i in range(0, len(words), size)]
+
+
+def build_batch_request(words: List[str], priority: str = "foreground") -> Dict:
+    """Build chat_completion arguments translating a chunk of words in one request"""
+    return {
+        "messages": [
+            {"role": "system", "content": get_prompt('word_translation_batch_system')},
+            {"role": "user", "content": get_prompt('word_translation_batch', words=json.dumps(words, ensure_ascii=False))}
+        ],
+        "prompt_key": "word_translation_batch",
+        "priority": priority
+    }
+
+
+def parse_batch_response(response: str, words: List[str]) -> List[Dict]:
+    """Parse the JSON array returned for a chunk, keeping only the requested words"""
+    json_match = re.search(r'\[.*\]', response or "", re.DOTALL)
+    if not json_match:
+        return []
+
+    try:
+        items = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return []
+
+    requested = {word.lower(): word for word in words}
+    entries = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        word = requested.pop(str(item.get("word", "")).strip().lower(), None)
+        translation = str(item.get("translation", "")).strip()
+        example = str(item.get("example", "")).strip()
+        if word and translation and example:
+            entries.append({"word": word, "translation": translation, "example": example})
+    return entries
+
+
+def translate_words(words: List[str], model_type: str = "chat", priority: str = "foreground") -> Tuple[List[Dict], List[str]]:
+    """Translate many words with batched, concurrent requests
+
+    Returns the new vocabulary entries in input order and the words that could not be translated.
+    """
+    # Deferred: the async client pulls in httpx and the async OpenAI SDK
+    from utils.async_llm_client import run_batch
+
+    chunks = chunk_words(words, get_llm_client(model_type).max_tokens)
+    results = run_batch([build_batch_request(chunk, priority) for chunk in chunks], model_type)
+
+    translated = {}
+    for chunk, result in zip(chunks, results):
+        if result.ok:
+            for entry in parse_batch_response(result.content, chunk):
+                translated[entry["word"]] = entry
+
+    entries = [translated[word] for word in words if word in translated]
+    failed = [word for word in words if word not in translated]
+    return entries, failed
@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from utils import storage
+from utils.llm_client import _get_config_cache, get_prompt
+
+SUGGESTIONS_FILENAME = "vocab_suggestions.json"
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "interval_seconds": 300,
+    "messages_per_batch": 20,
+    "max_messages_per_run": 200,
+    "max_words_per_batch": 10
+}
+
+
+def get_mining_settings() -> Dict:
+    return dict(DEFAULT_SETTINGS, **_get_config_cache()["config"].get("vocab_mining", {}))
+
+
+def format_conversation(messages: List[Dict]) -> str:
+    return "\n".join(f"{'Learner' if m['role'] == 'user' else 'Tutor'}: {m['content']}" for m in messages)
+
+
+def parse_candidates(response: str) -> List[Dict]:
+    """Parse the [{"word", "reason"}] array returned by the vocabulary_mining prompt"""
+    json_match = re.search(r'\[.*\]', response or "", re.DOTALL)
+    if not json_match:
+        return []
+    try:
+        items = json.loads(json_match.group())
+    except json.JSONDecodeError:
+        return []
+    return [
+        {"word": str(item["word"]).strip(), "reason": str(item.get("reason", "")).strip()}
+        for item in items
+        if isinstance(item, dict) and str(item.get("word", "")).strip()
+    ]
+
+
+def build_extraction_request(messages: List[Dict], max_words: int) -> Dict:
+    """Build chat_completion arguments listing the words the learner got wrong or asked about in a batch of messages"""
+    return {
+        "messages": [
+            {"role": "system", "content": get_prompt('vocabulary_mining_system')},
+            {"role": "user", "content": get_prompt('vocabulary_mining', conversation=format_conversation(messages), max_words=max_words)}
+        ],
+        "prompt_key": "vocabulary_mining",
+        "priority": "background"
+    }
+
+
+def extract_candidates(batches: List[List[Dict]], max_words: int) -> List[Dict]:
+    """One request per batch of messages; raises the first failed request's error
+
+    Runs on the miner's thread, so it goes through the async client, which
+    raises instead of reporting through st.error (there is no page to show it on).
+    """
+    # Deferred: the async client pulls in httpx and the async OpenAI SDK
+    from utils.async_llm_client import run_batch
+
+    candidates = []
+    for result in run_batch([build_extraction_request(batch, max_words) for batch in batches], "chat"):
+        if not result.ok:
+            raise result.error
+        candidates += parse_candidates(result.content)[:max_words]
+    return candidates
+
+
+class VocabMiner:
+    """Suggests vocabulary from one user's persisted chat history, in the background
+
+    A cursor (day, offset into that day) marks how far the history has been
+    read, so each run only sees new messages. Runs extract candidate words in
+    batches of messages, drop words already in the vocabulary, suggested or
+    dismissed, and translate the rest with one batched request. Suggestions
+    wait in vocab_suggestions.json until the learner accepts or dismisses them.
+    """
+
+    def __init__(self, user: str, path: str):
+        self.user = user
+        self.path = path
+        self.last_run = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = self._load()
+
+    # --- Persistence ---
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        state.setdefault("cursor", None)
+        state.setdefault("suggestions", [])
+        state.setdefault("dismissed", [])
+        return state
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=SUGGESTIONS_FILENAME + ".", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    # --- Suggestions ---
+    def suggestions(self) -> List[Dict]:
+        with self._lock:
+            return list(self.state["suggestions"])
+
+    def _take(self, word: str) -> Optional[Dict]:
+        for index, suggestion in enumerate(self.state["suggestions"]):
+            if suggestion["word"] == word:
+                return self.state["suggestions"].pop(index)
+        return None
+
+    def accept(self, word: str) -> Optional[Dict]:
+        """Remove a suggestion and return it as a vocabulary entry (the caller saves it)"""
+        with self._lock:
+            suggestion = self._take(word)
+            self._save()
+        if suggestion is None:
+            return None
+        return {key: suggestion[key] for key in ("word", "translation", "example")}
+
+    def dismiss(self, word: str):
+        """Remove a suggestion and never suggest the word again"""
+        with self._lock:
+            if self._take(word) is not None:
+                self.state["dismissed"].append(word.lower())
+                self._save()
+
+    # --- Mining ---
+    def _new_messages(self, backend, limit: int) -> Tuple[List[Dict], Optional[Dict]]:
+        """Messages after the cursor (oldest first, at most limit) and the cursor after them"""
+        days = sorted(backend.list_history_days())
+        if not days:
+            return [], self.state["cursor"]
+        cursor = self.state["cursor"]
+        if cursor is None:
+            # First run: start with the most recent day rather than mining years of history
+            cursor = {"day": days[-1][0], "offset": 0}
+
+        messages = []
+        for day, count in days:
+            if day < cursor["day"]:
+                continue
+            start = cursor["offset"] if day == cursor["day"] else 0
+            if count <= start:
+                continue
+            batch = backend.load_history_day(day, start, limit - len(messages))
+            messages += batch
+            cursor = {"day": day, "offset": start + len(batch)}
+            if len(messages) >= limit:
+                break
+        return messages, cursor
+
+    def run_once(self) -> int:
+        """Mine messages after the cursor; returns how many suggestions were added"""
+        settings = get_mining_settings()
+        backend = storage.get_backend(self.user)
+        messages, cursor = self._new_messages(backend, int(settings["max_messages_per_run"]))
+        learner_turns = [m for m in messages if m.get("role") in ("user", "assistant") and m.get("content", "").strip()]
+
+        size = max(1, int(settings["messages_per_batch"]))
+        batches = [learner_turns[start:start + size] for start in range(0, len(learner_turns), size)]
+        batches = [batch for batch in batches if any(m["role"] == "user" for m in batch)]
+        candidates = extract_candidates(batches, int(settings["max_words_per_batch"])) if batches else []
+
+        with self._lock:
+            known = {
+                (entry.get("word", "") if isinstance(entry, dict) else entry).strip().lower()
+                for entry in backend.load_vocabulary()
+            }
+            known |= {s["word"].lower() for s in self.state["suggestions"]}
+            known |= set(self.state["dismissed"])
+        reasons = {}
+        for candidate in candidates:
+            key = candidate["word"].lower()
+            if key not in known and key not in reasons:
+                reasons[key] = candidate
+
+        added = []
+        if reasons:
+            # Deferred: translate_words pulls in the async client
+            from utils.vocab_import import translate_words
+            words = [candidate["word"] for candidate in reasons.values()]
+            entries, _ = translate_words(words, model_type="chat", priority="background")
+            added = [
+                dict(entry, reason=reasons[entry["word"].lower()]["reason"], found=datetime.now().isoformat())
+                for entry in entries
+            ]
+
+        with self._lock:
+            self.state["suggestions"] += added
+            self.state["cursor"] = cursor
+            self._save()
+        return len(added)
+
+    def _run(self):
+        try:
+            self.run_once()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = e  # The cursor did not move, the next run retries these messages
+        finally:
+            self.last_run = time.monotonic()
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_due(self) -> bool:
+        settings = get_mining_settings()
+        if not settings["enabled"] or self.is_running():
+            return False
+        return self.last_run is None or time.monotonic() - self.last_run >= float(settings["interval_seconds"])
+
+    def start(self) -> bool:
+        """Start a background run unless one is in progress"""
+        with self._lock:
+            if self.is_running():
+                return False
+            self._thread = threading.Thread(target=self._run, name="vocab-miner", daemon=True)
+            self._thread.start()
+            return True
+
+
+_miners = {}
+_miners_lock = threading.Lock()
+
+
+def get_vocab_miner() -> VocabMiner:
+    """Get or create the miner of the current session's user"""
+    user = storage.get_current_user() or ""
+    path = os.path.join(storage.get_storage_dir(user), SUGGESTIONS_FILENAME)
+    miner = _miners.get(path)
+    if miner is None:
+        with _miners_lock:
+            miner = _miners.get(path)
+            if miner is None:
+                miner = VocabMiner(user, path)
+                _miners[path] = miner
+    return miner
+
+
+def mine_in_background(session_state) -> bool:
+    """Persist the session's new messages and start a mining run if one is due; returns True if started"""
+    miner = get_vocab_miner()
+    if not miner.is_due():
+        return False
+    storage.sync_session_history(session_state)
+    return miner.start()
@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+# Failures a later retry may fix: file I/O and lock errors, a busy SQLite database
+RETRYABLE_ERRORS = (OSError, sqlite3.OperationalError)
+
+
+class LessonPlanWriteBehind:
+    """Buffers lesson plan assignment changes and persists them in batches
+
+    Changes are queued in memory and applied in order by a background timer
+    once delay seconds have passed since the first unsaved change. Repeated
+    completion toggles of the same assignment collapse into the last value.
+    A flush that fails on I/O or locking keeps its changes queued and is
+    retried on the next timer; any other failure drops the batch, so one bad
+    change cannot block every later save.
+    """
+
+    def __init__(self, backend, delay: float = 0.5):
+        self.backend = backend
+        self.delay = delay
+        self.last_error = None  # Why the queued changes are not saved yet; they will be retried
+        self.dropped_error = None  # Why the last dropped batch could not be saved, until taken
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def _schedule(self):
+        # Called with self._lock held
+        if self._timer is None:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _coalesce(self, change: Tuple):
+        # A later toggle of the same assignment replaces an earlier one, unless an add/delete
+        # in between may have shifted the indices
+        if change[0] == "completed":
+            for index in range(len(self._pending) - 1, -1, -1):
+                queued = self._pending[index]
+                if queued[0] != "completed":
+                    break
+                if queued[1:3] == change[1:3]:
+                    del self._pending[index]
+                    break
+        self._pending.append(change)
+
+    def submit(self, change: Tuple):
+        """Queue a change, see StorageBackend.apply_lesson_plan_changes for the format"""
+        with self._lock:
+            self._coalesce(change)
+            self._schedule()
+
+    def pending(self) -> List[Tuple]:
+        with self._lock:
+            return list(self._pending)
+
+    def discard(self):
+        """Drop queued changes without saving them"""
+        with self._lock:
+            self._pending = []
+            self.last_error = None
+
+    def take_dropped_error(self) -> Optional[Exception]:
+        """The error that made the last batch be dropped, reported once"""
+        with self._lock:
+            error, self.dropped_error = self.dropped_error, None
+            return error
+
+    def flush(self) -> Optional[Exception]:
+        """Persist all queued changes now, returns the error if saving failed"""
+        with self._flush_lock:
+            with self._lock:
+                changes, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not changes:
+                return None
+            try:
+                self.backend.apply_lesson_plan_changes(changes)
+            except RETRYABLE_ERRORS as e:
+                with self._lock:
+                    self._pending = changes + self._pending
+                    self.last_error = e
+                    self._schedule()
+                return e
+            except Exception as e:
+                # Not retried: the same changes would fail again
+                with self._lock:
+                    self.dropped_error = e
+                    if not self._pending:
+                        self.last_error = None
+                return e
+            self.last_error = None
+            return None